@@ -0,0 +1,206 @@
+# Mede quanto tempo e memória cada etapa do projeto gasta com volumes
+# crescentes de dados sintéticos (benchmarks/gerador_dados_sinteticos.py).
+#
+# Para cada tamanho, os dados brutos são gerados numa pasta temporária e as
+# etapas rodam lá dentro, cada uma num processo separado, na mesma ordem do
+# executar_pipeline.py: filtro, estatísticas nacionais, estatísticas por UF,
+# consolidação GERAL por UF e gráficos. De cada etapa são anotados o tempo de
+# relógio, o tempo de CPU, o pico de memória (RSS) e a vazão em sessões por segundo.
+#
+# O resultado vai para um JSON em benchmarks/resultados/. Com --comparar, o
+# relatório novo é comparado com um anterior e o script termina com código 1 se
+# alguma etapa ficou mais lenta ou usou mais memória além da tolerância.
+#
+# Uso:
+#   python benchmarks/executar_benchmarks.py                          (1e5 e 1e6 sessões)
+#   python benchmarks/executar_benchmarks.py --tamanhos 1e5 1e6 1e7 --sem-graficos
+#   python benchmarks/executar_benchmarks.py --comparar benchmarks/resultados/base.json
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from gerador_dados_sinteticos import gera_dados
+
+RAIZ = Path(__file__).resolve().parents[1]
+PASTA_RESULTADOS = Path(__file__).resolve().parent / "resultados"
+
+# (nome, script, argumentos); a ordem respeita as dependências entre as etapas
+ETAPAS = [
+    ("filtro", "tratador_de_dados/filtro_de_dados.py", ["--origem", "bruto", "--destino", "dados_filtrados"]),
+    ("estatisticas_nacionais", "códigos_comparativos_brutos/estatísticas_descritivas_numéricas.py", []),
+    ("estatisticas_uf", "códigos_comparativos_por_UF/estatisticas_comparativas_descritivas_por_UF.py", []),
+    ("estatisticas_gerais_uf", "códigos_comparativos_por_UF/Estatísticas_gerais_por_UF.py", []),
+    ("graficos_gerais", "códigos_comparativos_brutos/graficos_comparativos.py", []),
+    ("graficos_uf", "códigos_comparativos_por_UF/graficos_por_estado.py", []),
+]
+ETAPAS_GRAFICOS = {"graficos_gerais", "graficos_uf"}
+
+
+# Roda um script e devolve (código, segundos, segundos de CPU, pico de RSS em MB).
+# O uso de recursos vem do wait4 do próprio filho; onde ele não existe
+# (Windows), CPU e memória ficam como None.
+def executa_medindo(comando, pasta):
+    ambiente = dict(os.environ, MPLBACKEND="Agg")
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(comando, cwd=pasta, env=ambiente,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if not hasattr(os, "wait4"):
+        _, erro = processo.communicate()
+        return processo.returncode, time.perf_counter() - inicio, None, None, erro
+
+    erro = processo.stderr.read()
+    _, status, uso = os.wait4(processo.pid, 0)
+    duracao = time.perf_counter() - inicio
+    processo.returncode = os.waitstatus_to_exitcode(status)
+    processo.stderr.close()
+
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return processo.returncode, duracao, uso.ru_utime + uso.ru_stime, uso.ru_maxrss / divisor, erro
+
+
+def tamanho_pasta(pasta):
+    pasta = Path(pasta)
+    if pasta.is_file():
+        return pasta.stat().st_size
+    return sum(p.stat().st_size for p in pasta.rglob("*") if p.is_file())
+
+
+def roda_tamanho(linhas, meses, etapas, pasta_base, extra_filtro):
+    pasta = Path(tempfile.mkdtemp(prefix=f"bench_{linhas}_", dir=pasta_base))
+    print(f"\n== {linhas:,} sessões ({meses} meses) em {pasta}")
+
+    inicio = time.perf_counter()
+    gera_dados(pasta / "bruto", linhas, meses)
+    print(f"  dados gerados em {time.perf_counter() - inicio:.1f}s "
+          f"({tamanho_pasta(pasta / 'bruto') / 1e6:.1f} MB)")
+
+    resultados = []
+    for nome, script, argumentos in ETAPAS:
+        if nome not in etapas:
+            continue
+        if nome == "filtro":
+            argumentos = argumentos + extra_filtro
+        comando = [sys.executable, str(RAIZ / script), *argumentos]
+        codigo, duracao, cpu, memoria, erro = executa_medindo(comando, pasta)
+        if codigo != 0:
+            print(f"  [{nome}] FALHOU (código {codigo})\n{erro}")
+        resultados.append({
+            "etapa": nome,
+            "linhas": linhas,
+            "ok": codigo == 0,
+            "segundos": round(duracao, 4),
+            "cpu_segundos": None if cpu is None else round(cpu, 4),
+            "linhas_por_segundo": round(linhas / duracao, 1) if duracao > 0 else None,
+            "pico_memoria_mb": None if memoria is None else round(memoria, 1),
+        })
+        r = resultados[-1]
+        print(f"  {'[' + nome + ']':<26}{duracao:8.2f}s  {r['linhas_por_segundo'] or 0:>12,.0f} sessões/s  "
+              f"pico {r['pico_memoria_mb'] or 0:8.1f} MB")
+    return pasta, resultados
+
+
+def versao_codigo():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+# Compara com um relatório anterior: uma etapa regrediu se a vazão caiu ou o
+# pico de memória subiu mais que `tolerancia` (fração) para o mesmo tamanho.
+def compara(atual, anterior, tolerancia):
+    base = {(r["etapa"], r["linhas"]): r for r in anterior["resultados"] if r["ok"]}
+    regressoes = []
+    for r in atual["resultados"]:
+        b = base.get((r["etapa"], r["linhas"]))
+        if b is None or not r["ok"]:
+            continue
+        if b["linhas_por_segundo"] and r["linhas_por_segundo"] is not None:
+            variacao = r["linhas_por_segundo"] / b["linhas_por_segundo"] - 1
+            if variacao < -tolerancia:
+                regressoes.append(f"{r['etapa']} ({r['linhas']:,}): vazão {variacao:+.0%}")
+        if b["pico_memoria_mb"] and r["pico_memoria_mb"] is not None:
+            variacao = r["pico_memoria_mb"] / b["pico_memoria_mb"] - 1
+            if variacao > tolerancia:
+                regressoes.append(f"{r['etapa']} ({r['linhas']:,}): memória {variacao:+.0%}")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do projeto com dados sintéticos.")
+    parser.add_argument("--tamanhos", type=float, nargs="+", default=[1e5, 1e6],
+                        help="totais de sessões a testar (ex.: 1e5 1e6 1e7)")
+    parser.add_argument("--meses", type=int, default=12, help="meses em que as sessões são divididas")
+    parser.add_argument("--etapas", nargs="+", choices=[e[0] for e in ETAPAS], default=None,
+                        help="etapas a medir (padrão: todas)")
+    parser.add_argument("--sem-graficos", action="store_true", help="pula as etapas de gráficos")
+    parser.add_argument("--processos", type=int, default=1, help="repassado ao filtro")
+    parser.add_argument("--tamanho-bloco", type=int, default=None, help="repassado ao filtro")
+    parser.add_argument("--pasta-temporaria", type=Path, default=None,
+                        help="onde criar as pastas de trabalho (padrão: a do sistema)")
+    parser.add_argument("--manter", action="store_true", help="não apaga as pastas de trabalho")
+    parser.add_argument("--saida", type=Path, default=None, help="arquivo JSON do relatório")
+    parser.add_argument("--comparar", type=Path, default=None, help="relatório anterior para comparação")
+    parser.add_argument("--tolerancia", type=float, default=0.15,
+                        help="variação aceita antes de acusar regressão (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    etapas = set(args.etapas or [e[0] for e in ETAPAS])
+    if args.sem_graficos:
+        etapas -= ETAPAS_GRAFICOS
+    extra_filtro = ["--processos", str(args.processos)]
+    if args.tamanho_bloco:
+        extra_filtro += ["--tamanho-bloco", str(args.tamanho_bloco)]
+
+    relatorio = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": versao_codigo(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "nucleos": os.cpu_count(),
+        "meses": args.meses,
+        "argumentos_filtro": extra_filtro,
+        "resultados": [],
+    }
+    for tamanho in args.tamanhos:
+        pasta, resultados = roda_tamanho(int(tamanho), args.meses, etapas, args.pasta_temporaria, extra_filtro)
+        relatorio["resultados"].extend(resultados)
+        if not args.manter:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    saida = args.saida or PASTA_RESULTADOS / f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"\nRelatório salvo em: {saida}")
+
+    falhas = [r for r in relatorio["resultados"] if not r["ok"]]
+    regressoes = []
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regressoes = compara(relatorio, json.load(f), args.tolerancia)
+        for texto in regressoes:
+            print(f"REGRESSÃO: {texto}")
+        if not regressoes:
+            print(f"Sem regressões em relação a {args.comparar}")
+    sys.exit(1 if falhas or regressoes else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# Gera dados sintéticos de bilheteria com as mesmas sete colunas que o
+# tratador_de_dados/filtro_de_dados.py mantém, para medir o desempenho do
+# projeto com volumes maiores que a amostra de dados_filtrados.
+#
+# - PUBLICO assimétrico (binomial negativa: muitas sessões pequenas, cauda longa);
+# - 27 UFs com pesos parecidos com os reais (SP e RJ concentram o público);
+# - milhares de títulos e municípios (cada município pertence a uma UF), com
+#   popularidade no estilo Zipf, e algumas centenas de distribuidoras.
+#
+# Uso:
+#   python benchmarks/gerador_dados_sinteticos.py --linhas 1000000 --meses 12 --destino /tmp/bruto
+#   python benchmarks/gerador_dados_sinteticos.py --linhas 1e6 --formato filtrado --destino /tmp/dados_filtrados
+# O formato "bruto" (padrão) imita os CSVs da ANCINE (separador ";") e serve de
+# entrada para o filtro; o "filtrado" imita dados_filtrados/dados_filtrados[AAAA-MM].csv.
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+UFS = ["SP", "RJ", "MG", "RS", "PR", "DF", "BA", "SC", "PE", "GO", "CE", "ES", "PA", "AM",
+       "MA", "MT", "MS", "RN", "PB", "AL", "SE", "PI", "RO", "TO", "AP", "AC", "RR"]
+PESOS_UF = np.array([30, 11, 9, 6, 6, 4, 4, 4, 3.5, 3, 3, 2, 2, 1.8,
+                     1.2, 1.2, 1.2, 1, 1, 0.9, 0.7, 0.6, 0.5, 0.4, 0.3, 0.3, 0.2])
+PAISES = ["ESTADOS UNIDOS", "BRASIL", "REINO UNIDO", "FRANÇA", "JAPÃO", "CANADÁ", "ESPANHA",
+          "ALEMANHA", "ARGENTINA", "COREIA DO SUL", "ITÁLIA", "AUSTRÁLIA", "MÉXICO", "ÍNDIA"]
+PESOS_PAIS = np.array([55, 20, 6, 4, 3, 2, 2, 2, 1.5, 1.2, 1, 0.8, 0.7, 0.5])
+
+COLUNAS = ["DATA_EXIBICAO", "TITULO_BRASIL", "PAIS_OBRA", "PUBLICO",
+           "MUNICIPIO_SALA_COMPLEXO", "UF_SALA_COMPLEXO", "RAZAO_SOCIAL_DISTRIBUIDORA"]
+
+
+def pesos_zipf(n, expoente=1.1):
+    pesos = 1.0 / np.arange(1, n + 1) ** expoente
+    return pesos / pesos.sum()
+
+
+# Catálogo fixo (títulos, municípios, distribuidoras) gerado a partir da semente,
+# para que todos os meses usem os mesmos nomes.
+def catalogo(rng, n_titulos, n_municipios, n_distribuidoras):
+    titulos = np.array([f"FILME SINTETICO {i:05d}" for i in range(n_titulos)], dtype=object)
+    pais_titulo = rng.choice(len(PAISES), n_titulos, p=PESOS_PAIS / PESOS_PAIS.sum())
+    distribuidoras = np.array([f"DISTRIBUIDORA SINTETICA {i:03d} LTDA" for i in range(n_distribuidoras)], dtype=object)
+    distribuidora_titulo = rng.choice(n_distribuidoras, n_titulos, p=pesos_zipf(n_distribuidoras))
+
+    # municípios distribuídos entre as UFs conforme o peso de cada uma (pelo menos 1 por UF)
+    por_uf = np.maximum(1, np.round(PESOS_UF / PESOS_UF.sum() * n_municipios)).astype(int)
+    uf_municipio = np.repeat(np.arange(len(UFS)), por_uf)
+    municipios = np.array([f"MUNICIPIO {i:05d}" for i in range(len(uf_municipio))], dtype=object)
+    return {
+        "titulos": titulos,
+        "pais_titulo": np.array(PAISES, dtype=object)[pais_titulo],
+        "distribuidoras": distribuidoras[distribuidora_titulo],
+        "municipios": municipios,
+        "uf_municipio": np.array(UFS, dtype=object)[uf_municipio],
+    }
+
+
+# Gera `n` sessões de um mês como DataFrame.
+def gera_bloco(rng, cat, n, ano, mes):
+    n_titulos = len(cat["titulos"])
+    n_municipios = len(cat["municipios"])
+
+    titulo = rng.choice(n_titulos, n, p=pesos_zipf(n_titulos))
+    municipio = rng.choice(n_municipios, n, p=pesos_zipf(n_municipios, 0.8))
+    dias = pd.Period(f"{ano}-{mes:02d}").days_in_month
+    dia = rng.integers(1, dias + 1, n)
+    publico = rng.negative_binomial(0.8, 0.03, n)
+
+    datas = np.char.add(np.char.zfill(dia.astype(str), 2), f"/{mes:02d}/{ano}")
+    return pd.DataFrame({
+        "DATA_EXIBICAO": datas,
+        "TITULO_BRASIL": cat["titulos"][titulo],
+        "PAIS_OBRA": cat["pais_titulo"][titulo],
+        "PUBLICO": publico,
+        "MUNICIPIO_SALA_COMPLEXO": cat["municipios"][municipio],
+        "UF_SALA_COMPLEXO": cat["uf_municipio"][municipio],
+        "RAZAO_SOCIAL_DISTRIBUIDORA": cat["distribuidoras"][titulo],
+    }, columns=COLUNAS)
+
+
+# Grava `linhas` sessões divididas em `meses` arquivos mensais a partir de
+# `inicio` (AAAA-MM). Cada mês é escrito em blocos de `tamanho_bloco` linhas,
+# então a memória não cresce com o total. Devolve a lista de arquivos.
+def gera_dados(destino, linhas, meses=12, inicio="2014-01", formato="bruto",
+               semente=42, tamanho_bloco=1_000_000, n_titulos=5000, n_municipios=3000,
+               n_distribuidoras=200):
+    destino = Path(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(semente)
+    cat = catalogo(rng, n_titulos, n_municipios, n_distribuidoras)
+    sep = ";" if formato == "bruto" else ","
+
+    arquivos = []
+    por_mes = np.full(meses, linhas // meses)
+    por_mes[: linhas % meses] += 1
+    periodo = pd.Period(inicio, freq="M")
+    for i, n_mes in enumerate(por_mes):
+        p = periodo + i
+        if formato == "bruto":
+            arquivo = destino / f"bilheteria-diaria-obras-por-distribuidoras-{p.year}-{p.month:02d}.csv"
+        else:
+            arquivo = destino / f"dados_filtrados[{p.year}-{p.month:02d}].csv"
+        primeiro = True
+        restante = int(n_mes)
+        while primeiro or restante > 0:
+            n = min(restante, tamanho_bloco)
+            bloco = gera_bloco(rng, cat, n, p.year, p.month)
+            bloco.to_csv(arquivo, sep=sep, index=False, mode="w" if primeiro else "a", header=primeiro)
+            primeiro = False
+            restante -= n
+        arquivos.append(arquivo)
+    return arquivos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos de bilheteria diária.")
+    parser.add_argument("--linhas", type=float, default=1e5, help="total de sessões (aceita 1e6 etc.)")
+    parser.add_argument("--meses", type=int, default=12)
+    parser.add_argument("--inicio", default="2014-01", help="primeiro mês (AAAA-MM)")
+    parser.add_argument("--formato", choices=["bruto", "filtrado"], default="bruto")
+    parser.add_argument("--destino", type=Path, required=True)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    arquivos = gera_dados(args.destino, int(args.linhas), args.meses, args.inicio, args.formato, args.semente)
+    print(f"{len(arquivos)} arquivos gerados em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Compara a memória dos dados filtrados carregados como DataFrame comum
+# (le_dados_filtrados) e no formato compacto (ferramentas/dados_compactos.py).
+# Roda na pasta dos dados (a raiz do projeto ou uma pasta gerada pelo
+# gerador_dados_sinteticos.py --formato filtrado).
+#
+# Uso:
+#   python benchmarks/memoria_dados_compactos.py
+#   python benchmarks/memoria_dados_compactos.py --colunas UF_SALA_COMPLEXO PUBLICO --meses 2020-09 2020-10
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ferramentas.dados_compactos import COLUNAS, carrega_compacto
+from ferramentas.leitura_dados import le_dados_filtrados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memória dos dados filtrados: DataFrame × compacto.")
+    parser.add_argument("--colunas", nargs="+", default=COLUNAS)
+    parser.add_argument("--meses", nargs="+", default=None)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df = le_dados_filtrados(args.colunas, meses=args.meses)
+    tempo_df = time.perf_counter() - inicio
+    memoria_df = df.memory_usage(deep=True).sum()
+
+    inicio = time.perf_counter()
+    dados = carrega_compacto(args.colunas, meses=args.meses)
+    tempo_compacto = time.perf_counter() - inicio
+
+    print(f"{len(df):,} sessões".replace(",", "."))
+    print(f"DataFrame: {memoria_df / 2**20:9.1f} MB  ({tempo_df:.1f} s)")
+    print(f"compacto:  {dados.memoria() / 2**20:9.1f} MB  ({tempo_compacto:.1f} s)  "
+          f"{memoria_df / max(dados.memoria(), 1):.0f}× menor")
+    for coluna in dados.colunas:
+        dicionario = dados.dicionarios.get(coluna)
+        extra = f"  ({len(dicionario)} valores distintos)" if dicionario is not None else ""
+        print(f"  {coluna:<28} {dados.arrays[coluna].dtype}{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Ciclo de vida de cada título: dias em cartaz, participação da semana de
+# abertura, pico, meia-vida do público depois do pico e espalhamento por UF na
+# semana do pico (ver ferramentas/ciclo_de_vida.py), mais a distribuição dessas
+# métricas por país da obra e por distribuidora.
+#
+# Uso:
+#   python ciclo_de_vida_titulos.py
+#   python ciclo_de_vida_titulos.py --inicio 2022-01 --fim 2024-12 --minimo-publico 1000
+#   python ciclo_de_vida_titulos.py --conferir      (compara com um groupby do pandas)
+#
+# Grava ciclo_de_vida_titulos.csv (um título por linha), ciclo_de_vida_por_pais.csv
+# e ciclo_de_vida_por_distribuidora.csv.
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from ferramentas.ciclo_de_vida import COLUNAS_CICLO, SEMANA, ciclo_de_vida, resumo_por
+from ferramentas.dados_compactos import carrega_compacto
+from ferramentas.instrumentacao import conta_linhas, etapa, instrumenta_script
+from ferramentas.leitura_dados import meses_disponiveis
+from ferramentas.tabelas import grava_tabela
+
+
+# As mesmas métricas com um groupby().apply() por título, para conferência.
+def confere(dados, titulos):
+    df = dados.para_pandas(COLUNAS_CICLO)
+    df["PUBLICO"] = df["PUBLICO"].astype(np.int64)
+    esperado = {}
+    for titulo, d in df.groupby("TITULO_BRASIL", observed=True):
+        diario = d.groupby("DATA_EXIBICAO")["PUBLICO"].sum().sort_index()
+        estreia = diario.index[0]
+        dia_pico = diario.idxmax()
+        depois = diario[diario.index >= dia_pico]
+        meia = depois.index[np.argmax(2 * depois.cumsum().to_numpy() >= depois.sum())]
+        semana = d[(d["DATA_EXIBICAO"] >= dia_pico) & (d["DATA_EXIBICAO"] < dia_pico + pd.Timedelta(days=SEMANA))]
+        esperado[titulo] = {
+            "Publico_Total": diario.sum(),
+            "Participacao_Abertura": diario[diario.index < estreia + pd.Timedelta(days=SEMANA)].sum()
+                                     / diario.sum() if diario.sum() else np.nan,
+            "Dia_do_Pico": (dia_pico - estreia).days,
+            "Meia_Vida_Dias": (meia - dia_pico).days,
+            "UFs_na_Semana_do_Pico": semana["UF_SALA_COMPLEXO"].nunique(),
+            "UFs": d["UF_SALA_COMPLEXO"].nunique(),
+            "Dias_com_Sessao": len(diario),
+        }
+    esperado = pd.DataFrame.from_dict(esperado, orient="index")
+    calculado = titulos.set_index("TITULO_BRASIL").loc[esperado.index, esperado.columns]
+    for coluna in esperado.columns:
+        diferenca = np.nanmax(np.abs(calculado[coluna].to_numpy(float) - esperado[coluna].to_numpy(float)))
+        print(f"  {coluna:<24} maior diferença: {diferenca:.6g}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ciclo de vida do público de cada título.")
+    parser.add_argument("--inicio", help="primeiro mês (AAAA-MM)")
+    parser.add_argument("--fim", help="último mês (AAAA-MM)")
+    parser.add_argument("--minimo-publico", type=int, default=0,
+                        help="nos resumos, só títulos com pelo menos esse público")
+    parser.add_argument("--incluir-cortados", action="store_true",
+                        help="nos resumos, inclui os títulos em cartaz no começo ou no fim dos dados")
+    parser.add_argument("--conferir", action="store_true", help="compara com um groupby().apply() do pandas")
+    args = parser.parse_args()
+    instrumenta_script()
+
+    meses = [m for m in meses_disponiveis()
+             if (args.inicio is None or m >= args.inicio) and (args.fim is None or m <= args.fim)]
+    dados = carrega_compacto(COLUNAS_CICLO, meses=meses)
+    conta_linhas(len(dados))
+    with etapa("ciclo_de_vida", linhas=len(dados)):
+        titulos = ciclo_de_vida(dados)
+    print(f"{len(titulos)} títulos em {len(dados)} sessões "
+          f"({int(titulos['Cortado'].sum())} com a curva cortada pelo começo ou fim dos dados)")
+
+    resumos = {}
+    for grupo, arquivo in [("PAIS_OBRA", "ciclo_de_vida_por_pais.csv"),
+                           ("RAZAO_SOCIAL_DISTRIBUIDORA", "ciclo_de_vida_por_distribuidora.csv")]:
+        resumos[arquivo] = resumo_por(titulos, grupo, args.minimo_publico, args.incluir_cortados)
+    with pd.option_context("display.width", 200, "display.max_columns", 12):
+        print(resumos["ciclo_de_vida_por_pais.csv"].head(10).round(3).to_string(index=False))
+
+    if args.conferir:
+        confere(dados, titulos)
+
+    grava_tabela(titulos.sort_values("Publico_Total", ascending=False, ignore_index=True),
+                 "ciclo_de_vida_titulos.csv")
+    for arquivo, resumo in resumos.items():
+        grava_tabela(resumo, arquivo)
+
+
+if __name__ == "__main__":
+    main()
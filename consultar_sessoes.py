@@ -0,0 +1,55 @@
+# Consultas pontuais às sessões de dados_filtrados pelo banco sessoes.sqlite
+# (ver ferramentas/banco_sessoes.py). O banco é criado ou atualizado antes de
+# cada consulta; só os meses alterados são recarregados.
+#
+# Uso:
+#   python consultar_sessoes.py --atualizar
+#   python consultar_sessoes.py --titulo "SONIC - O FILME" --por uf
+#   python consultar_sessoes.py --distribuidora "PARAMOUNT PICTURES BRASIL DISTRIBUIDORA DE FILMES LTDA" --por mes
+#   python consultar_sessoes.py --municipio "SANTA ROSA" --inicio 2020-04 --fim 2020-06 --sessoes
+#   python consultar_sessoes.py --pais BRASIL --por titulo --saida filmes_brasileiros.csv
+import argparse
+import time
+
+import pandas as pd
+
+from ferramentas.banco_sessoes import FILTROS, atualiza_banco, publico_por, sessoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta as sessões filtradas pelo banco SQLite.")
+    parser.add_argument("--atualizar", action="store_true", help="só cria/atualiza o banco")
+    for nome in FILTROS:
+        parser.add_argument(f"--{nome}", action="append", help=f"filtra por {nome} (pode repetir)")
+    parser.add_argument("--inicio", help="data inicial (AAAA-MM ou AAAA-MM-DD)")
+    parser.add_argument("--fim", help="data final (AAAA-MM ou AAAA-MM-DD)")
+    parser.add_argument("--por", nargs="+", default=["mes"],
+                        help="colunas de agrupamento: data, mes, ano, " + ", ".join(FILTROS))
+    parser.add_argument("--sessoes", action="store_true", help="lista as sessões em vez de agrupar")
+    parser.add_argument("--limite", type=int, default=None, help="no máximo essa quantidade de sessões")
+    parser.add_argument("--saida", help="grava o resultado neste CSV")
+    args = parser.parse_args()
+
+    atualiza_banco()
+    if args.atualizar:
+        return
+
+    filtros = {nome: getattr(args, nome) for nome in FILTROS}
+    inicio = time.perf_counter()
+    if args.sessoes:
+        resultado = sessoes(args.inicio, args.fim, args.limite, **filtros)
+    else:
+        resultado = publico_por(args.por, args.inicio, args.fim, **filtros)
+    duracao = time.perf_counter() - inicio
+
+    if args.saida:
+        resultado.to_csv(args.saida, index=False)
+        print(f"{len(resultado)} linhas salvas em {args.saida}")
+    else:
+        with pd.option_context("display.max_rows", 60, "display.width", 200):
+            print(resultado)
+    print(f"({len(resultado)} linhas, consulta em {duracao * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# Monta o cubo de público por UF × município × distribuidora × país da obra × mês
+# (ver ferramentas/cubo.py) e tira agregações dele sem reler as sessões.
+#
+# Uso:
+#   python cubo_publico.py                              (cria/atualiza cubo_publico_mensal.csv.gz)
+#   python cubo_publico.py --por UF Origem              (filmes brasileiros × estrangeiros por UF)
+#   python cubo_publico.py --por Distribuidora Ano --saida distribuidoras_por_ano.csv
+#   python cubo_publico.py --conferir                   (compara com os arquivos de estatísticas atuais)
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ferramentas.cubo import (DERIVADAS, DIMENSOES, cubo_do_mes, deriva, deriva_geral_por_uf,
+                              deriva_nacional_mensal, deriva_uf_mensal)
+from ferramentas.instrumentacao import instrumenta_script
+from ferramentas.manifesto import atualiza_incremental
+from ferramentas.tabelas import le_tabela
+
+ARQ_CUBO = Path("cubo_publico_mensal.csv.gz")
+ARQ_RESUMOS = Path("resumos_por_UF_mensal.csv")
+
+
+# Compara as colunas em comum de dois arquivos de estatísticas (mesmas chaves).
+def confere(nome, derivado, arquivo, chaves):
+    if not Path(arquivo).exists():
+        print(f"{nome}: {arquivo} não existe, nada a comparar")
+        return
+    atual = le_tabela(arquivo, dtype={"Mes": str})
+    juntos = atual.merge(derivado, on=chaves, suffixes=("", "_cubo"))
+    print(f"{nome}: {len(juntos)} de {len(atual)} linhas com par no cubo")
+    for coluna in ["Media_Publico", "Total_Publico", "Max_Publico", "Min_Publico", "Desvio_Padrao",
+                   "Mediana_Publico", "Moda_Publico", "Q1", "Q3"]:
+        if coluna + "_cubo" not in juntos or juntos[coluna + "_cubo"].isna().all():
+            continue
+        diferenca = np.abs(pd.to_numeric(juntos[coluna]) - pd.to_numeric(juntos[coluna + "_cubo"]))
+        print(f"  {coluna:<16} maior diferença: {diferenca.max():.6g}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cubo de medidas aditivas do público.")
+    parser.add_argument("--por", nargs="*", default=None,
+                        help="colunas de agrupamento: Mes, " + ", ".join([*DIMENSOES, *DERIVADAS]))
+    parser.add_argument("--saida", type=Path, default=None, help="grava a agregação neste CSV")
+    parser.add_argument("--conferir", action="store_true",
+                        help="compara os arquivos de estatísticas atuais com os derivados do cubo")
+    args = parser.parse_args()
+    instrumenta_script()
+
+    # só os meses novos ou alterados são recalculados (ver ferramentas/manifesto.py)
+    cubo = atualiza_incremental(ARQ_CUBO, cubo_do_mes)
+    print(f"{ARQ_CUBO}: {len(cubo):,} células".replace(",", "."))
+
+    resumos = le_tabela(ARQ_RESUMOS, dtype={"Mes": str}) if ARQ_RESUMOS.exists() else None
+
+    if args.conferir:
+        confere("nacional × mês", deriva_nacional_mensal(cubo, resumos), "estatisticas_publico_mensal.csv", ["Mes"])
+        confere("UF × mês", deriva_uf_mensal(cubo, resumos), "estatisticas_por_UF_mensal.csv", ["UF", "Mes"])
+        confere("UF geral", deriva_geral_por_uf(cubo), "estatisticas_gerais_por_UF.csv", ["UF", "Mes"])
+
+    if args.por is not None:
+        resultado = deriva(cubo, args.por, resumos).dropna(axis=1, how="all")
+        if args.saida:
+            resultado.to_csv(args.saida, index=False)
+            print(f"{len(resultado)} linhas salvas em {args.saida}")
+        else:
+            with pd.option_context("display.max_rows", 60, "display.width", 200):
+                print(resultado)
+
+
+if __name__ == "__main__":
+    main()
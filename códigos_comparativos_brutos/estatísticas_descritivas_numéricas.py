@@ -1,44 +1,36 @@
+import sys
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
-pasta_dados = Path("dados_filtrados")
-arquivos_csv = sorted(pasta_dados.glob("*.csv"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ferramentas.instrumentacao import conta_linhas, instrumenta_script
+from ferramentas.leitura_dados import le_mes
+from ferramentas.manifesto import atualiza_incremental, versao_do_codigo
+from ferramentas.motor_estatisticas import COLUNAS_ESTATISTICAS, estatisticas_por_grupo
 
-estatisticas_mensais = []
 
-for arquivo in arquivos_csv:
-    nome_mes = arquivo.stem.replace("dados_filtrados[", "").replace("]", "")
-    dados = pd.read_csv(arquivo)
+def calcula_mes(nome_mes):
+    # só a coluna PUBLICO é usada; no formato Parquet as outras nem são lidas
+    dados = le_mes(nome_mes, colunas=["PUBLICO"])
+    s = pd.to_numeric(dados["PUBLICO"], errors="coerce")
+    conta_linhas(len(s))
 
-    media_publico = dados["PUBLICO"].mean()
-    mediana_publico = dados["PUBLICO"].median()
-    s = pd.to_numeric(dados["PUBLICO"], errors="coerce").dropna()
-    moda_publico = (s.mode().iloc[0] if not s.empty and not s.mode().empty else None)
-    if s.empty:
+    # o mês inteiro é um grupo só
+    estatisticas = estatisticas_por_grupo(np.full(len(s), nome_mes), s, nome_grupo="Mes")
+    if estatisticas.empty:
         print(f"{nome_mes}: PUBLICO sem valores válidos; registrando moda=None")
-    max_publico = dados["PUBLICO"].max()
-    min_publico = dados["PUBLICO"].min()
-    total_publico = dados["PUBLICO"].sum()
-    desvio_padrao = dados["PUBLICO"].std()
-    q1 = dados["PUBLICO"].quantile(0.25)
-    q3 = dados["PUBLICO"].quantile(0.75)
-    iqr = q3 - q1
-
-    estatisticas_mensais.append({
-        "Mes": nome_mes,
-        "Media_Publico": round(media_publico, 2),
-        "Mediana_Publico": mediana_publico,
-        "Moda_Publico": moda_publico,
-        "Max_Publico": max_publico,
-        "Min_Publico": min_publico,
-        "Total_Publico": total_publico,
-        "Desvio_Padrao": desvio_padrao,
-        "Q1": q1,
-        "Q3": q3,
-        "IQR": iqr
-    })
-
-df_estatisticas = pd.DataFrame(estatisticas_mensais)
-df_estatisticas.to_csv("estatisticas_publico_mensal.csv", index=False)
+        estatisticas = pd.DataFrame([{"Mes": nome_mes, **{c: None for c in COLUNAS_ESTATISTICAS}}])
+        estatisticas["Total_Publico"] = 0
+    # sempre float, já que um mês vazio deixa essas colunas com NaN
+    return estatisticas.astype({"Moda_Publico": float, "Max_Publico": float, "Min_Publico": float})
+
+
+instrumenta_script()
+
+# só os meses novos ou alterados são recalculados (ver ferramentas/manifesto.py)
+# (e todos quando este script ou o cálculo em ferramentas/ mudam)
+atualiza_incremental(Path("estatisticas_publico_mensal.csv"), calcula_mes,
+                     versao=versao_do_codigo(calcula_mes, estatisticas_por_grupo))
 
 print("Estatísticas calculadas e salvas em 'estatisticas_publico_mensal.csv'")
@@ -1,46 +1,44 @@
+import sys
 import pandas as pd
-import numpy as np
+from pathlib import Path
 
-resultado_mensal = pd.read_csv("estatisticas_por_UF_mensal.csv")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ferramentas.instrumentacao import conta_linhas, etapa, instrumenta_script
+from ferramentas.motor_estatisticas import estatisticas_por_grupo
+from ferramentas.resumos import estatisticas_de_resumos
+from ferramentas.tabelas import le_tabela, grava_tabela
+
+instrumenta_script()
+
+resultado_mensal = le_tabela("estatisticas_por_UF_mensal.csv")
+conta_linhas(len(resultado_mensal))
 
 for c in ["Media_Publico", "Total_Publico", "Max_Publico", "Min_Publico"]:
     resultado_mensal[c] = pd.to_numeric(resultado_mensal[c], errors="coerce")
 
-estatisticas_gerais = []
-
-for uf, bloco in resultado_mensal.groupby("UF", sort=True):
-    serie_media = bloco["Media_Publico"].dropna()
-    serie_total = bloco["Total_Publico"].dropna()
-    serie_max   = bloco["Max_Publico"].dropna()
-    serie_min   = bloco["Min_Publico"].dropna()
-
-    media_publico   = serie_media.mean()
-    mediana_publico = serie_media.median()
-    moda_vals       = serie_media.mode()
-    moda_publico    = moda_vals.iloc[0] if not moda_vals.empty else np.nan
-    max_publico     = serie_max.max() if not serie_max.empty else np.nan
-    min_publico     = serie_min.min() if not serie_min.empty else np.nan
-    total_publico   = serie_total.sum()
-    desvio_padrao   = serie_media.std(ddof=1)
-    q1              = serie_media.quantile(0.25)
-    q3              = serie_media.quantile(0.75)
-    iqr             = q3 - q1
-
-    estatisticas_gerais.append({
-        "UF": uf,
-        "Mes": "GERAL",
-        "Media_Publico": round(media_publico, 2),
-        "Mediana_Publico": mediana_publico,
-        "Moda_Publico": moda_publico,
-        "Max_Publico": max_publico,
-        "Min_Publico": min_publico,
-        "Total_Publico": total_publico,
-        "Desvio_Padrao": desvio_padrao,
-        "Q1": q1,
-        "Q3": q3,
-        "IQR": iqr
-    })
-
-resultado_geral = (pd.DataFrame(estatisticas_gerais).sort_values("Total_Publico", ascending=False).reset_index(drop=True))
-
-resultado_geral.to_csv("estatisticas_gerais_por_UF.csv", index=False)
+# média, mediana, moda, desvio e quartis são calculados sobre as médias mensais de cada UF
+resultado_geral = estatisticas_por_grupo(resultado_mensal["UF"], resultado_mensal["Media_Publico"], nome_grupo="UF")
+resultado_geral.insert(1, "Mes", "GERAL")
+
+# máximo, mínimo e total vêm das próprias colunas mensais
+por_uf = resultado_mensal.groupby("UF", sort=True)
+resultado_geral["Max_Publico"] = resultado_geral["UF"].map(por_uf["Max_Publico"].max())
+resultado_geral["Min_Publico"] = resultado_geral["UF"].map(por_uf["Min_Publico"].min())
+resultado_geral["Total_Publico"] = resultado_geral["UF"].map(por_uf["Total_Publico"].sum())
+
+resultado_geral = (resultado_geral.sort_values("Total_Publico", ascending=False).reset_index(drop=True))
+
+grava_tabela(resultado_geral, "estatisticas_gerais_por_UF.csv")
+
+# Com os resumos mensais (gerados por estatisticas_comparativas_descritivas_por_UF.py)
+# dá para calcular as estatísticas das sessões do período inteiro, combinando os
+# resumos em vez de usar as médias mensais.
+arq_resumos = Path("resumos_por_UF_mensal.csv")
+if arq_resumos.exists():
+    with etapa("geral_sessoes") as m:
+        resumos = le_tabela(arq_resumos)
+        m.linhas = len(resumos)
+        geral_sessoes = estatisticas_de_resumos(resumos, ["UF"])
+    geral_sessoes.insert(1, "Mes", "GERAL")
+    geral_sessoes = geral_sessoes.sort_values("Total_Publico", ascending=False).reset_index(drop=True)
+    grava_tabela(geral_sessoes, "estatisticas_gerais_por_UF_sessoes.csv")
@@ -0,0 +1,52 @@
+# Anomalias nas estatísticas mensais por UF: escores robustos (mediana/MAD)
+# sazonais e de variação anual para todas as métricas de todas as células
+# UF × mês de uma vez (ver ferramentas/anomalias.py). Grava a tabela ordenada
+# da célula mais anômala para a menos.
+#
+# Uso:
+#   python códigos_comparativos_por_UF/anomalias_por_UF.py
+#   python códigos_comparativos_por_UF/anomalias_por_UF.py --limiar 5 --metricas Max_Publico Min_Publico
+#   python códigos_comparativos_por_UF/graficos_por_estado.py --anomalias   (marca as anomalias nos gráficos)
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ferramentas.anomalias import LIMIAR_PADRAO, METRICAS, MINIMO_ANOS, CuboMensal, anomalias
+from ferramentas.instrumentacao import conta_linhas, etapa, instrumenta_script
+from ferramentas.tabelas import grava_tabela, le_tabela
+
+ENTRADA = "estatisticas_por_UF_mensal.csv"
+SAIDA = "anomalias_por_UF_mensal.csv"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Anomalias nas estatísticas mensais por UF.")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PADRAO,
+                        help="escore robusto (em módulo) a partir do qual a célula é anômala")
+    parser.add_argument("--metricas", nargs="+", choices=METRICAS, default=METRICAS)
+    parser.add_argument("--minimo-anos", type=int, default=MINIMO_ANOS,
+                        help="anos com valor no mesmo mês (ou variações anuais) para haver referência")
+    parser.add_argument("--mostrar", type=int, default=20, help="quantas anomalias imprimir")
+    args = parser.parse_args()
+    instrumenta_script()
+
+    df = le_tabela(ENTRADA, dtype={"Mes": str})
+    conta_linhas(len(df))
+    with etapa("anomalias", linhas=len(df) * len(args.metricas)):
+        cubo = CuboMensal(df, args.metricas)
+        tabela = anomalias(cubo, args.limiar, args.minimo_anos)
+
+    print(f"{len(tabela)} células anômalas (escore >= {args.limiar}) de "
+          f"{len(df) * len(cubo.metricas)} células UF × mês × métrica")
+    if len(tabela):
+        print(tabela.groupby("Metrica").size().sort_values(ascending=False).to_string())
+        with pd.option_context("display.width", 200):
+            print(tabela.head(args.mostrar).round(2).to_string(index=False))
+    grava_tabela(tabela, SAIDA)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,43 @@
+import sys
 from pathlib import Path
 import pandas as pd
-import numpy as np
 
-pasta_dados = Path("dados_filtrados")
-arquivos_csv = sorted(pasta_dados.glob("*.csv"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ferramentas.instrumentacao import conta_linhas, instrumenta_script
+from ferramentas.leitura_dados import le_mes
+from ferramentas.manifesto import atualiza_incremental, versao_do_codigo
+from ferramentas.motor_estatisticas import estatisticas_por_grupo
+from ferramentas.resumos import resumos_por_uf
 
-estatisticas_mensais = []
 
-for arquivo in arquivos_csv:
-    df = pd.read_csv(arquivo, usecols=["UF_SALA_COMPLEXO", "PUBLICO"])
+def le_publico_mes(nome_mes):
+    df = le_mes(nome_mes, colunas=["UF_SALA_COMPLEXO", "PUBLICO"])
     df["PUBLICO"] = pd.to_numeric(df["PUBLICO"], errors="coerce")
+    return df
 
-    nome_mes = arquivo.stem.replace("dados_filtrados[", "").replace("]", "")
-    grupo = df.groupby("UF_SALA_COMPLEXO")["PUBLICO"]
-
-    media   = grupo.mean()
-    mediana = grupo.median()
-    moda    = grupo.apply(lambda x: x.mode().iloc[0] if not x.mode().empty else np.nan)
-    maximo  = grupo.max()
-    minimo  = grupo.min()
-    total   = grupo.sum()
-    desvio  = grupo.std()
-    q1      = grupo.quantile(0.25)
-    q3      = grupo.quantile(0.75)
-    iqr     = q3 - q1
-
-    for uf in media.index:
-        media_publico    = media.loc[uf]
-        mediana_publico  = mediana.loc[uf]
-        moda_publico     = moda.loc[uf]
-        max_publico      = maximo.loc[uf]
-        min_publico      = minimo.loc[uf]
-        total_publico    = total.loc[uf]
-        desvio_padrao    = desvio.loc[uf]
-        q1_val           = q1.loc[uf]
-        q3_val           = q3.loc[uf]
-        iqr_val          = iqr.loc[uf]
-
-        estatisticas_mensais.append({
-            "UF": uf,
-            "Mes": nome_mes,
-            "Media_Publico": round(media_publico, 2),
-            "Mediana_Publico": mediana_publico,
-            "Moda_Publico": moda_publico,
-            "Max_Publico": max_publico,
-            "Min_Publico": min_publico,
-            "Total_Publico": total_publico,
-            "Desvio_Padrao": desvio_padrao,
-            "Q1": q1_val,
-            "Q3": q3_val,
-            "IQR": iqr_val
-        })
-
-
-resultado = pd.DataFrame(estatisticas_mensais)
-resultado.to_csv("estatisticas_por_UF_mensal.csv", index=False)
+
+def calcula_mes(nome_mes):
+    df = le_publico_mes(nome_mes)
+    conta_linhas(len(df))
+
+    # todas as estatísticas de todas as UFs do mês numa passada só
+    estatisticas = estatisticas_por_grupo(df["UF_SALA_COMPLEXO"], df["PUBLICO"], nome_grupo="UF")
+    estatisticas.insert(1, "Mes", nome_mes)
+    return estatisticas
+
+
+# resumo combinável de cada UF × mês (ver ferramentas/resumos.py)
+def calcula_resumos_mes(nome_mes):
+    df = le_publico_mes(nome_mes)
+    conta_linhas(len(df))
+    return resumos_por_uf(df["UF_SALA_COMPLEXO"], df["PUBLICO"], nome_mes)
+
+
+instrumenta_script()
+
+# só os meses novos ou alterados são recalculados (ver ferramentas/manifesto.py)
+# (e todos quando este script ou o cálculo em ferramentas/ mudam)
+atualiza_incremental(Path("estatisticas_por_UF_mensal.csv"), calcula_mes,
+                     versao=versao_do_codigo(calcula_mes, estatisticas_por_grupo))
+atualiza_incremental(Path("resumos_por_UF_mensal.csv"), calcula_resumos_mes,
+                     versao=versao_do_codigo(calcula_resumos_mes, resumos_por_uf))
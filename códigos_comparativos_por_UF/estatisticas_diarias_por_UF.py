@@ -0,0 +1,35 @@
+# Totais diários de público por UF, com média, desvio padrão e mediana móveis
+# de 7 e 28 dias (ver ferramentas/janelas_diarias.py).
+#
+# Uso:
+#   python códigos_comparativos_por_UF/estatisticas_diarias_por_UF.py             (cria/estende a tabela)
+#   python códigos_comparativos_por_UF/estatisticas_diarias_por_UF.py --conferir  (compara com o .rolling() do pandas)
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ferramentas.instrumentacao import instrumenta_script
+from ferramentas.janelas_diarias import atualiza_tabela_diaria, confere_com_pandas
+
+SAIDA = Path("estatisticas_diarias_por_UF.csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estatísticas diárias por UF com janelas móveis.")
+    parser.add_argument("--conferir", action="store_true",
+                        help="confere as janelas com o .rolling() do pandas")
+    args = parser.parse_args()
+    instrumenta_script()
+
+    # só os meses a partir do primeiro mês novo ou alterado são processados
+    tabela = atualiza_tabela_diaria(SAIDA)
+    print(f"{SAIDA}: {len(tabela)} linhas (UF × dia)")
+
+    if args.conferir:
+        for medida, diferenca in confere_com_pandas(tabela).items():
+            print(f"  {medida:<12} maior diferença: {diferenca:.6g}")
+
+
+if __name__ == "__main__":
+    main()
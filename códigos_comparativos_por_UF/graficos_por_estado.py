@@ -3,21 +3,34 @@
 # =====================================================================
 # 1. Importação de bibliotecas
 # =====================================================================
-# math: Usado para operações matemáticas, como logaritmos na função `nice_step`.
-import math
-# numpy: Biblioteca fundamental para computação numérica em Python.
-import numpy as np
+# argparse: Lê as opções de linha de comando (ex.: número de processos).
+import argparse
+# os: Usado para descobrir quantos núcleos a máquina tem.
+import os
+# concurrent.futures: Distribui a geração dos gráficos de cada UF entre vários processos.
+from concurrent.futures import ProcessPoolExecutor
 # pandas: Usada para manipulação e análise de dados (DataFrames).
 import pandas as pd
-# matplotlib.pyplot: Interface de plotagem de gráficos.
-import matplotlib.pyplot as plt
+# matplotlib: O backend "Agg" desenha direto em arquivo, sem janela, e funciona
+# dentro de processos paralelos. Precisa ser escolhido antes de importar o pyplot.
+import matplotlib
+matplotlib.use("Agg")
 # pathlib.Path: Oferece uma maneira orientada a objetos de lidar com caminhos de arquivo,
 # tornando o código mais legível e independente do sistema operacional (Windows, Linux, etc.).
 from pathlib import Path
-# matplotlib.ticker: Módulos para formatar e controlar a posição dos rótulos dos eixos.
-from matplotlib.ticker import MultipleLocator, AutoMinorLocator, FuncFormatter
-# matplotlib.dates: Módulos para formatar e controlar o eixo de tempo.
-from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+# sys: Usado para achar a pasta `ferramentas` na raiz do projeto.
+import sys
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# anomalias: Escores robustos das células UF × mês, para marcar as anomalias nos gráficos (--anomalias).
+from ferramentas.anomalias import LIMIAR_PADRAO, CuboMensal, anomalias
+# cache_graficos: Evita redesenhar gráficos cujos dados não mudaram.
+from ferramentas.cache_graficos import chave_grafico, grafico_mudou, registra_grafico
+# instrumentacao: Anota tempo, memória e bytes gravados de cada UF em instrumentacao.jsonl.
+from ferramentas.instrumentacao import etapa, instrumenta_script
+# modelos_graficos: Figuras montadas uma vez e reaproveitadas para todas as UFs.
+from ferramentas.modelos_graficos import ModeloLinhasTempo, ModeloBoxplot
+# tabelas: Lê o CSV (ou reaproveita o DataFrame em memória, se a etapa anterior rodou no mesmo processo).
+from ferramentas.tabelas import le_tabela
 
 # =====================================================================
 # 2. Configurações e Preparação Inicial
@@ -26,178 +39,216 @@ from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
 ARQ_MENSAL = "estatisticas_por_UF_mensal.csv"
 # Define o caminho da pasta de saída usando `Path`.
 PASTA_SAIDA = Path("graficos/separados_por_UF")
-# Cria a pasta de saída e suas subpastas, se não existirem (`exist_ok=True` evita erros).
-PASTA_SAIDA.mkdir(parents=True, exist_ok=True)
+# Colunas numéricas esperadas no CSV mensal.
+NUM_COLS_ESPERADAS = [
+    "Total_Publico", "Media_Publico", "Mediana_Publico",
+    "Desvio_Padrao", "Q1", "Q3", "Min_Publico", "Max_Publico"
+]
+# Parâmetros de estilo que entram na chave do cache: mudar qualquer um deles
+# (ou a versão, quando o desenho mudar no código) força redesenhar tudo.
+ESTILO = {"versao": 2, "figsize": (14, 6), "dpi": 150, "linewidth": 2}
 
 # =====================================================================
-# 3. Funções Auxiliares (Helpers de formatação)
+# 3. Modelos de Gráfico
 # =====================================================================
-# Função para calcular um passo "arredondado" para os rótulos dos eixos,
-# tornando os gráficos mais legíveis. Por exemplo, em vez de 12345, usa 10000.
-def nice_step(raw):
-    if not np.isfinite(raw) or raw <= 0:
-        return 1.0
-    exp = math.floor(math.log10(raw))
-    base = raw / (10 ** exp)
-    if base <= 2:
-        nice = 2
-    elif base <= 5:
-        nice = 5
-    else:
-        nice = 10
-    return nice * (10 ** exp)
-
-# Função que retorna um formatador para o eixo Y. Ele formata os números
-# com separador de milhar no padrão brasileiro (ex: 1.000.000) e sem casas decimais.
-def fmt_milhar_br():
-    return FuncFormatter(lambda x, pos: f"{int(round(x)):,}".replace(",", "."))
-
-# Configura o eixo X para lidar com datas de forma inteligente, ajustando
-# os ticks e o formato (ex: mês e ano).
-def setup_time_axis(ax):
-    loc = AutoDateLocator(minticks=4, maxticks=8)
-    ax.xaxis.set_major_locator(loc)
-    ax.xaxis.set_major_formatter(ConciseDateFormatter(loc))
-
-# Configura o eixo Y, calculando os limites e os rótulos de forma dinâmica
-# com base nos valores dos dados para uma visualização otimizada.
-def setup_y_axis(ax, yvals):
-    ymin = float(np.nanmin(yvals))
-    ymax = float(np.nanmax(yvals))
-    rng = ymax - ymin
-    
-    # Calcula o passo ideal usando a função `nice_step`.
-    step = nice_step(max(rng / 5, 1))
-    ax.yaxis.set_major_locator(MultipleLocator(step))
-    ax.yaxis.set_minor_locator(AutoMinorLocator(2))
-    ax.yaxis.set_major_formatter(fmt_milhar_br())
-
-    # Adiciona um pequeno espaçamento nas bordas do gráfico para não "espremer" os dados.
-    pad = 0.05 * (rng if rng > 0 else step)
-    ax.set_ylim(ymin - pad, ymax + pad)
-
-# Aplica um estilo padrão aos eixos do gráfico (título, rótulos e grades).
-def style_axes(ax, title, xlabel, ylabel):
-    ax.set_title(title)
-    ax.set_xlabel(xlabel)
-    ax.set_ylabel(ylabel)
-    ax.grid(True, which="major", axis="both", alpha=0.35)
-    ax.grid(True, which="minor", axis="y", alpha=0.15)
-
-# Salva a figura atual no disco no caminho especificado e fecha a figura
-# para liberar memória.
-def salva_plot(figpath: Path):
-    figpath.parent.mkdir(parents=True, exist_ok=True)
-    plt.tight_layout()
-    plt.savefig(figpath, dpi=150)
-    plt.close()
+# Cada tipo de gráfico tem uma figura montada uma vez por processo (eixos,
+# localizadores, formatadores, legenda). Para cada UF só os dados, os limites e o
+# título mudam; ver ferramentas/modelos_graficos.py.
+_modelos = None
+
+def modelos():
+    global _modelos
+    if _modelos is None:
+        opcoes = dict(figsize=ESTILO["figsize"], dpi=ESTILO["dpi"], linewidth=ESTILO["linewidth"])
+        _modelos = {
+            "total": ModeloLinhasTempo([None], ["o"], "Mês", "Público total", **opcoes),
+            "media_mediana": ModeloLinhasTempo(["Média", "Mediana"], ["o", "s"], "Mês", "Público", **opcoes),
+            "desvio": ModeloLinhasTempo([None], ["o"], "Mês", "Desvio padrão", **opcoes),
+            "quartis": ModeloLinhasTempo(["Q1", "Q3"], ["o", "s"], "Mês", "Público",
+                                         faixa="IQR (Q3 - Q1)", **opcoes),
+            "min_max": ModeloLinhasTempo(["Mínimo", "Máximo"], ["o", "s"], "Mês", "Público", **opcoes),
+            "boxplot": ModeloBoxplot("Ano", "Público mensal (Total)",
+                                     figsize=ESTILO["figsize"], dpi=ESTILO["dpi"]),
+        }
+    return _modelos
+
+def fecha_modelos():
+    global _modelos
+    if _modelos is not None:
+        for modelo in _modelos.values():
+            modelo.fecha()
+        _modelos = None
 
 # =====================================================================
 # 4. Leitura e Preparo dos Dados
 # =====================================================================
-# Lê o arquivo CSV para um DataFrame do pandas.
-df = pd.read_csv(ARQ_MENSAL)
-
-# Limpeza e padronização dos dados.
-df["UF"] = df["UF"].astype(str).str.strip().str.upper()
-df["Mes"] = pd.to_datetime(df["Mes"], errors="coerce") # Converte a coluna 'Mes' para o tipo datetime.
-df = df.dropna(subset=["UF", "Mes"]).sort_values(["UF", "Mes"]) # Remove linhas com dados ausentes na UF ou no Mês.
-df["Ano"] = df["Mes"].dt.year # Extrai o ano da coluna 'Mes'.
-
-# Define as colunas numéricas esperadas para garantir que existam e sejam tratadas.
-num_cols_esperadas = [
-    "Total_Publico", "Media_Publico", "Mediana_Publico",
-    "Desvio_Padrao", "Q1", "Q3", "Min_Publico", "Max_Publico"
-]
-# Converte as colunas esperadas para tipo numérico, se existirem.
-for c in num_cols_esperadas:
-    if c in df.columns:
-        df[c] = pd.to_numeric(df[c], errors="coerce")
-
-# Remove linhas com valores NaN nas colunas numéricas após a conversão.
-df = df.dropna(subset=[c for c in num_cols_esperadas if c in df.columns])
-
-# Obtém uma lista única e ordenada de todas as UFs para iterar sobre elas.
-ufs = sorted(df["UF"].unique())
+def carrega_dados():
+    # Lê o arquivo CSV para um DataFrame do pandas.
+    df = le_tabela(ARQ_MENSAL)
+
+    # Limpeza e padronização dos dados.
+    df["UF"] = df["UF"].astype(str).str.strip().str.upper()
+    df["Mes"] = pd.to_datetime(df["Mes"], errors="coerce") # Converte a coluna 'Mes' para o tipo datetime.
+    df = df.dropna(subset=["UF", "Mes"]).sort_values(["UF", "Mes"]) # Remove linhas com dados ausentes na UF ou no Mês.
+    df["Ano"] = df["Mes"].dt.year # Extrai o ano da coluna 'Mes'.
+
+    # Converte as colunas esperadas para tipo numérico, se existirem.
+    for c in NUM_COLS_ESPERADAS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+
+    # Remove linhas com valores NaN nas colunas numéricas após a conversão.
+    return df.dropna(subset=[c for c in NUM_COLS_ESPERADAS if c in df.columns])
+
+# Meses anômalos de cada UF e métrica ({UF: {métrica: meses}}), calculados sobre
+# a tabela inteira (ver ferramentas/anomalias.py).
+def meses_anomalos(df, limiar=LIMIAR_PADRAO):
+    tabela = anomalias(CuboMensal(df.assign(Mes=df["Mes"].dt.strftime("%Y-%m"))), limiar)
+    tabela["Mes"] = pd.to_datetime(tabela["Mes"])
+    return {uf: {metrica: pd.DatetimeIndex(g["Mes"]) for metrica, g in d.groupby("Metrica")}
+            for uf, d in tabela.groupby("UF")}
 
 # =====================================================================
-# 5. Geração dos Gráficos por UF
+# 5. Geração dos Gráficos de uma UF
 # =====================================================================
-# Inicia um loop que processa os dados e gera os gráficos para cada UF.
-for uf in ufs:
-    # Filtra o DataFrame para a UF atual e define o `Mes` como índice.
-    d = df[df["UF"] == uf].set_index("Mes").sort_index()
+# Pontos (datas, valores) das `colunas` nos meses anômalos da UF, ou None.
+def pontos_anomalos(d, anomalias_uf, colunas):
+    if not anomalias_uf:
+        return None
+    datas, valores = [], []
+    for coluna in colunas:
+        if coluna not in anomalias_uf or coluna not in d.columns:
+            continue
+        selecao = d.index.isin(anomalias_uf[coluna])
+        datas.extend(d.index[selecao])
+        valores.extend(d[coluna].values[selecao])
+    if not datas:
+        return None
+    return pd.DatetimeIndex(datas), pd.Series(valores, dtype=float).to_numpy()
+
+# Chave do cache com as marcas, só quando há marcas: sem anomalias, a chave é a
+# mesma de antes e os gráficos já desenhados continuam valendo.
+def com_marcas(marcas):
+    return [] if marcas is None else [marcas]
+
+# Gera os 6 gráficos de uma UF. `d` já vem só com as linhas da UF, com o `Mes`
+# como índice; assim cada processo recebe apenas a sua fatia dos dados.
+# `anomalias_uf` ({métrica: meses}) marca os pontos anômalos nos gráficos de linha.
+def gera_graficos_uf(uf, d, anomalias_uf=None):
     pasta_uf = PASTA_SAIDA / uf
     pasta_uf.mkdir(parents=True, exist_ok=True)
 
+    m = modelos()
+
     # 1) Gráfico de linha do Público Total Mensal
-    if "Total_Publico" in d.columns and not d["Total_Publico"].empty:
-        fig, ax = plt.subplots(figsize=(14, 6))
-        ax.plot(d.index, d["Total_Publico"], marker="o", linewidth=2)
-        setup_time_axis(ax)
-        setup_y_axis(ax, d["Total_Publico"].values)
-        style_axes(ax, f"Público total mensal — {uf}", "Mês", "Público total")
-        salva_plot(pasta_uf / "01_publico_total_mensal.png")
+    caminho = pasta_uf / "01_publico_total_mensal.png"
+    marcas = pontos_anomalos(d, anomalias_uf, ["Total_Publico"])
+    titulo = f"Público total mensal — {uf}"
+    chave = chave_grafico(ESTILO, caminho.name, titulo, d.index, d.get("Total_Publico"), *com_marcas(marcas))
+    if "Total_Publico" in d.columns and not d["Total_Publico"].empty and grafico_mudou(caminho, chave):
+        m["total"].desenha(d.index, [d["Total_Publico"].values], titulo, caminho, marcas)
+        registra_grafico(caminho, chave)
 
     # 2) Gráfico de linha comparando Média e Mediana
-    if {"Media_Publico", "Mediana_Publico"}.issubset(d.columns):
-        fig, ax = plt.subplots(figsize=(14, 6))
-        ax.plot(d.index, d["Media_Publico"], marker="o", linewidth=2, label="Média")
-        ax.plot(d.index, d["Mediana_Publico"], marker="s", linewidth=2, label="Mediana")
-        setup_time_axis(ax)
-        yy = np.concatenate([d["Media_Publico"].values, d["Mediana_Publico"].values])
-        setup_y_axis(ax, yy)
-        style_axes(ax, f"Média vs Mediana do público por mês — {uf}", "Mês", "Público")
-        ax.legend()
-        salva_plot(pasta_uf / "02_media_vs_mediana.png")
+    caminho = pasta_uf / "02_media_vs_mediana.png"
+    marcas = pontos_anomalos(d, anomalias_uf, ["Media_Publico", "Mediana_Publico"])
+    titulo = f"Média vs Mediana do público por mês — {uf}"
+    chave = chave_grafico(ESTILO, caminho.name, titulo, d.index, d.get("Media_Publico"), d.get("Mediana_Publico"),
+                          *com_marcas(marcas))
+    if {"Media_Publico", "Mediana_Publico"}.issubset(d.columns) and grafico_mudou(caminho, chave):
+        m["media_mediana"].desenha(d.index, [d["Media_Publico"].values, d["Mediana_Publico"].values],
+                                   titulo, caminho, marcas)
+        registra_grafico(caminho, chave)
 
     # 3) Gráfico de linha do Desvio Padrão
-    if "Desvio_Padrao" in d.columns and not d["Desvio_Padrao"].empty:
-        fig, ax = plt.subplots(figsize=(14, 6))
-        ax.plot(d.index, d["Desvio_Padrao"], marker="o", linewidth=2)
-        setup_time_axis(ax)
-        setup_y_axis(ax, d["Desvio_Padrao"].values)
-        style_axes(ax, f"Desvio padrão do público por mês — {uf}", "Mês", "Desvio padrão")
-        salva_plot(pasta_uf / "03_desvio_padrao.png")
+    caminho = pasta_uf / "03_desvio_padrao.png"
+    marcas = pontos_anomalos(d, anomalias_uf, ["Desvio_Padrao"])
+    titulo = f"Desvio padrão do público por mês — {uf}"
+    chave = chave_grafico(ESTILO, caminho.name, titulo, d.index, d.get("Desvio_Padrao"), *com_marcas(marcas))
+    if "Desvio_Padrao" in d.columns and not d["Desvio_Padrao"].empty and grafico_mudou(caminho, chave):
+        m["desvio"].desenha(d.index, [d["Desvio_Padrao"].values], titulo, caminho, marcas)
+        registra_grafico(caminho, chave)
 
     # 4) Gráfico de linha dos Quartis e IQR (Intervalo Interquartil)
-    if {"Q1", "Q3"}.issubset(d.columns):
-        fig, ax = plt.subplots(figsize=(14, 6))
-        ax.plot(d.index, d["Q1"], marker="o", linewidth=2, label="Q1")
-        ax.plot(d.index, d["Q3"], marker="s", linewidth=2, label="Q3")
-        ax.fill_between(d.index, d["Q1"], d["Q3"], alpha=0.18, label="IQR (Q3 - Q1)")
-        setup_time_axis(ax)
-        yy = np.concatenate([d["Q1"].values, d["Q3"].values])
-        setup_y_axis(ax, yy)
-        style_axes(ax, f"Quartis do público por mês (IQR) — {uf}", "Mês", "Público")
-        ax.legend()
-        salva_plot(pasta_uf / "04_quartis_com_iqr.png")
+    caminho = pasta_uf / "04_quartis_com_iqr.png"
+    marcas = pontos_anomalos(d, anomalias_uf, ["Q1", "Q3"])
+    titulo = f"Quartis do público por mês (IQR) — {uf}"
+    chave = chave_grafico(ESTILO, caminho.name, titulo, d.index, d.get("Q1"), d.get("Q3"), *com_marcas(marcas))
+    if {"Q1", "Q3"}.issubset(d.columns) and grafico_mudou(caminho, chave):
+        m["quartis"].desenha(d.index, [d["Q1"].values, d["Q3"].values], titulo, caminho, marcas)
+        registra_grafico(caminho, chave)
 
     # 5) Gráfico de linha comparando Mínimo e Máximo
-    if {"Min_Publico", "Max_Publico"}.issubset(d.columns):
-        fig, ax = plt.subplots(figsize=(14, 6))
-        ax.plot(d.index, d["Min_Publico"], marker="o", linewidth=2, label="Mínimo")
-        ax.plot(d.index, d["Max_Publico"], marker="s", linewidth=2, label="Máximo")
-        setup_time_axis(ax)
-        yy = np.concatenate([d["Min_Publico"].values, d["Max_Publico"].values])
-        setup_y_axis(ax, yy)
-        style_axes(ax, f"Valores mínimo e máximo de público por mês — {uf}", "Mês", "Público")
-        ax.legend()
-        salva_plot(pasta_uf / "05_min_vs_max.png")
+    caminho = pasta_uf / "05_min_vs_max.png"
+    marcas = pontos_anomalos(d, anomalias_uf, ["Min_Publico", "Max_Publico"])
+    titulo = f"Valores mínimo e máximo de público por mês — {uf}"
+    chave = chave_grafico(ESTILO, caminho.name, titulo, d.index, d.get("Min_Publico"), d.get("Max_Publico"),
+                          *com_marcas(marcas))
+    if {"Min_Publico", "Max_Publico"}.issubset(d.columns) and grafico_mudou(caminho, chave):
+        m["min_max"].desenha(d.index, [d["Min_Publico"].values, d["Max_Publico"].values], titulo, caminho, marcas)
+        registra_grafico(caminho, chave)
 
     # 6) Gráfico de Boxplot do Público Mensal por Ano
-    if "Total_Publico" in d.columns and "Ano" in d.columns:
+    caminho = pasta_uf / "06_boxplot_total_por_ano.png"
+    titulo = f"Distribuição do público mensal por ano (boxplot) — {uf}"
+    chave = chave_grafico(ESTILO, caminho.name, titulo, d.get("Ano"), d.get("Total_Publico"))
+    if "Total_Publico" in d.columns and "Ano" in d.columns and grafico_mudou(caminho, chave):
         grupos = list(d.groupby(d["Ano"]))
         if grupos:
             dados_por_ano = [g["Total_Publico"].dropna().values for _, g in grupos]
             labels_ano = [str(ano) for ano, _ in grupos]
-            plt.figure(figsize=(14, 6))
-            #showfliers=False` omite os outliers extremos no boxplot.
-            plt.boxplot(dados_por_ano, labels=labels_ano, showfliers=False)
-            plt.title(f"Distribuição do público mensal por ano (boxplot) — {uf}")
-            plt.xlabel("Ano")
-            plt.ylabel("Público mensal (Total)")
-            plt.grid(True, axis="y", alpha=0.35)
-            salva_plot(pasta_uf / "06_boxplot_total_por_ano.png")
-
-print(f"Gráficos salvos em: {PASTA_SAIDA.resolve()}")
\ No newline at end of file
+            m["boxplot"].desenha(dados_por_ano, labels_ano, titulo, caminho)
+            registra_grafico(caminho, chave)
+
+    return uf
+
+# Gera os gráficos de uma UF como uma etapa medida (tempo, savefig, bytes gravados).
+def desenha_uf(uf, d, anomalias_uf=None):
+    with etapa("graficos_uf", arquivo=uf, linhas=len(d)):
+        return gera_graficos_uf(uf, d, anomalias_uf)
+
+# =====================================================================
+# 6. Execução
+# =====================================================================
+def main():
+    parser = argparse.ArgumentParser(description="Gera os gráficos mensais de cada UF.")
+    parser.add_argument("--processos", type=int, default=1,
+                        help="número de processos para gerar os gráficos em paralelo "
+                             "(0 = um por núcleo da máquina)")
+    parser.add_argument("--anomalias", action="store_true",
+                        help="marca nos gráficos de linha os meses anômalos de cada métrica "
+                             "(ver códigos_comparativos_por_UF/anomalias_por_UF.py)")
+    parser.add_argument("--limiar-anomalia", type=float, default=LIMIAR_PADRAO,
+                        help="escore robusto a partir do qual um mês é marcado")
+    args = parser.parse_args()
+    if args.processos < 0:
+        parser.error("--processos não pode ser negativo")
+    processos = args.processos or os.cpu_count() or 1
+    instrumenta_script()
+
+    # Cria a pasta de saída e suas subpastas, se não existirem (`exist_ok=True` evita erros).
+    PASTA_SAIDA.mkdir(parents=True, exist_ok=True)
+
+    df = carrega_dados()
+
+    # Separa os dados de cada UF uma única vez (o groupby já devolve as UFs em ordem).
+    fatias = [(uf, d.set_index("Mes").sort_index()) for uf, d in df.groupby("UF", sort=True)]
+
+    # meses anômalos de todas as UFs de uma vez; cada UF recebe só os seus
+    anomalos = meses_anomalos(df, args.limiar_anomalia) if args.anomalias else {}
+    fatias = [(uf, d, anomalos.get(uf)) for uf, d in fatias]
+
+    if processos == 1:
+        for uf, d, anomalias_uf in fatias:
+            desenha_uf(uf, d, anomalias_uf)
+        fecha_modelos()
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            for uf in executor.map(desenha_uf, *zip(*fatias)):
+                print(f"Gráficos de {uf} prontos")
+
+    print(f"Gráficos salvos em: {PASTA_SAIDA.resolve()}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
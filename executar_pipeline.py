@@ -0,0 +1,270 @@
+# Executa as etapas do projeto na ordem certa.
+#
+# Cada etapa é um dos scripts do projeto, com as entradas que lê e as saídas que
+# grava. A ordem vem dessas dependências: uma etapa roda depois das etapas que
+# produzem as suas entradas, e etapas independentes (ex.: estatísticas nacionais
+# e por UF, ou as várias famílias de gráficos) rodam ao mesmo tempo.
+# Uma etapa é pulada quando as suas saídas são mais novas que as entradas.
+#
+# Uso:
+#   python executar_pipeline.py                      (tudo, até 4 etapas em paralelo)
+#   python executar_pipeline.py graficos_uf          (só essa etapa e as que ela precisa)
+#   python executar_pipeline.py --forcar             (roda mesmo se estiver atualizado)
+#   python executar_pipeline.py --mesmo-processo     (tudo num processo só, em sequência; as
+#                                                     tabelas passam de uma etapa para a outra
+#                                                     em memória, ver ferramentas/tabelas.py)
+#   python executar_pipeline.py --listar
+import argparse
+import os
+import runpy
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+from ferramentas.instrumentacao import encerra_script
+
+RAIZ = Path(__file__).resolve().parent
+PASTA_ESTADO = RAIZ / ".pipeline_estado"
+
+ETAPAS = [
+    {"nome": "filtro", "script": "tratador_de_dados/filtro_de_dados.py",
+     "entradas": ["bilheteria-diaria-obras-por-distribuidoras-csv"],
+     "saidas": ["dados_filtrados"]},
+    {"nome": "estatisticas_nacionais", "script": "códigos_comparativos_brutos/estatísticas_descritivas_numéricas.py",
+     "entradas": ["dados_filtrados", "dados_filtrados_parquet"],
+     "saidas": ["estatisticas_publico_mensal.csv"]},
+    {"nome": "estatisticas_uf", "script": "códigos_comparativos_por_UF/estatisticas_comparativas_descritivas_por_UF.py",
+     "entradas": ["dados_filtrados", "dados_filtrados_parquet"],
+     "saidas": ["estatisticas_por_UF_mensal.csv", "resumos_por_UF_mensal.csv"]},
+    {"nome": "estatisticas_diarias_uf", "script": "códigos_comparativos_por_UF/estatisticas_diarias_por_UF.py",
+     "entradas": ["dados_filtrados", "dados_filtrados_parquet"],
+     "saidas": ["estatisticas_diarias_por_UF.csv"]},
+    {"nome": "indice_publico", "script": "quantis_publico.py",
+     "entradas": ["dados_filtrados", "dados_filtrados_parquet"],
+     "saidas": ["indice_publico"]},
+    {"nome": "ciclo_de_vida", "script": "ciclo_de_vida_titulos.py",
+     "entradas": ["dados_filtrados", "dados_filtrados_parquet"],
+     "saidas": ["ciclo_de_vida_titulos.csv", "ciclo_de_vida_por_pais.csv",
+                "ciclo_de_vida_por_distribuidora.csv"]},
+    {"nome": "cubo_publico", "script": "cubo_publico.py",
+     "entradas": ["dados_filtrados", "dados_filtrados_parquet"],
+     "saidas": ["cubo_publico_mensal.csv.gz"]},
+    {"nome": "estatisticas_gerais_uf", "script": "códigos_comparativos_por_UF/Estatísticas_gerais_por_UF.py",
+     "entradas": ["estatisticas_por_UF_mensal.csv", "resumos_por_UF_mensal.csv"],
+     "saidas": ["estatisticas_gerais_por_UF.csv", "estatisticas_gerais_por_UF_sessoes.csv"]},
+    {"nome": "graficos_gerais", "script": "códigos_comparativos_brutos/graficos_comparativos.py",
+     "entradas": ["estatisticas_publico_mensal.csv"],
+     "saidas": ["graficos/gerais"]},
+    {"nome": "anomalias_uf", "script": "códigos_comparativos_por_UF/anomalias_por_UF.py",
+     "entradas": ["estatisticas_por_UF_mensal.csv"],
+     "saidas": ["anomalias_por_UF_mensal.csv"]},
+    {"nome": "graficos_uf", "script": "códigos_comparativos_por_UF/graficos_por_estado.py",
+     "entradas": ["estatisticas_por_UF_mensal.csv"],
+     "saidas": ["graficos/separados_por_UF"]},
+    {"nome": "grafico_desvio_uf", "script": "grafico_desvio_padrão_por_UF.py",
+     "entradas": ["estatisticas_gerais_por_UF.csv"],
+     "saidas": ["desvio_padrao_por_UF.png"]},
+    {"nome": "medias_periodo_geral", "script": "médias_de_público_geral_por_periodo.py",
+     "entradas": ["estatisticas_publico_mensal.csv"],
+     "saidas": ["comparacao_medias_periodos.png"]},
+    {"nome": "medias_periodo_uf", "script": "medias_de_público_por_UF_por_período",
+     "entradas": ["estatisticas_por_UF_mensal.csv"],
+     "saidas": ["medias_das_medias_por_periodo_por_UF.csv", "graficos/medias_por_periodo_por_UF"]},
+    {"nome": "teste_estatistica", "script": "teste_estatistica.py",
+     "entradas": ["estatisticas_por_UF_mensal.csv"],
+     "saidas": ["resultados_recuperacao.csv"]},
+    {"nome": "intervalos_periodos", "script": "intervalos_periodos.py",
+     "entradas": ["estatisticas_por_UF_mensal.csv"],
+     "saidas": ["intervalos_periodos_UF_mensal.csv", "razao_pos_pre_UF_mensal.csv"]},
+]
+
+
+# Dependências: a etapa A depende de B se alguma entrada de A é saída de B.
+def dependencias(etapas):
+    produtor = {saida: e["nome"] for e in etapas for saida in e["saidas"]}
+    return {
+        e["nome"]: {produtor[ent] for ent in e["entradas"] if ent in produtor and produtor[ent] != e["nome"]}
+        for e in etapas
+    }
+
+
+# mtime de um arquivo ou, para pastas, do arquivo mais novo (mais_novo=True)
+# ou mais antigo (mais_novo=False) dentro dela. None se não existir.
+def mtime(caminho, mais_novo=True):
+    caminho = RAIZ / caminho
+    if not caminho.exists():
+        return None
+    if caminho.is_file():
+        return caminho.stat().st_mtime
+    tempos = [p.stat().st_mtime for p in caminho.rglob("*") if p.is_file() and not p.name.startswith(".")]
+    if not tempos:
+        return None
+    return max(tempos) if mais_novo else min(tempos)
+
+
+# Uma etapa está atualizada se todas as saídas existem e são mais novas que
+# todas as entradas. Como os scripts têm cache próprio (manifesto, cache de
+# gráficos) e podem não regravar uma saída que não mudou, a última execução
+# bem-sucedida também conta como "saída" (arquivo em .pipeline_estado/).
+def atualizada(etapa):
+    tempos_saida = [mtime(s, mais_novo=False) for s in etapa["saidas"]]
+    if any(t is None for t in tempos_saida):
+        return False
+    saida = min(tempos_saida)
+    marca = PASTA_ESTADO / etapa["nome"]
+    if marca.exists():
+        saida = max(saida, marca.stat().st_mtime)
+
+    tempos_entrada = [t for t in (mtime(e) for e in etapa["entradas"]) if t is not None]
+    return all(t <= saida for t in tempos_entrada)
+
+
+def marca_concluida(etapa):
+    PASTA_ESTADO.mkdir(exist_ok=True)
+    (PASTA_ESTADO / etapa["nome"]).touch()
+
+
+# Roda o script num processo separado (backend Agg: os gráficos não abrem janela).
+def executa_subprocesso(etapa):
+    ambiente = dict(os.environ, MPLBACKEND="Agg")
+    inicio = time.perf_counter()
+    resultado = subprocess.run([sys.executable, str(RAIZ / etapa["script"])], cwd=RAIZ, env=ambiente,
+                               capture_output=True, text=True)
+    return resultado.returncode, resultado.stdout + resultado.stderr, time.perf_counter() - inicio
+
+
+# Roda o script dentro deste processo; as tabelas gravadas por uma etapa ficam
+# em memória para as seguintes (ferramentas/tabelas.py).
+def executa_no_processo(etapa):
+    script = RAIZ / etapa["script"]
+    argv, caminho = sys.argv, list(sys.path)
+    sys.argv = [str(script)]
+    sys.path.insert(0, str(script.parent))
+    inicio = time.perf_counter()
+    try:
+        runpy.run_path(str(script), run_name="__main__")
+        codigo = 0
+    except SystemExit as e:
+        codigo = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        sys.argv, sys.path[:] = argv, caminho
+        # fecha a medição do script aqui, e não só no fim do processo
+        encerra_script()
+        import matplotlib.pyplot as plt
+        plt.close("all")
+    return codigo, "", time.perf_counter() - inicio
+
+
+# Seleciona as etapas pedidas e tudo de que elas dependem.
+def seleciona(nomes, deps):
+    escolhidas = set()
+    pendentes = list(nomes)
+    while pendentes:
+        nome = pendentes.pop()
+        if nome not in escolhidas:
+            escolhidas.add(nome)
+            pendentes.extend(deps[nome])
+    return escolhidas
+
+
+def executa(etapas, forcar=False, processos=4, mesmo_processo=False):
+    deps = dependencias(etapas)
+    por_nome = {e["nome"]: e for e in etapas}
+    faltam = [e["nome"] for e in etapas]
+    executadas = set()  # etapas que rodaram nesta execução (as seguintes não podem ser puladas)
+    concluidas = set()
+    falhas = []
+
+    def pronta(nome):
+        return deps[nome] <= concluidas
+
+    def deve_rodar(nome):
+        return forcar or (deps[nome] & executadas) or not atualizada(por_nome[nome])
+
+    def termina(nome, codigo, saida, duracao):
+        if saida.strip():
+            print(saida.rstrip())
+        if codigo == 0:
+            print(f"[{nome}] ok ({duracao:.1f}s)")
+            marca_concluida(por_nome[nome])
+            executadas.add(nome)
+            concluidas.add(nome)
+        else:
+            print(f"[{nome}] FALHOU (código {codigo})")
+            falhas.append(nome)
+
+    if mesmo_processo:
+        os.environ.setdefault("MPLBACKEND", "Agg")
+        os.chdir(RAIZ)
+        while faltam:
+            prontas = [n for n in faltam if pronta(n)]
+            if not prontas:
+                break
+            for nome in prontas:
+                faltam.remove(nome)
+                if not deve_rodar(nome):
+                    print(f"[{nome}] atualizada, pulando")
+                    concluidas.add(nome)
+                    continue
+                print(f"[{nome}] executando")
+                termina(nome, *executa_no_processo(por_nome[nome]))
+    else:
+        with ThreadPoolExecutor(max_workers=processos) as executor:
+            rodando = {}
+            while faltam or rodando:
+                for nome in [n for n in faltam if pronta(n)]:
+                    faltam.remove(nome)
+                    if not deve_rodar(nome):
+                        print(f"[{nome}] atualizada, pulando")
+                        concluidas.add(nome)
+                        continue
+                    print(f"[{nome}] executando")
+                    rodando[executor.submit(executa_subprocesso, por_nome[nome])] = nome
+                if not rodando:
+                    if any(pronta(n) for n in faltam):
+                        continue
+                    break
+                feitas, _ = wait(rodando, return_when=FIRST_COMPLETED)
+                for futuro in feitas:
+                    termina(rodando.pop(futuro), *futuro.result())
+
+    # etapas que dependiam de uma que falhou ficam sem rodar
+    for nome in faltam:
+        print(f"[{nome}] não executada (depende de etapa que falhou)")
+    return not falhas and not faltam
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Executa as etapas do projeto respeitando as dependências.")
+    parser.add_argument("etapas", nargs="*", help="etapas a executar (padrão: todas)")
+    parser.add_argument("--forcar", action="store_true", help="executa mesmo as etapas atualizadas")
+    parser.add_argument("--processos", type=int, default=4, help="etapas rodando ao mesmo tempo")
+    parser.add_argument("--mesmo-processo", action="store_true",
+                        help="roda tudo neste processo, passando as tabelas em memória")
+    parser.add_argument("--listar", action="store_true", help="mostra as etapas e as dependências")
+    args = parser.parse_args()
+
+    deps = dependencias(ETAPAS)
+    if args.listar:
+        for etapa in ETAPAS:
+            depende = ", ".join(sorted(deps[etapa["nome"]])) or "-"
+            print(f"{etapa['nome']:<24} {etapa['script']}  (depende de: {depende})")
+        return
+
+    desconhecidas = set(args.etapas) - set(deps)
+    if desconhecidas:
+        parser.error(f"etapas desconhecidas: {', '.join(sorted(desconhecidas))}")
+
+    etapas = ETAPAS
+    if args.etapas:
+        escolhidas = seleciona(args.etapas, deps)
+        etapas = [e for e in ETAPAS if e["nome"] in escolhidas]
+
+    ok = executa(etapas, args.forcar, max(args.processos, 1), args.mesmo_processo)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
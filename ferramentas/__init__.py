@@ -0,0 +1 @@
+# Funções compartilhadas pelos scripts de análise (leitura dos dados, cálculos e gráficos).
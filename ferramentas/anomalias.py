@@ -0,0 +1,107 @@
+# Detecção de anomalias nas estatísticas mensais por UF
+# (estatisticas_por_UF_mensal.csv), todas as UFs, meses e métricas de uma vez.
+#
+# A tabela vira um cubo UF × mês × métrica, com os meses completados até anos
+# inteiros (meses sem dados ficam NaN), então o eixo dos meses pode ser visto
+# como ano × mês do ano. Cada célula recebe dois escores robustos:
+#   - sazonal: distância até a mediana do mesmo mês do ano em todos os anos da
+#     UF, dividida pelo MAD (desvio absoluto mediano) desses valores;
+#   - anual: variação (em log) em relação ao mesmo mês do ano anterior, comparada
+#     com a mediana e o MAD das variações anuais da UF naquela métrica.
+# Os dois são "escores z robustos" (0,6745 · desvio / MAD): perto de uma
+# distribuição normal, valem como o escore z comum, mas um pico isolado não
+# puxa a própria referência. O escore da célula é o maior dos dois em módulo.
+# Quando o MAD é zero (métrica quase constante), a escala passa a ser o desvio
+# absoluto médio (· 1,2533), como no escore z modificado. As escalas têm um
+# piso (1 espectador nos valores, 0,1 nas variações em log): sem ele, métricas
+# de valores pequenos e inteiros, como o mínimo (quase sempre 0 ou 1), marcam
+# como anomalia qualquer passo de uma unidade.
+#
+# Uso:
+#   cubo = CuboMensal(df)
+#   tabela = anomalias(cubo, limiar=3.5)        (células com escore >= limiar, da maior para a menor)
+import warnings
+
+import numpy as np
+import pandas as pd
+
+METRICAS = ["Total_Publico", "Media_Publico", "Mediana_Publico", "Moda_Publico", "Desvio_Padrao",
+            "Q1", "Q3", "IQR", "Min_Publico", "Max_Publico"]
+LIMIAR_PADRAO = 3.5
+MINIMO_ANOS = 3     # anos com valor no mesmo mês para haver referência sazonal
+ESCALA_MINIMA = 1.0             # em espectadores
+ESCALA_MINIMA_VARIACAO = 0.1    # em log(1 + x), ~10%
+
+
+class CuboMensal:
+    # `df` tem uma linha por UF × mês (Mes em AAAA-MM) e as colunas de `metricas`.
+    def __init__(self, df, metricas=None, grupo="UF", mes="Mes"):
+        self.metricas = [m for m in (metricas or METRICAS) if m in df.columns]
+        self.ufs, id_uf = np.unique(df[grupo].astype(str).to_numpy(), return_inverse=True)
+        periodo = pd.PeriodIndex(df[mes].astype(str), freq="M")
+        self.ano_inicial = int(periodo.year.min())
+        self.anos = int(periodo.year.max()) - self.ano_inicial + 1
+        id_mes = (periodo.year.to_numpy() - self.ano_inicial) * 12 + periodo.month.to_numpy() - 1
+        self.meses = pd.period_range(f"{self.ano_inicial}-01", periods=self.anos * 12, freq="M").astype(str)
+
+        self.valores = np.full((len(self.ufs), self.anos * 12, len(self.metricas)), np.nan)
+        self.valores[id_uf, id_mes] = df[self.metricas].apply(pd.to_numeric, errors="coerce").to_numpy(float)
+
+    # Visão UF × ano × mês do ano × métrica (sem cópia).
+    def por_ano(self):
+        return self.valores.reshape(len(self.ufs), self.anos, 12, len(self.metricas))
+
+
+# Escore z robusto de `x` em relação a `referencia`, ao longo de `eixo`.
+def escore_robusto(x, referencia, eixo, minimo=1, escala_minima=0.0):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mediana = np.nanmedian(referencia, axis=eixo, keepdims=True)
+        desvio = np.abs(referencia - mediana)
+        escala = np.nanmedian(desvio, axis=eixo, keepdims=True) / 0.6745
+        escala_media = np.nanmean(desvio, axis=eixo, keepdims=True) * 1.2533
+        contagem = np.sum(~np.isnan(referencia), axis=eixo, keepdims=True)
+    escala = np.fmax(np.where(escala > 0, escala, escala_media), escala_minima)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        escore = np.where(escala > 0, (x - mediana) / escala, np.where(x == mediana, 0.0, np.nan))
+    escore = np.where(contagem >= minimo, escore, np.nan)
+    return escore, np.broadcast_to(mediana, escore.shape)
+
+
+# Escores sazonal e anual de todas as células (matrizes UF × mês × métrica).
+def escores(cubo, minimo_anos=MINIMO_ANOS):
+    por_ano = cubo.por_ano()
+    sazonal, base = escore_robusto(por_ano, por_ano, eixo=1, minimo=minimo_anos, escala_minima=ESCALA_MINIMA)
+    forma = cubo.valores.shape
+
+    # variação anual em log: log(1 + x) - log(1 + x do ano anterior)
+    with np.errstate(invalid="ignore"):
+        logaritmo = np.log1p(np.clip(cubo.valores, 0, None))
+    variacao = np.full(forma, np.nan)
+    variacao[:, 12:] = logaritmo[:, 12:] - logaritmo[:, :-12]
+    anual, _ = escore_robusto(variacao, variacao, eixo=1, minimo=minimo_anos,
+                              escala_minima=ESCALA_MINIMA_VARIACAO)
+
+    anterior = np.full(forma, np.nan)
+    anterior[:, 12:] = cubo.valores[:, :-12]
+    return sazonal.reshape(forma), base.reshape(forma), anual, anterior
+
+
+# Tabela das células com escore >= `limiar`, da mais anômala para a menos.
+def anomalias(cubo, limiar=LIMIAR_PADRAO, minimo_anos=MINIMO_ANOS):
+    sazonal, base, anual, anterior = escores(cubo, minimo_anos)
+    escore = np.fmax(np.abs(sazonal), np.abs(anual))
+    uf, mes, metrica = np.nonzero(escore >= limiar)
+    tabela = pd.DataFrame({
+        "UF": cubo.ufs[uf],
+        "Mes": cubo.meses[mes],
+        "Metrica": np.asarray(cubo.metricas)[metrica],
+        "Valor": cubo.valores[uf, mes, metrica],
+        "Base_Sazonal": base[uf, mes, metrica],
+        "Escore_Sazonal": sazonal[uf, mes, metrica],
+        "Ano_Anterior": anterior[uf, mes, metrica],
+        "Escore_Anual": anual[uf, mes, metrica],
+        "Escore": escore[uf, mes, metrica],
+    })
+    return tabela.sort_values(["Escore", "UF", "Mes", "Metrica"], ascending=[False, True, True, True],
+                              ignore_index=True)
@@ -0,0 +1,93 @@
+# Arquivos brutos da ANCINE, descompactados ou não.
+#
+# A origem do filtro pode ser:
+#   - uma pasta com os CSVs (bilheteria-diaria-obras-por-distribuidoras-csv);
+#   - um arquivo .zip (com um ou mais CSVs dentro), .csv.gz ou .csv.xz;
+#   - uma pasta com qualquer mistura desses arquivos.
+# Cada CSV encontrado vira uma Entrada, que abre um fluxo de leitura: os
+# compactados são descompactados aos poucos, conforme o pandas lê, sem gravar
+# nenhum arquivo temporário. O nome da Entrada é o do CSV (o membro do .zip, ou
+# o .gz/.xz sem a extensão), usado para descobrir o mês.
+import gzip
+import lzma
+import zipfile
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+
+COMPACTADORES = {".gz": gzip.open, ".xz": lzma.open}
+
+
+class Entrada:
+    # `arquivo` é o arquivo no disco; `membro`, o nome do CSV dentro do .zip.
+    def __init__(self, arquivo, membro=None):
+        self.arquivo = Path(arquivo)
+        self.membro = membro
+
+    @property
+    def nome(self):
+        if self.membro is not None:
+            return PurePosixPath(self.membro).name
+        if self.arquivo.suffix.lower() in COMPACTADORES:
+            return self.arquivo.stem
+        return self.arquivo.name
+
+    @property
+    def stem(self):
+        return PurePosixPath(self.nome).stem
+
+    # Bytes lidos do disco (compactados) para esta entrada.
+    @property
+    def tamanho(self):
+        if self.membro is not None:
+            with zipfile.ZipFile(self.arquivo) as arquivo_zip:
+                return arquivo_zip.getinfo(self.membro).compress_size
+        return self.arquivo.stat().st_size
+
+    # Data de modificação (timestamp): a do membro no .zip ou a do arquivo.
+    @property
+    def modificado(self):
+        if self.membro is not None:
+            with zipfile.ZipFile(self.arquivo) as arquivo_zip:
+                return datetime(*arquivo_zip.getinfo(self.membro).date_time).timestamp()
+        return self.arquivo.stat().st_mtime
+
+    # Fluxo binário com o CSV descompactado (feche depois de usar, ou use `with`).
+    def abre(self):
+        if self.membro is not None:
+            # o arquivo .zip continua aberto enquanto o fluxo do membro estiver aberto
+            with zipfile.ZipFile(self.arquivo) as arquivo_zip:
+                return arquivo_zip.open(self.membro)
+        abrir = COMPACTADORES.get(self.arquivo.suffix.lower(), open)
+        return abrir(self.arquivo, "rb")
+
+    def __repr__(self):
+        return f"{self.arquivo}:{self.membro}" if self.membro else str(self.arquivo)
+
+
+def e_csv(nome):
+    return nome.lower().endswith(".csv")
+
+
+# Entradas de um arquivo: o próprio CSV, o CSV de um .gz/.xz ou os CSVs de um .zip.
+def entradas_do_arquivo(arquivo):
+    sufixo = arquivo.suffix.lower()
+    if sufixo == ".zip":
+        with zipfile.ZipFile(arquivo) as arquivo_zip:
+            return [Entrada(arquivo, info.filename) for info in arquivo_zip.infolist()
+                    if not info.is_dir() and e_csv(info.filename)
+                    and not PurePosixPath(info.filename).name.startswith(".")]
+    if sufixo in COMPACTADORES:
+        return [Entrada(arquivo)] if e_csv(arquivo.stem) else []
+    return [Entrada(arquivo)] if e_csv(arquivo.name) else []
+
+
+# Todas as entradas da origem (pasta ou arquivo), em ordem de nome.
+def lista_entradas(origem):
+    origem = Path(origem)
+    if origem.is_dir():
+        arquivos = sorted(p for p in origem.iterdir() if p.is_file())
+    elif origem.exists():
+        arquivos = [origem]
+    else:
+        raise FileNotFoundError(f"Origem não encontrada: {origem}")
+    return [entrada for arquivo in arquivos for entrada in entradas_do_arquivo(arquivo)]
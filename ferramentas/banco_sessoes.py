@@ -0,0 +1,239 @@
+# Banco SQLite com as sessões de dados_filtrados, para consultas pontuais
+# (um título, uma distribuidora, um município, um país...) sem reler todos os CSVs.
+#
+# Estrutura de sessoes.sqlite:
+#   - sessoes: uma linha por sessão, com a data (inteiro AAAAMMDD), o mês
+#     (AAAAMM), o público e o código de cada coluna de texto;
+#   - titulos, paises, municipios, ufs, distribuidoras: o texto de cada código
+#     (cada nome é gravado uma vez só, não uma vez por sessão);
+#   - v_sessoes: visão com os nomes no lugar dos códigos, usada pelas consultas;
+#   - meses_carregados: assinatura dos arquivos de cada mês (a mesma do manifesto,
+#     ver ferramentas/manifesto.py), para recarregar só os meses que mudaram.
+# Há índices na data, no mês e em UF, município, título, distribuidora e país.
+#
+# Uso:
+#   atualiza_banco()                                   (cria ou atualiza sessoes.sqlite)
+#   sessoes(titulo="SONIC - O FILME", uf="RS")         (as sessões, como DataFrame)
+#   publico_por("mes", distribuidora="PARAMOUNT ...")  (público somado por mês)
+#   consulta("SELECT ... FROM v_sessoes WHERE ...")    (SQL livre)
+import json
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from ferramentas.instrumentacao import etapa, gravou
+from ferramentas.leitura_dados import arquivos_do_mes, le_mes, meses_disponiveis
+from ferramentas.manifesto import assinatura_mes
+
+ARQUIVO_BANCO = Path("sessoes.sqlite")
+
+# coluna dos dados filtrados -> (tabela de nomes, coluna de código em `sessoes`, nome na visão)
+DIMENSOES = {
+    "TITULO_BRASIL": ("titulos", "titulo_id", "titulo"),
+    "PAIS_OBRA": ("paises", "pais_id", "pais"),
+    "MUNICIPIO_SALA_COMPLEXO": ("municipios", "municipio_id", "municipio"),
+    "UF_SALA_COMPLEXO": ("ufs", "uf_id", "uf"),
+    "RAZAO_SOCIAL_DISTRIBUIDORA": ("distribuidoras", "distribuidora_id", "distribuidora"),
+}
+# filtros aceitos por sessoes() e publico_por(): nome na visão -> coluna indexada
+FILTROS = {visao: (tabela, codigo) for tabela, codigo, visao in DIMENSOES.values()}
+
+
+def conecta(arquivo=None):
+    conexao = sqlite3.connect(arquivo or ARQUIVO_BANCO)
+    conexao.execute("PRAGMA foreign_keys = OFF")
+    return conexao
+
+
+def cria_estrutura(conexao):
+    for tabela, _, _ in DIMENSOES.values():
+        conexao.execute(f"CREATE TABLE IF NOT EXISTS {tabela} (id INTEGER PRIMARY KEY, nome TEXT NOT NULL UNIQUE)")
+    codigos = ", ".join(f"{codigo} INTEGER" for _, codigo, _ in DIMENSOES.values())
+    conexao.execute(f"CREATE TABLE IF NOT EXISTS sessoes (data INTEGER, mes INTEGER, publico INTEGER, {codigos})")
+    conexao.execute("CREATE TABLE IF NOT EXISTS meses_carregados (mes TEXT PRIMARY KEY, assinatura TEXT, linhas INTEGER)")
+
+    juncoes = " ".join(f"JOIN {tabela} ON {tabela}.id = s.{codigo}" for tabela, codigo, _ in DIMENSOES.values())
+    nomes = ", ".join(f"{tabela}.nome AS {visao}" for tabela, _, visao in DIMENSOES.values())
+    conexao.execute(
+        "CREATE VIEW IF NOT EXISTS v_sessoes AS SELECT "
+        "printf('%04d-%02d-%02d', s.data / 10000, s.data / 100 % 100, s.data % 100) AS data, "
+        "printf('%04d-%02d', s.mes / 100, s.mes % 100) AS mes, "
+        f"s.publico AS publico, {nomes} FROM sessoes s {juncoes}"
+    )
+
+
+def cria_indices(conexao):
+    conexao.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_data ON sessoes (data)")
+    conexao.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_mes ON sessoes (mes)")
+    for _, codigo, _ in DIMENSOES.values():
+        conexao.execute(f"CREATE INDEX IF NOT EXISTS idx_sessoes_{codigo} ON sessoes ({codigo}, data)")
+
+
+def remove_indices(conexao):
+    for (nome,) in conexao.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_sessoes_%'").fetchall():
+        conexao.execute(f"DROP INDEX {nome}")
+
+
+# Troca os nomes de uma coluna pelos códigos da tabela `tabela`, cadastrando os nomes novos.
+def codifica(conexao, tabela, nomes):
+    existentes = dict(conexao.execute(f"SELECT nome, id FROM {tabela}").fetchall())
+    novos = [n for n in pd.unique(nomes) if n not in existentes]
+    if novos:
+        proximo = max(existentes.values(), default=0) + 1
+        ids = range(proximo, proximo + len(novos))
+        conexao.executemany(f"INSERT INTO {tabela} (id, nome) VALUES (?, ?)", zip(ids, novos))
+        existentes.update(zip(novos, ids))
+    return nomes.map(existentes).astype("int64")
+
+
+def data_inteira(datas):
+    if pd.api.types.is_object_dtype(datas) or pd.api.types.is_string_dtype(datas):
+        datas = pd.to_datetime(datas, format="%d/%m/%Y", errors="coerce")
+    else:
+        datas = pd.to_datetime(datas, errors="coerce")
+    return datas.dt.year * 10000 + datas.dt.month * 100 + datas.dt.day
+
+
+def carrega_mes(conexao, mes):
+    dados = le_mes(mes).dropna()
+    tabela = pd.DataFrame({
+        "data": data_inteira(dados["DATA_EXIBICAO"]),
+        "mes": int(mes.replace("-", "")),
+        "publico": pd.to_numeric(dados["PUBLICO"], errors="coerce"),
+    })
+    for coluna, (nome_tabela, codigo, _) in DIMENSOES.items():
+        tabela[codigo] = codifica(conexao, nome_tabela, dados[coluna].astype(str))
+    tabela = tabela.dropna()
+
+    conexao.execute("DELETE FROM sessoes WHERE mes = ?", (int(mes.replace("-", "")),))
+    colunas = list(tabela.columns)
+    conexao.executemany(
+        f"INSERT INTO sessoes ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+        tabela.astype("int64").itertuples(index=False, name=None),
+    )
+    return len(tabela)
+
+
+# Cria ou atualiza o banco. Só os meses novos ou alterados são recarregados; os
+# que sumiram de dados_filtrados saem do banco. Devolve o número de meses recarregados.
+def atualiza_banco(arquivo=None):
+    arquivo = Path(arquivo or ARQUIVO_BANCO)
+    conexao = conecta(arquivo)
+    try:
+        conexao.execute("PRAGMA journal_mode = MEMORY")
+        conexao.execute("PRAGMA synchronous = OFF")
+        cria_estrutura(conexao)
+
+        anteriores = {mes: json.loads(a) for mes, a in conexao.execute("SELECT mes, assinatura FROM meses_carregados")}
+        meses = meses_disponiveis()
+        assinaturas = {mes: assinatura_mes(arquivos_do_mes(mes), anteriores.get(mes)) for mes in meses}
+        recarregar = [mes for mes in meses if anteriores.get(mes, {}).get("hash") != assinaturas[mes]["hash"]]
+        removidos = set(anteriores) - set(meses)
+
+        # carga grande: é mais rápido criar os índices depois de inserir tudo
+        carga_completa = len(recarregar) > len(anteriores)
+        if carga_completa:
+            remove_indices(conexao)
+
+        with conexao:
+            for mes in removidos:
+                conexao.execute("DELETE FROM sessoes WHERE mes = ?", (int(mes.replace("-", "")),))
+                conexao.execute("DELETE FROM meses_carregados WHERE mes = ?", (mes,))
+            for mes in recarregar:
+                with etapa("banco_sessoes", arquivo=mes) as medicao:
+                    medicao.linhas = carrega_mes(conexao, mes)
+                conexao.execute("INSERT OR REPLACE INTO meses_carregados VALUES (?, ?, ?)",
+                                (mes, json.dumps(assinaturas[mes]), medicao.linhas))
+            cria_indices(conexao)
+        if recarregar or removidos:
+            conexao.execute("ANALYZE")
+    finally:
+        conexao.close()
+    gravou(arquivo)
+    print(f"{arquivo}: {len(recarregar)} mês(es) carregado(s), {len(meses) - len(recarregar)} já atualizado(s)")
+    return len(recarregar)
+
+
+# SQL livre sobre o banco (use a visão v_sessoes para ter os nomes).
+def consulta(sql, parametros=(), arquivo=None):
+    conexao = conecta(arquivo)
+    try:
+        return pd.read_sql_query(sql, conexao, params=parametros)
+    finally:
+        conexao.close()
+
+
+# Monta o WHERE dos filtros. Cada filtro aceita um valor ou uma lista; o nome é
+# trocado pelo código antes (busca pelo índice único da tabela de nomes), então
+# a consulta usa os índices de `sessoes`. `inicio` e `fim` são datas AAAA-MM-DD
+# (ou AAAA-MM) e entram no filtro pela data.
+def _condicoes(inicio=None, fim=None, **filtros):
+    condicoes, parametros = [], []
+    for nome, valor in filtros.items():
+        if valor is None:
+            continue
+        if nome not in FILTROS:
+            raise ValueError(f"filtro desconhecido: {nome} (use {', '.join(FILTROS)})")
+        tabela, codigo = FILTROS[nome]
+        valores = [valor] if isinstance(valor, str) else list(valor)
+        marcas = ", ".join("?" * len(valores))
+        condicoes.append(f"s.{codigo} IN (SELECT id FROM {tabela} WHERE nome IN ({marcas}))")
+        parametros.extend(valores)
+    if inicio is not None:
+        condicoes.append("s.data >= ?")
+        parametros.append(_data_limite(inicio, 1))
+    if fim is not None:
+        condicoes.append("s.data <= ?")
+        parametros.append(_data_limite(fim, 31))
+    where = (" WHERE " + " AND ".join(condicoes)) if condicoes else ""
+    return where, parametros
+
+
+def _data_limite(texto, dia_padrao):
+    partes = [int(p) for p in str(texto).split("-")]
+    dia = partes[2] if len(partes) > 2 else dia_padrao
+    return partes[0] * 10000 + partes[1] * 100 + dia
+
+
+def _consulta_sessoes(select, where, sufixo, parametros, arquivo):
+    juncoes = " ".join(f"JOIN {tabela} ON {tabela}.id = s.{codigo}" for tabela, codigo, _ in DIMENSOES.values())
+    return consulta(f"SELECT {select} FROM sessoes s {juncoes}{where}{sufixo}", parametros, arquivo)
+
+
+def _expressao(coluna):
+    if coluna == "data":
+        return "printf('%04d-%02d-%02d', s.data / 10000, s.data / 100 % 100, s.data % 100)"
+    if coluna == "mes":
+        return "printf('%04d-%02d', s.mes / 100, s.mes % 100)"
+    if coluna == "ano":
+        return "s.mes / 100"
+    if coluna in FILTROS:
+        return f"{FILTROS[coluna][0]}.nome"
+    raise ValueError(f"coluna desconhecida: {coluna}")
+
+
+# Sessões que atendem aos filtros (ex.: sessoes(titulo="X", uf=["SP", "RJ"], inicio="2020-04")).
+def sessoes(inicio=None, fim=None, limite=None, arquivo=None, **filtros):
+    where, parametros = _condicoes(inicio, fim, **filtros)
+    expressoes = [f"{_expressao(c)} AS {c}" for c in ("data", "mes")] + ["s.publico AS publico"]
+    expressoes += [f"{_expressao(c)} AS {c}" for c in FILTROS]
+    select = ", ".join(expressoes)
+    sufixo = " ORDER BY s.data"
+    if limite:
+        sufixo += f" LIMIT {int(limite)}"
+    return _consulta_sessoes(select, where, sufixo, parametros, arquivo)
+
+
+# Público agregado por uma ou mais colunas (data, mes, ano, titulo, pais, municipio,
+# uf, distribuidora), com os mesmos filtros de sessoes(). Devolve sessões, total,
+# média, mínimo e máximo de público por grupo, do maior total para o menor.
+def publico_por(por, inicio=None, fim=None, arquivo=None, **filtros):
+    por = [por] if isinstance(por, str) else list(por)
+    where, parametros = _condicoes(inicio, fim, **filtros)
+    grupos = ", ".join(f"{_expressao(c)} AS {c}" for c in por)
+    select = (f"{grupos}, COUNT(*) AS Sessoes, SUM(s.publico) AS Total_Publico, "
+              "ROUND(AVG(s.publico), 2) AS Media_Publico, MIN(s.publico) AS Min_Publico, "
+              "MAX(s.publico) AS Max_Publico")
+    sufixo = f" GROUP BY {', '.join(_expressao(c) for c in por)} ORDER BY Total_Publico DESC"
+    return _consulta_sessoes(select, where, sufixo, parametros, arquivo)
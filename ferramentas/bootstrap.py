@@ -0,0 +1,155 @@
+# Intervalos de confiança por bootstrap em blocos para as médias dos períodos
+# (pré-pandemia, pandemia, pós) de cada UF e para a razão pós/pré.
+#
+# Meses (ou dias) vizinhos são correlacionados, então reamostrar valores soltos
+# subestima a incerteza. O bootstrap em blocos circulares sorteia blocos de
+# `bloco` meses consecutivos (dando a volta no fim do período) até cobrir o
+# tamanho do período; a média dos valores sorteados é uma reamostragem.
+#
+# Tudo é feito para todas as UFs e todas as reamostragens de uma vez: a soma (e
+# a contagem de valores presentes) de cada bloco possível sai de uma soma
+# acumulada da série duplicada, e cada reamostragem é a soma das somas dos
+# blocos sorteados. O único laço em Python é sobre a posição do bloco dentro da
+# reamostragem (períodos / bloco vezes), com uma matriz UF × reamostragens a
+# cada passo. Com a mesma semente, o resultado é sempre o mesmo.
+#
+# Uso:
+#   grupos, tempos, valores = matriz_por_grupo(df, "Media_Publico", grupo="UF")
+#   periodos, razao = intervalos_periodos(grupos, tempos, valores, PERIODOS_PADRAO)
+import math
+import warnings
+
+import numpy as np
+import pandas as pd
+
+REAMOSTRAGENS_PADRAO = 10_000
+NIVEL_PADRAO = 0.95
+
+
+# Matriz grupo × tempo (tempos em ordem) de uma coluna; ausentes viram NaN.
+# Sem `grupo`, todas as linhas formam um grupo só.
+def matriz_por_grupo(df, coluna, grupo="UF", tempo="Mes"):
+    tempos, id_tempo = np.unique(df[tempo].astype(str).to_numpy(), return_inverse=True)
+    if grupo is None:
+        grupos = np.array([None], dtype=object)
+        id_grupo = np.zeros(len(df), dtype=np.int64)
+    else:
+        grupos, id_grupo = np.unique(df[grupo].astype(str).to_numpy(), return_inverse=True)
+    valores = np.full((len(grupos), len(tempos)), np.nan)
+    valores[id_grupo, id_tempo] = pd.to_numeric(df[coluna], errors="coerce").to_numpy(dtype=float)
+    return grupos, tempos, valores
+
+
+# Regra usual para o tamanho do bloco: n^(1/3), arredondado.
+def tamanho_bloco(n):
+    return max(1, round(n ** (1 / 3)))
+
+
+# Somas e contagens de todos os blocos circulares de tamanho `b` de cada linha
+# (matrizes grupo × início).
+def somas_dos_blocos(valores, presente, b):
+    n = valores.shape[1]
+    zeros = np.zeros((len(valores), 1))
+    soma = np.concatenate([zeros, np.tile(valores, 2).cumsum(axis=1)], axis=1)
+    contagem = np.concatenate([zeros, np.tile(presente, 2).cumsum(axis=1)], axis=1)
+    inicio = np.arange(n)
+    return soma[:, inicio + b] - soma[:, inicio], contagem[:, inicio + b] - contagem[:, inicio]
+
+
+# Médias de `reamostragens` reamostragens em blocos circulares de cada linha de
+# `valores` (grupo × tempo, NaN = ausente). Devolve uma matriz grupo × reamostragens.
+def medias_reamostradas(valores, reamostragens, bloco, rng):
+    n_grupos, n = valores.shape
+    if n == 0:
+        return np.full((n_grupos, reamostragens), np.nan)
+    b = min(bloco, n)
+    n_blocos = math.ceil(n / b)
+    resto = n - (n_blocos - 1) * b      # o último bloco é cortado para somar n valores
+
+    presente = ~np.isnan(valores)
+    valores = np.where(presente, valores, 0.0)
+    soma_b, contagem_b = somas_dos_blocos(valores, presente, b)
+    soma_r, contagem_r = somas_dos_blocos(valores, presente, resto)
+
+    linhas = np.arange(n_grupos)[:, None]
+    soma = np.zeros((n_grupos, reamostragens))
+    contagem = np.zeros((n_grupos, reamostragens))
+    for posicao in range(n_blocos):
+        inicio = rng.integers(0, n, size=(n_grupos, reamostragens))
+        if posicao < n_blocos - 1:
+            soma += soma_b[linhas, inicio]
+            contagem += contagem_b[linhas, inicio]
+        else:
+            soma += soma_r[linhas, inicio]
+            contagem += contagem_r[linhas, inicio]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(contagem > 0, soma / contagem, np.nan)
+
+
+# Colunas de `tempos` (AAAA-MM ou AAAA-MM-DD) dentro do período [inicio, fim], meses inclusivos.
+def colunas_do_periodo(tempos, inicio, fim):
+    meses = np.array([t[:7] for t in tempos])
+    return (meses >= inicio) & (meses <= fim)
+
+
+# Percentis e erro padrão das reamostragens de cada linha (NaN para grupos sem dados no período).
+def percentis(amostras, nivel):
+    alfa = (1 - nivel) / 2
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanquantile(amostras, [alfa, 1 - alfa], axis=1)
+
+
+def erro_padrao(amostras):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanstd(amostras, axis=1, ddof=1)
+
+
+# Intervalos para a média de cada grupo × período e para a razão pós/pré.
+# `periodos` é {nome: (inicio, fim)} com "pre" e "pos" entre eles. Cada período é
+# reamostrado separadamente (blocos não atravessam a fronteira entre períodos).
+# Devolve duas tabelas: uma linha por grupo × período e uma linha por grupo (a
+# coluna do grupo se chama `nome_grupo`; sem ele, fica de fora).
+def intervalos_periodos(grupos, tempos, valores, periodos, reamostragens=REAMOSTRAGENS_PADRAO, bloco=None,
+                        nivel=NIVEL_PADRAO, limiar=0.9, semente=42, nome_grupo="UF"):
+    rng = np.random.default_rng(semente)
+    linhas = []
+    reamostradas = {}
+    pontuais = {}
+    for nome, (inicio, fim) in periodos.items():
+        parte = valores[:, colunas_do_periodo(tempos, inicio, fim)]
+        b = bloco or tamanho_bloco(parte.shape[1])
+        amostras = medias_reamostradas(parte, reamostragens, b, rng)
+        presentes = (~np.isnan(parte)).sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pontual = np.where(presentes > 0, np.nansum(parte, axis=1) / presentes, np.nan)
+        inferior, superior = percentis(amostras, nivel)
+        reamostradas[nome], pontuais[nome] = amostras, pontual
+        linhas.append(pd.DataFrame({
+            "Grupo": grupos, "Periodo": nome, "Inicio": inicio, "Fim": fim,
+            "Observacoes": presentes, "Bloco": b, "Media": pontual, "IC_Inferior": inferior, "IC_Superior": superior,
+            "Erro_Padrao": erro_padrao(amostras),
+        }))
+    tabela_periodos = pd.concat(linhas, ignore_index=True)
+
+    # pré e pós reamostrados de forma independente: a razão de cada par é uma reamostragem da razão
+    with np.errstate(divide="ignore", invalid="ignore"):
+        razoes = reamostradas["pos"] / reamostradas["pre"]
+        pontual = pontuais["pos"] / pontuais["pre"]
+    inferior, superior = percentis(razoes, nivel)
+    validas = ~np.isnan(razoes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        probabilidade = np.where(validas.any(axis=1),
+                                 (razoes >= limiar).sum(axis=1) / validas.sum(axis=1), np.nan)
+    # "Incerto": o intervalo contém o limiar, a diferença não se distingue do ruído
+    rotulo = np.select([inferior >= limiar, superior < limiar], ["Sim", "Não"], "Incerto")
+    tabela_razao = pd.DataFrame({
+        "Grupo": grupos, "Razao_Pos_Pre": pontual, "IC_Inferior": inferior, "IC_Superior": superior,
+        "Prob_Recuperacao": probabilidade,
+        "Recuperacao": np.where(np.isnan(pontual), "", np.where(pontual >= limiar, "Sim", "Não")),
+        "Recuperacao_IC": np.where(np.isnan(pontual), "", rotulo),
+    })
+    if nome_grupo is None:
+        return tabela_periodos.drop(columns="Grupo"), tabela_razao.drop(columns="Grupo")
+    return tabela_periodos.rename(columns={"Grupo": nome_grupo}), tabela_razao.rename(columns={"Grupo": nome_grupo})
@@ -0,0 +1,72 @@
+# Cache dos gráficos: só redesenha um PNG quando os dados plotados, o título ou
+# os parâmetros de estilo mudaram.
+#
+# Cada pasta de saída ganha um índice (.indice_graficos.json) com a chave de cada
+# PNG. A chave é um hash de tudo o que foi passado para chave_grafico(): arrays
+# (pelo conteúdo binário), textos, números e dicionários de estilo.
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+NOME_INDICE = ".indice_graficos.json"
+
+# índices já lidos, por pasta (cada processo tem o seu)
+_indices = {}
+
+
+def _atualiza_hash(h, parte):
+    if isinstance(parte, (pd.Series, pd.Index)):
+        parte = parte.to_numpy()
+    if isinstance(parte, np.ndarray):
+        if parte.dtype == object:
+            h.update(b"o" + repr(parte.tolist()).encode())
+        else:
+            h.update(f"a{parte.dtype}{parte.shape}".encode())
+            h.update(np.ascontiguousarray(parte).tobytes())
+    elif isinstance(parte, (list, tuple)):
+        h.update(f"l{len(parte)}".encode())
+        for item in parte:
+            _atualiza_hash(h, item)
+    elif isinstance(parte, dict):
+        h.update(b"d" + json.dumps(parte, sort_keys=True, default=str).encode())
+    else:
+        h.update(b"v" + repr(parte).encode())
+    h.update(b"|")
+
+
+# Chave de um gráfico a partir de tudo o que define a sua aparência.
+def chave_grafico(*partes):
+    h = hashlib.sha256()
+    for parte in partes:
+        _atualiza_hash(h, parte)
+    return h.hexdigest()
+
+
+def _indice(pasta):
+    pasta = Path(pasta)
+    if pasta not in _indices:
+        arquivo = pasta / NOME_INDICE
+        if arquivo.exists():
+            with open(arquivo, encoding="utf-8") as f:
+                _indices[pasta] = json.load(f)
+        else:
+            _indices[pasta] = {}
+    return _indices[pasta]
+
+
+# True se o PNG não existe ou foi gerado com outra chave.
+def grafico_mudou(caminho, chave):
+    caminho = Path(caminho)
+    return not caminho.exists() or _indice(caminho.parent).get(caminho.name) != chave
+
+
+# Anota no índice da pasta a chave do PNG que acabou de ser salvo.
+def registra_grafico(caminho, chave):
+    caminho = Path(caminho)
+    indice = _indice(caminho.parent)
+    indice[caminho.name] = chave
+    with open(caminho.parent / NOME_INDICE, "w", encoding="utf-8") as f:
+        json.dump(indice, f, indent=1, sort_keys=True)
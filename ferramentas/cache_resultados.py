@@ -0,0 +1,70 @@
+# Cache LRU de resultados em memória, invalidado quando os arquivos de onde o
+# resultado saiu mudam.
+#
+# Cada entrada guarda, além do resultado, a assinatura (mtime e tamanho) dos
+# arquivos e pastas de que ele depende. Na consulta, a assinatura é refeita com
+# um stat() por arquivo; se algo mudou, a entrada é descartada e o resultado é
+# recalculado. Quando passa de `maximo` entradas, sai a usada há mais tempo.
+#
+# Uso:
+#   cache = CacheLRU(maximo=256)
+#   resultado = cache.obtem(("uf", "SP"), ["estatisticas_por_UF_mensal.csv"], lambda: calcula("SP"))
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+# Assinatura de arquivos e pastas (todas as entradas de uma pasta contam).
+# Caminhos que não existem entram como None.
+def assinatura(caminhos):
+    partes = []
+    for caminho in caminhos:
+        caminho = Path(caminho)
+        if caminho.is_dir():
+            arquivos = sorted(p for p in caminho.rglob("*") if p.is_file())
+        elif caminho.exists():
+            arquivos = [caminho]
+        else:
+            partes.append((str(caminho), None))
+            continue
+        for arquivo in arquivos:
+            info = arquivo.stat()
+            partes.append((str(arquivo), info.st_mtime_ns, info.st_size))
+    return tuple(partes)
+
+
+class CacheLRU:
+    def __init__(self, maximo=256):
+        self.maximo = maximo
+        self._entradas = OrderedDict()      # chave -> (assinatura, resultado)
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    # Devolve o resultado da `chave`, calculando com `calcula()` se não estiver
+    # no cache ou se algum dos `dependencias` mudou.
+    def obtem(self, chave, dependencias, calcula):
+        atual = assinatura(dependencias)
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] == atual:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return entrada[1]
+            self.falhas += 1
+        resultado = calcula()
+        with self._trava:
+            self._entradas[chave] = (atual, resultado)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+        return resultado
+
+    def limpa(self):
+        with self._trava:
+            self._entradas.clear()
+
+    def resumo(self):
+        with self._trava:
+            return {"entradas": len(self._entradas), "maximo": self.maximo,
+                    "acertos": self.acertos, "falhas": self.falhas}
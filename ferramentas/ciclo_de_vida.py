@@ -0,0 +1,166 @@
+# Ciclo de vida de cada título em cartaz: curva de público por dia desde a
+# primeira exibição.
+#
+# As sessões (em formato compacto, ver ferramentas/dados_compactos.py) são
+# ordenadas uma vez por (título, dia). Daí em diante tudo são reduções por
+# segmento no numpy: np.add.reduceat / np.maximum.reduceat sobre os trechos
+# contíguos de cada título, sem groupby nem laço por título.
+#   1. sessões -> público por título × dia (um segmento por título × dia);
+#   2. título × dia -> métricas por título (um segmento por título).
+#
+# Métricas de cada título:
+#   - Primeira_Exibicao, Ultima_Exibicao, Dias_em_Cartaz (corridos, do primeiro
+#     ao último dia) e Dias_com_Sessao;
+#   - Publico_Total e Sessoes;
+#   - Participacao_Abertura: fração do público nos 7 primeiros dias;
+#   - Dia_do_Pico (dias desde a estreia até o dia de maior público) e Publico_Pico;
+#   - Meia_Vida_Dias: dias, contados a partir do pico, até o público acumulado
+#     depois do pico chegar à metade do público total do pico em diante;
+#   - UFs_na_Semana_do_Pico (UFs com sessões nos 7 dias a partir do pico) e UFs;
+#   - PAIS_OBRA e RAZAO_SOCIAL_DISTRIBUIDORA da primeira sessão;
+#   - Cortado: o título já estava em cartaz nos 7 primeiros dias dos dados ou
+#     ainda estava nos 7 últimos, então a curva pode estar incompleta.
+#
+# Uso:
+#   dados = carrega_compacto(COLUNAS_CICLO)
+#   titulos = ciclo_de_vida(dados)
+#   resumo_por(titulos, "PAIS_OBRA")
+import numpy as np
+import pandas as pd
+
+from ferramentas.dados_compactos import DIA_ZERO
+
+COLUNAS_CICLO = ["DATA_EXIBICAO", "TITULO_BRASIL", "UF_SALA_COMPLEXO", "PUBLICO", "PAIS_OBRA",
+                 "RAZAO_SOCIAL_DISTRIBUIDORA"]
+SEMANA = 7
+METRICAS_RESUMO = ["Dias_em_Cartaz", "Participacao_Abertura", "Dia_do_Pico", "Meia_Vida_Dias",
+                   "UFs_na_Semana_do_Pico"]
+
+
+# Início de cada segmento de um vetor de chaves já ordenado.
+def inicios_dos_segmentos(*chaves):
+    muda = np.zeros(len(chaves[0]), dtype=bool)
+    if len(muda):
+        muda[0] = True
+    for chave in chaves:
+        muda[1:] |= chave[1:] != chave[:-1]
+    return np.flatnonzero(muda)
+
+
+# Número de valores distintos de `valores` (códigos pequenos, como a UF) em cada
+# segmento `segmento` (0..n_segmentos-1), só nas linhas de `mascara`: uma
+# contagem por segmento × valor, sem ordenar.
+def distintos_por_segmento(segmento, valores, mascara, n_segmentos):
+    base = int(valores.max(initial=0)) + 1
+    contagem = np.bincount(segmento[mascara] * base + valores[mascara], minlength=n_segmentos * base)
+    return np.count_nonzero(contagem.reshape(n_segmentos, base), axis=1)
+
+
+def ciclo_de_vida(dados):
+    dia = dados.DATA_EXIBICAO.astype(np.int64)
+    titulo = dados.TITULO_BRASIL.astype(np.int64)
+    uf = dados.UF_SALA_COMPLEXO.astype(np.int64)
+    publico = dados.PUBLICO.astype(np.int64)
+
+    # uma chave só (título, dia) ordena bem mais rápido que o np.lexsort das duas colunas
+    ordem = np.argsort(titulo << 16 | dia)
+    dia, titulo, uf, publico = dia[ordem], titulo[ordem], uf[ordem], publico[ordem]
+    n_sessoes = len(ordem)
+
+    # 1. sessões -> título × dia
+    inicio_td = inicios_dos_segmentos(titulo, dia)
+    dia_td = dia[inicio_td]
+    titulo_td = titulo[inicio_td]
+    publico_td = np.add.reduceat(publico, inicio_td) if n_sessoes else np.empty(0, dtype=np.int64)
+    sessoes_td = np.diff(np.append(inicio_td, n_sessoes))
+
+    # 2. título × dia -> título
+    inicio_t = inicios_dos_segmentos(titulo_td)
+    n_titulos = len(inicio_t)
+    n_dias = len(dia_td)
+    segmento_td = np.repeat(np.arange(n_titulos), np.diff(np.append(inicio_t, n_dias)))
+    if n_titulos == 0:
+        return pd.DataFrame(columns=["TITULO_BRASIL", "PAIS_OBRA", "RAZAO_SOCIAL_DISTRIBUIDORA",
+                                     "Primeira_Exibicao", "Ultima_Exibicao", "Dias_em_Cartaz", "Dias_com_Sessao",
+                                     "Sessoes", "Publico_Total", "Participacao_Abertura", "Dia_do_Pico",
+                                     "Publico_Pico", "Meia_Vida_Dias", "UFs_na_Semana_do_Pico", "UFs", "Cortado"])
+
+    primeiro = dia_td[inicio_t]
+    ultimo = dia_td[np.append(inicio_t[1:], n_dias) - 1]
+    total = np.add.reduceat(publico_td, inicio_t)
+    dias_desde = dia_td - primeiro[segmento_td]
+
+    abertura = np.add.reduceat(np.where(dias_desde < SEMANA, publico_td, 0), inicio_t)
+
+    # pico: o primeiro dia com o maior público de cada título
+    pico = np.maximum.reduceat(publico_td, inicio_t)
+    no_pico = publico_td == pico[segmento_td]
+    posicao_pico = np.minimum.reduceat(np.where(no_pico, np.arange(n_dias), n_dias), inicio_t)
+    dia_pico = dia_td[posicao_pico]
+
+    # meia-vida: público acumulado a partir do pico (soma acumulada global menos o
+    # acumulado até a véspera do pico do mesmo título)
+    depois_pico = np.arange(n_dias) >= posicao_pico[segmento_td]
+    publico_depois = np.where(depois_pico, publico_td, 0)
+    acumulado = np.cumsum(publico_depois)
+    acumulado -= np.append(0, acumulado)[inicio_t][segmento_td]
+    total_depois = np.add.reduceat(publico_depois, inicio_t)
+    chegou = depois_pico & (2 * acumulado >= total_depois[segmento_td])
+    posicao_meia = np.minimum.reduceat(np.where(chegou, np.arange(n_dias), n_dias), inicio_t)
+    meia_vida = dia_td[posicao_meia] - dia_pico
+
+    # UFs: na semana a partir do pico e no total (de volta ao nível das sessões)
+    segmento_sessao = np.repeat(segmento_td, sessoes_td)
+    semana_pico = (dia >= dia_pico[segmento_sessao]) & (dia < dia_pico[segmento_sessao] + SEMANA)
+    ufs_pico = distintos_por_segmento(segmento_sessao, uf, semana_pico, n_titulos)
+    ufs = distintos_por_segmento(segmento_sessao, uf, np.ones(n_sessoes, dtype=bool), n_titulos)
+
+    # país e distribuidora da primeira sessão de cada título
+    primeira_sessao = ordem[inicio_td[inicio_t]]
+    dados_min, dados_max = int(dados.DATA_EXIBICAO.min()), int(dados.DATA_EXIBICAO.max())
+
+    def datas(dias):
+        return DIA_ZERO + dias.astype("timedelta64[D]")
+
+    def texto(coluna, linhas):
+        return dados.dicionarios[coluna][dados.arrays[coluna][linhas].astype(np.int64)]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        participacao = np.where(total > 0, abertura / total, np.nan)
+    return pd.DataFrame({
+        "TITULO_BRASIL": dados.dicionarios["TITULO_BRASIL"][titulo_td[inicio_t]],
+        "PAIS_OBRA": texto("PAIS_OBRA", primeira_sessao),
+        "RAZAO_SOCIAL_DISTRIBUIDORA": texto("RAZAO_SOCIAL_DISTRIBUIDORA", primeira_sessao),
+        "Primeira_Exibicao": datas(primeiro),
+        "Ultima_Exibicao": datas(ultimo),
+        "Dias_em_Cartaz": ultimo - primeiro + 1,
+        "Dias_com_Sessao": np.diff(np.append(inicio_t, n_dias)),
+        "Sessoes": np.add.reduceat(sessoes_td, inicio_t),
+        "Publico_Total": total,
+        "Participacao_Abertura": participacao,
+        "Dia_do_Pico": dia_pico - primeiro,
+        "Publico_Pico": pico,
+        "Meia_Vida_Dias": meia_vida,
+        "UFs_na_Semana_do_Pico": ufs_pico,
+        "UFs": ufs,
+        "Cortado": (primeiro < dados_min + SEMANA) | (ultimo > dados_max - SEMANA),
+    })
+
+
+# Distribuição das métricas dos títulos por `grupo` (PAIS_OBRA ou distribuidora):
+# número de títulos, público e quartis de cada métrica. Títulos cortados e com
+# menos de `minimo_publico` espectadores ficam de fora.
+def resumo_por(titulos, grupo, minimo_publico=0, incluir_cortados=False):
+    selecao = titulos["Publico_Total"] >= minimo_publico
+    if not incluir_cortados:
+        selecao &= ~titulos["Cortado"]
+    titulos = titulos[selecao]
+    agrupado = titulos.groupby(grupo, sort=True)
+    resumo = pd.DataFrame({
+        "Titulos": agrupado.size(),
+        "Publico_Total": agrupado["Publico_Total"].sum(),
+    })
+    quartis = agrupado[METRICAS_RESUMO].quantile([0.25, 0.5, 0.75]).unstack()
+    quartis.columns = [f"{metrica}_{rotulo}" for metrica, q in quartis.columns
+                       for rotulo in [{0.25: "Q1", 0.5: "Mediana", 0.75: "Q3"}[q]]]
+    return resumo.join(quartis).reset_index().sort_values("Publico_Total", ascending=False, ignore_index=True)
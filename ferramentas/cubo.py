@@ -0,0 +1,129 @@
+# Cubo de medidas aditivas do público por UF × município × distribuidora ×
+# país da obra × mês.
+#
+# Cada célula guarda N (sessões), Soma, Soma_Quadrados, Min e Max do PUBLICO.
+# Como essas medidas se somam (ou, no caso de Min/Max, se combinam por min/max),
+# qualquer agregação mais grossa sai do cubo sem reler as sessões: por mês, por
+# UF, por distribuidora, por filmes brasileiros × estrangeiros etc. Média, total,
+# máximo, mínimo e desvio padrão são exatos. Mediana, moda e quartis não são
+# aditivos: agregando por UF e/ou mês eles vêm dos resumos combináveis
+# (ferramentas/resumos.py), quando informados.
+import numpy as np
+import pandas as pd
+
+from ferramentas.leitura_dados import le_mes
+from ferramentas.motor_estatisticas import COLUNAS_ESTATISTICAS, estatisticas_por_grupo
+from ferramentas.resumos import estatisticas_de_resumos
+
+# dimensão do cubo -> coluna dos dados filtrados
+DIMENSOES = {
+    "UF": "UF_SALA_COMPLEXO",
+    "Municipio": "MUNICIPIO_SALA_COMPLEXO",
+    "Distribuidora": "RAZAO_SOCIAL_DISTRIBUIDORA",
+    "Pais_Obra": "PAIS_OBRA",
+}
+MEDIDAS = ["N", "Soma", "Soma_Quadrados", "Min", "Max"]
+
+# dimensões derivadas, calculadas a partir das colunas do cubo na hora de agregar
+DERIVADAS = {
+    "Origem": lambda cubo: np.where(cubo["Pais_Obra"] == "BRASIL", "BRASILEIRO", "ESTRANGEIRO"),
+    "Ano": lambda cubo: cubo["Mes"].str[:4],
+}
+
+
+# Células do cubo de um mês (linhas com Mes, as dimensões e as medidas).
+def cubo_do_mes(mes):
+    dados = le_mes(mes, colunas=list(DIMENSOES.values()) + ["PUBLICO"])
+    dados = dados.rename(columns={v: k for k, v in DIMENSOES.items()})
+    dados["PUBLICO"] = pd.to_numeric(dados["PUBLICO"], errors="coerce")
+    dados = dados.dropna(subset=list(DIMENSOES) + ["PUBLICO"])
+    dados["Quadrado"] = dados["PUBLICO"] ** 2
+
+    grupos = dados.groupby(list(DIMENSOES), sort=True, observed=True)
+    cubo = grupos["PUBLICO"].agg(N="size", Soma="sum", Min="min", Max="max")
+    cubo["Soma_Quadrados"] = grupos["Quadrado"].sum()
+    cubo = cubo.reset_index()
+    cubo.insert(0, "Mes", mes)
+    return cubo[["Mes", *DIMENSOES, *MEDIDAS]]
+
+
+# Agrega o cubo pelas colunas de `por` (dimensões, "Mes" ou derivadas como
+# "Origem" e "Ano"). `por=[]` dá o total geral.
+def agrega(cubo, por):
+    por = [por] if isinstance(por, str) else list(por)
+    cubo = cubo.assign(**{c: DERIVADAS[c](cubo) for c in por if c in DERIVADAS})
+    if not por:
+        cubo = cubo.assign(_todos=0)
+        por_grupo = ["_todos"]
+    else:
+        por_grupo = por
+    agregado = cubo.groupby(por_grupo, sort=True, observed=True).agg(
+        N=("N", "sum"), Soma=("Soma", "sum"), Soma_Quadrados=("Soma_Quadrados", "sum"),
+        Min=("Min", "min"), Max=("Max", "max"),
+    ).reset_index()
+    return agregado.drop(columns="_todos", errors="ignore")
+
+
+# Estatísticas a partir das medidas aditivas, com as mesmas colunas dos arquivos
+# de estatísticas. Mediana, moda e quartis ficam vazios (não são aditivos).
+def estatisticas_aditivas(agregado, casas_media=2):
+    n = agregado["N"].to_numpy(dtype=float)
+    soma = agregado["Soma"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        media = soma / n
+        variancia = (agregado["Soma_Quadrados"].to_numpy(dtype=float) - soma * media) / (n - 1)
+        desvio = np.sqrt(np.maximum(variancia, 0))
+    desvio[n < 2] = np.nan
+
+    chaves = [c for c in agregado.columns if c not in MEDIDAS]
+    estatisticas = agregado[chaves].copy()
+    estatisticas["Media_Publico"] = np.round(media, casas_media)
+    for coluna in ["Mediana_Publico", "Moda_Publico"]:
+        estatisticas[coluna] = np.nan
+    estatisticas["Max_Publico"] = agregado["Max"].to_numpy()
+    estatisticas["Min_Publico"] = agregado["Min"].to_numpy()
+    estatisticas["Total_Publico"] = agregado["Soma"].to_numpy()
+    estatisticas["Desvio_Padrao"] = desvio
+    for coluna in ["Q1", "Q3", "IQR"]:
+        estatisticas[coluna] = np.nan
+    return estatisticas
+
+
+# Estatísticas agregadas por `por`. Se `resumos` (resumos_por_UF_mensal.csv) for
+# informado e `por` for UF, Mes ou UF + Mes, mediana, moda e quartis vêm deles.
+def deriva(cubo, por, resumos=None):
+    por = [por] if isinstance(por, str) else list(por)
+    estatisticas = estatisticas_aditivas(agrega(cubo, por))
+    if resumos is not None and set(por) <= {"UF", "Mes"}:
+        quantis = estatisticas_de_resumos(resumos, por)
+        colunas = ["Mediana_Publico", "Moda_Publico", "Q1", "Q3", "IQR"]
+        if por:
+            quantis = estatisticas[por].merge(quantis[por + colunas], on=por, how="left")
+        estatisticas[colunas] = quantis[colunas].to_numpy()
+    return estatisticas
+
+
+# Os três arquivos que hoje saem de scripts separados, derivados do cubo:
+#   estatisticas_publico_mensal.csv     (Mes)
+#   estatisticas_por_UF_mensal.csv      (UF, Mes)
+#   estatisticas_gerais_por_UF.csv      (UF, "GERAL": estatísticas das médias mensais)
+def deriva_nacional_mensal(cubo, resumos=None):
+    return deriva(cubo, ["Mes"], resumos)
+
+
+def deriva_uf_mensal(cubo, resumos=None):
+    return deriva(cubo, ["UF", "Mes"], resumos)
+
+
+def deriva_geral_por_uf(cubo):
+    mensal = agrega(cubo, ["UF", "Mes"])
+    media_mensal = np.round(mensal["Soma"] / mensal["N"], 2)
+    geral = estatisticas_por_grupo(mensal["UF"], media_mensal, nome_grupo="UF")
+    geral.insert(1, "Mes", "GERAL")
+
+    por_uf = agrega(cubo, ["UF"]).set_index("UF")
+    geral["Max_Publico"] = geral["UF"].map(por_uf["Max"])
+    geral["Min_Publico"] = geral["UF"].map(por_uf["Min"])
+    geral["Total_Publico"] = geral["UF"].map(por_uf["Soma"])
+    return geral.sort_values("Total_Publico", ascending=False).reset_index(drop=True)[
+        ["UF", "Mes", *COLUNAS_ESTATISTICAS]]
@@ -0,0 +1,139 @@
+# Carregamento compacto dos dados filtrados em memória.
+#
+# Em vez de um DataFrame com uma string por linha em cada coluna de texto, cada
+# coluna de texto vira um vetor de códigos inteiros mais um dicionário global
+# (a lista dos valores distintos de todos os meses carregados):
+#   - UF_SALA_COMPLEXO: uint8;
+#   - TITULO_BRASIL, RAZAO_SOCIAL_DISTRIBUIDORA, MUNICIPIO_SALA_COMPLEXO e
+#     PAIS_OBRA: uint16, ou uint32 se o dicionário passar de 65.535 valores;
+#   - PUBLICO: uint32 (linhas sem público ou com público negativo são descartadas);
+#   - DATA_EXIBICAO: uint16 com o número do dia contado a partir de 2000-01-01.
+# Os meses são lidos um de cada vez (só as colunas pedidas) e codificados na
+# hora, então a memória nunca guarda mais de um mês em strings.
+#
+# Uso:
+#   dados = carrega_compacto(["UF_SALA_COMPLEXO", "PUBLICO"], meses=["2020-09", "2020-10"])
+#   sp = dados.mascara("UF_SALA_COMPLEXO", ["SP"])
+#   dados.PUBLICO[sp].sum()
+#   dados.valores("UF_SALA_COMPLEXO")              (os códigos decodificados, como pd.Categorical)
+#   dados.para_pandas()                            (DataFrame com colunas categóricas)
+#   dados.memoria()                                (bytes ocupados)
+import numpy as np
+import pandas as pd
+
+from ferramentas.leitura_dados import le_mes, meses_disponiveis
+
+COLUNAS_TEXTO = ["UF_SALA_COMPLEXO", "TITULO_BRASIL", "RAZAO_SOCIAL_DISTRIBUIDORA",
+                 "MUNICIPIO_SALA_COMPLEXO", "PAIS_OBRA"]
+COLUNAS = ["DATA_EXIBICAO", *COLUNAS_TEXTO, "PUBLICO"]
+DIA_ZERO = np.datetime64("2000-01-01", "D")
+
+
+def tipo_codigo(coluna, tamanho_dicionario):
+    if coluna == "UF_SALA_COMPLEXO" and tamanho_dicionario <= 256:
+        return np.uint8
+    return np.uint16 if tamanho_dicionario <= 65536 else np.uint32
+
+
+# Número do dia (desde 2000-01-01) das datas de um mês, em texto DD/MM/AAAA (CSV)
+# ou já como data (Parquet). Datas inválidas ficam como -1.
+def numero_do_dia(datas):
+    if pd.api.types.is_object_dtype(datas) or pd.api.types.is_string_dtype(datas):
+        datas = pd.to_datetime(datas, format="%d/%m/%Y", errors="coerce")
+    else:
+        datas = pd.to_datetime(datas, errors="coerce")
+    dias = (datas.to_numpy(dtype="datetime64[D]") - DIA_ZERO).astype(np.int64)
+    return np.where(datas.isna().to_numpy(), -1, dias)
+
+
+class DadosCompactos:
+    def __init__(self, colunas, dicionarios):
+        self.colunas = list(colunas)
+        self.dicionarios = dicionarios          # coluna de texto -> np.array de valores
+        self.arrays = {}                        # coluna -> vetor numpy
+
+    def __len__(self):
+        return len(next(iter(self.arrays.values()))) if self.arrays else 0
+
+    def __getattr__(self, nome):
+        arrays = self.__dict__.get("arrays", {})
+        if nome in arrays:
+            return arrays[nome]
+        raise AttributeError(nome)
+
+    # Código de cada valor no dicionário da coluna (valores ausentes ficam de fora).
+    def codigos(self, coluna, valores):
+        posicao = {v: i for i, v in enumerate(self.dicionarios[coluna])}
+        return np.array([posicao[v] for v in valores if v in posicao], dtype=self.arrays[coluna].dtype)
+
+    # Máscara booleana das linhas cuja coluna de texto está entre `valores`.
+    def mascara(self, coluna, valores):
+        return np.isin(self.arrays[coluna], self.codigos(coluna, valores))
+
+    def filtra(self, mascara):
+        filtrado = DadosCompactos(self.colunas, self.dicionarios)
+        filtrado.arrays = {coluna: array[mascara] for coluna, array in self.arrays.items()}
+        return filtrado
+
+    # Valores de uma coluna: texto como pd.Categorical (sem criar uma string por
+    # linha), data como datetime64 e PUBLICO como está.
+    def valores(self, coluna):
+        array = self.arrays[coluna]
+        if coluna in self.dicionarios:
+            return pd.Categorical.from_codes(array.astype(np.int32), categories=self.dicionarios[coluna])
+        if coluna == "DATA_EXIBICAO":
+            return DIA_ZERO + array.astype("timedelta64[D]")
+        return array
+
+    # Mês (AAAA-MM) de cada linha, a partir da data.
+    def meses(self):
+        return (DIA_ZERO + self.arrays["DATA_EXIBICAO"].astype("timedelta64[D]")).astype("datetime64[M]").astype(str)
+
+    def para_pandas(self, colunas=None):
+        return pd.DataFrame({coluna: self.valores(coluna) for coluna in (colunas or self.colunas)})
+
+    def memoria(self):
+        return (sum(array.nbytes for array in self.arrays.values())
+                + sum(d.nbytes + sum(len(v) for v in d) for d in self.dicionarios.values()))
+
+
+# Lê os meses pedidos (None = todos) já codificados. Só as `colunas` pedidas são
+# lidas; `ufs` limita as linhas a essas UFs.
+def carrega_compacto(colunas=None, meses=None, ufs=None):
+    colunas = [c for c in COLUNAS if c in (colunas or COLUNAS)]
+    meses = meses_disponiveis() if meses is None else list(meses)
+    texto = [c for c in colunas if c in COLUNAS_TEXTO]
+
+    posicoes = {coluna: {} for coluna in texto}     # valor -> código global
+    partes = {coluna: [] for coluna in colunas}
+    for mes in meses:
+        dados = le_mes(mes, colunas=colunas, ufs=ufs)
+        validas = np.ones(len(dados), dtype=bool)
+        if "PUBLICO" in colunas:
+            publico = pd.to_numeric(dados["PUBLICO"], errors="coerce").to_numpy(dtype=float)
+            validas &= ~np.isnan(publico) & (publico >= 0)
+        if "DATA_EXIBICAO" in colunas:
+            dias = numero_do_dia(dados["DATA_EXIBICAO"])
+            validas &= dias >= 0
+
+        for coluna in texto:
+            # códigos do mês -> códigos globais: só os valores distintos do mês passam pelo dicionário
+            locais, distintos = pd.factorize(dados[coluna].astype(str).to_numpy()[validas])
+            posicao = posicoes[coluna]
+            globais = np.array([posicao.setdefault(v, len(posicao)) for v in distintos], dtype=np.uint32)
+            partes[coluna].append(globais[locais])
+        if "PUBLICO" in colunas:
+            partes["PUBLICO"].append(publico[validas].astype(np.uint32))
+        if "DATA_EXIBICAO" in colunas:
+            partes["DATA_EXIBICAO"].append(dias[validas].astype(np.uint16))
+
+    dicionarios = {coluna: np.array(list(posicoes[coluna]), dtype=object) for coluna in texto}
+    resultado = DadosCompactos(colunas, dicionarios)
+    for coluna in colunas:
+        if coluna in texto:
+            tipo = tipo_codigo(coluna, len(dicionarios[coluna]))
+        else:
+            tipo = np.uint32 if coluna == "PUBLICO" else np.uint16
+        resultado.arrays[coluna] = np.concatenate([p.astype(tipo) for p in partes[coluna]]) \
+            if partes[coluna] else np.empty(0, dtype=tipo)
+    return resultado
@@ -0,0 +1,168 @@
+# Remoção de sessões duplicadas na filtragem, por hash da chave da linha.
+#
+# A chave de uma sessão é (data, título, município, UF, distribuidora, público).
+# Cada linha vira um hash de 64 bits dessa chave (pd.util.hash_pandas_object,
+# estável entre execuções), e os conjuntos de hashes ficam em disco, um vetor
+# ordenado por mês em <destino>/.hashes/AAAA-MM.npy, lidos por memória mapeada.
+# Assim a memória gasta é de 8 bytes por sessão do mês em processamento, e as
+# buscas nos outros meses são searchsorted nos vetores ordenados. Ao lado de
+# cada vetor fica o intervalo de datas das sessões do mês (AAAA-MM.datas.json):
+# como a data faz parte da chave, um mês só é comparado com os meses cujo
+# intervalo cruza o dele (normalmente nenhum, ou os poucos republicados), e não
+# com todos os anteriores.
+#
+# Há dois níveis:
+#   - entre arquivos: quando a ANCINE republica um mês corrigido ou um arquivo
+#     com dias de outro mês, as sessões que já estão num mês anterior (na ordem
+#     dos nomes) saem do mês seguinte. Isso é feito depois que todos os meses
+#     foram filtrados (reconcilia), então funciona também com vários processos;
+#   - dentro do arquivo (opcional): linhas repetidas com a mesma chave no mesmo
+#     arquivo. Nos dados atuais, ~10% das sessões de um mês têm a mesma chave de
+#     outra sem serem repetições (salas diferentes no mesmo município), por isso
+#     esse nível não é o padrão.
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CHAVE = ["DATA_EXIBICAO", "TITULO_BRASIL", "MUNICIPIO_SALA_COMPLEXO", "UF_SALA_COMPLEXO",
+         "RAZAO_SOCIAL_DISTRIBUIDORA", "PUBLICO"]
+
+
+def pasta_hashes(destino):
+    return Path(destino) / ".hashes"
+
+
+# Dia (desde 1970-01-01) de cada linha. A data pode vir como texto DD/MM/AAAA
+# (CSV) ou como data (Parquet); datas inválidas viram DIA_INVALIDO.
+DIA_INVALIDO = np.iinfo(np.int64).min
+
+
+def dias_das_linhas(dados):
+    datas = dados["DATA_EXIBICAO"]
+    if pd.api.types.is_object_dtype(datas) or pd.api.types.is_string_dtype(datas):
+        datas = pd.to_datetime(datas, format="%d/%m/%Y", errors="coerce")
+    else:
+        datas = pd.to_datetime(datas, errors="coerce")
+    return datas.to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+
+# Hash de 64 bits da chave de cada linha. A data e o público (inteiro ou real)
+# são normalizados antes, para que a mesma sessão tenha o mesmo hash no CSV e no Parquet.
+def hashes_das_linhas(dados, dias=None):
+    chave = pd.DataFrame({
+        "DATA_EXIBICAO": dias_das_linhas(dados) if dias is None else dias,
+        **{c: dados[c].astype(str).to_numpy(dtype=object) for c in CHAVE[1:-1]},
+        "PUBLICO": pd.to_numeric(dados["PUBLICO"], errors="coerce").to_numpy(dtype=np.float64),
+    })
+    return pd.util.hash_pandas_object(chave, index=False).to_numpy(dtype=np.uint64)
+
+
+# Máscara dos `hashes` presentes no vetor `ordenado`.
+def contem(ordenado, hashes):
+    if len(ordenado) == 0:
+        return np.zeros(len(hashes), dtype=bool)
+    posicao = np.searchsorted(ordenado, hashes)
+    posicao[posicao == len(ordenado)] = 0
+    return ordenado[posicao] == hashes
+
+
+# Hashes das sessões mantidas de um arquivo, bloco a bloco. Com
+# `descarta_repetidos`, as linhas cuja chave já apareceu no arquivo saem.
+class HashesDoArquivo:
+    def __init__(self, descarta_repetidos=False):
+        self.descarta_repetidos = descarta_repetidos
+        self.vistos = np.empty(0, dtype=np.uint64)      # ordenado, sem repetição
+        self.repetidas = 0
+        self.primeiro_dia = self.ultimo_dia = None
+        self.datas_invalidas = False
+
+    # Devolve o bloco sem as linhas repetidas (se for o caso) e guarda os hashes
+    # e o intervalo de datas.
+    def filtra(self, bloco):
+        if len(bloco) == 0:
+            return bloco
+        dias = dias_das_linhas(bloco)
+        hashes = hashes_das_linhas(bloco, dias)
+        if self.descarta_repetidos:
+            _, primeiras = np.unique(hashes, return_index=True)
+            manter = np.zeros(len(hashes), dtype=bool)
+            manter[primeiras] = True
+            manter &= ~contem(self.vistos, hashes)
+            self.repetidas += int((~manter).sum())
+            bloco, hashes, dias = bloco[manter], hashes[manter], dias[manter]
+        self.vistos = np.union1d(self.vistos, hashes)
+        validos = dias[dias != DIA_INVALIDO]
+        self.datas_invalidas |= len(validos) < len(dias)
+        if len(validos):
+            primeiro, ultimo = int(validos.min()), int(validos.max())
+            if self.primeiro_dia is not None:
+                primeiro, ultimo = min(primeiro, self.primeiro_dia), max(ultimo, self.ultimo_dia)
+            self.primeiro_dia, self.ultimo_dia = primeiro, ultimo
+        return bloco
+
+    def grava(self, destino, mes):
+        pasta = pasta_hashes(destino)
+        pasta.mkdir(parents=True, exist_ok=True)
+        grava_hashes(destino, mes, self.vistos)
+        # sem datas válidas em todas as linhas o intervalo fica desconhecido (compara com todos os meses)
+        intervalo = None if self.datas_invalidas else [self.primeiro_dia, self.ultimo_dia]
+        temporario = pasta / f"{mes}.datas.tmp.json"
+        temporario.write_text(json.dumps({"dias": intervalo}))
+        temporario.replace(pasta / f"{mes}.datas.json")
+
+
+def grava_hashes(destino, mes, hashes):
+    temporario = pasta_hashes(destino) / f"{mes}.tmp.npy"
+    np.save(temporario, hashes)
+    temporario.replace(pasta_hashes(destino) / f"{mes}.npy")
+
+
+def carrega_hashes(destino, mes):
+    return np.load(pasta_hashes(destino) / f"{mes}.npy", mmap_mode="r")
+
+
+# Intervalo [primeiro dia, último dia] das sessões de um mês. None quando não é
+# conhecido (hashes gravados por uma versão anterior, ou datas inválidas): o mês
+# é comparado com todos. (None, None) para um mês sem sessões.
+def carrega_intervalo(destino, mes):
+    arquivo = pasta_hashes(destino) / f"{mes}.datas.json"
+    if not arquivo.exists():
+        return None
+    dias = json.loads(arquivo.read_text())["dias"]
+    return None if dias is None else tuple(dias)
+
+
+def cruzam(a, b):
+    if a is None or b is None:
+        return True
+    if a[0] is None or b[0] is None:
+        return False
+    return a[0] <= b[1] and b[0] <= a[1]
+
+
+# Tira de cada mês de `meses` as sessões que já estão num mês anterior do
+# conjunto em disco. Como a data faz parte da chave, só os meses anteriores cujo
+# intervalo de datas cruza o do mês são consultados. `reescreve(mes,
+# hashes_repetidos)` regrava a saída do mês sem essas sessões e devolve quantas
+# linhas saíram. Devolve {mes: linhas removidas}.
+def reconcilia(destino, meses, reescreve):
+    disponiveis = sorted(p.name[:-len(".npy")] for p in pasta_hashes(destino).glob("*.npy")
+                         if not p.name.endswith(".tmp.npy"))
+    intervalos = {mes: carrega_intervalo(destino, mes) for mes in disponiveis}
+    removidas = {}
+    for mes in sorted(meses):
+        candidatos = [anterior for anterior in disponiveis
+                      if anterior < mes and cruzam(intervalos[anterior], intervalos[mes])]
+        removidas[mes] = 0
+        if not candidatos:
+            continue
+        hashes = np.array(carrega_hashes(destino, mes))
+        repetidos = np.zeros(len(hashes), dtype=bool)
+        for anterior in candidatos:
+            repetidos |= contem(carrega_hashes(destino, anterior), hashes)
+        if repetidos.any():
+            removidas[mes] = reescreve(mes, hashes[repetidos])
+            grava_hashes(destino, mes, hashes[~repetidos])
+    return removidas
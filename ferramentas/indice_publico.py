@@ -0,0 +1,216 @@
+# Índice em disco do PUBLICO ordenado dentro de cada célula mês × UF.
+#
+# Para cada mês, indice_publico/AAAA-MM.npy guarda os valores de PUBLICO de
+# todas as sessões, ordenados por UF e, dentro da UF, por valor. A tabela
+# indice_publico/segmentos.csv diz onde começa e termina (Inicio, Fim, com Fim
+# exclusivo) o trecho de cada UF em cada mês. Os arquivos são abertos com
+# np.load(mmap_mode="r"): nada é lido nem ordenado de novo, e só as páginas
+# tocadas pelas buscas chegam à memória.
+#
+# Com os trechos ordenados:
+#   - quantis de uma célula são acesso direto por posição (interpolação linear,
+#     como no pandas e em ferramentas/motor_estatisticas.py);
+#   - quantis de uma união de células (ex.: SP em 2020, ou o Brasil num mês)
+#     saem de uma busca binária no valor, contando com searchsorted em cada
+#     trecho quantos valores ficam abaixo, sem juntar nem ordenar os trechos;
+#   - postos e histogramas também são só searchsorted;
+#   - a média aparada soma apenas o miolo de cada trecho.
+#
+# O índice é atualizado por mês, como as estatísticas (ver ferramentas/manifesto.py).
+#
+# Uso:
+#   indice = IndicePublico()
+#   indice.quantil(0.5, meses=["2020-10"], ufs=["SP"])
+#   indice.quantil([0.25, 0.5, 0.75], meses=["2020-09", "2020-10"])   (união das células)
+#   indice.posto(100, ufs=["RJ"])                 (fração das sessões com público <= 100)
+#   indice.media_aparada(0.1, meses=["2020-10"])
+#   indice.histograma([0, 10, 50, 100, 1000], ufs=["SP", "RJ"])
+#   indice.quantis_por_celula([0.25, 0.5, 0.75])  (tabela Mes × UF, como nas estatísticas mensais)
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ferramentas.instrumentacao import conta_linhas
+from ferramentas.leitura_dados import le_mes
+from ferramentas.manifesto import atualiza_incremental
+from ferramentas.motor_estatisticas import quantil_ordenado
+from ferramentas.tabelas import le_tabela
+
+PASTA_INDICE = Path("indice_publico")
+
+
+# Ordena as sessões de um mês por UF e valor, grava o .npy e devolve as linhas
+# do mês na tabela de segmentos.
+def indexa_mes(mes, pasta=PASTA_INDICE):
+    dados = le_mes(mes, colunas=["UF_SALA_COMPLEXO", "PUBLICO"])
+    conta_linhas(len(dados))
+    publico = pd.to_numeric(dados["PUBLICO"], errors="coerce")
+    validos = publico.notna() & dados["UF_SALA_COMPLEXO"].notna()
+    ufs = dados["UF_SALA_COMPLEXO"][validos].astype(str).to_numpy()
+    valores = publico[validos].to_numpy()
+
+    # uint32 cobre o público de qualquer sessão; int64 só se aparecer algo fora disso
+    inteiros = len(valores) == 0 or (np.all(valores == np.round(valores))
+                                     and valores.min() >= 0 and valores.max() < 2**32)
+    valores = valores.astype(np.uint32 if inteiros else np.float64)
+
+    chaves, id_uf = np.unique(ufs, return_inverse=True)
+    ordem = np.lexsort((valores, id_uf))
+    tamanho = np.bincount(id_uf, minlength=len(chaves))
+    inicio = (np.cumsum(tamanho) - tamanho).astype(np.int64)
+
+    pasta.mkdir(parents=True, exist_ok=True)
+    temporario = pasta / f"{mes}.tmp.npy"
+    np.save(temporario, valores[ordem])
+    temporario.replace(pasta / f"{mes}.npy")
+    return pd.DataFrame({"Mes": mes, "UF": chaves, "Inicio": inicio, "Fim": inicio + tamanho})
+
+
+# Cria ou atualiza o índice (só os meses novos ou alterados são reordenados).
+def atualiza_indice(pasta=PASTA_INDICE):
+    pasta.mkdir(parents=True, exist_ok=True)
+    segmentos = atualiza_incremental(pasta / "segmentos.csv", lambda mes: indexa_mes(mes, pasta))
+    # meses que saíram da entrada também saem do índice
+    for arquivo in pasta.glob("*.npy"):
+        if arquivo.stem not in set(segmentos["Mes"]):
+            arquivo.unlink()
+    return segmentos
+
+
+class IndicePublico:
+    def __init__(self, pasta=PASTA_INDICE):
+        self.pasta = Path(pasta)
+        self.segmentos = le_tabela(self.pasta / "segmentos.csv", dtype={"Mes": str, "UF": str})
+        self._arquivos = {}
+
+    def _valores_do_mes(self, mes):
+        if mes not in self._arquivos:
+            self._arquivos[mes] = np.load(self.pasta / f"{mes}.npy", mmap_mode="r")
+        return self._arquivos[mes]
+
+    # Trechos ordenados (views do mmap, sem cópia) das células pedidas.
+    # meses/ufs: listas (None = todos).
+    def trechos(self, meses=None, ufs=None):
+        segmentos = self.segmentos
+        if meses is not None:
+            segmentos = segmentos[segmentos["Mes"].isin(list(meses))]
+        if ufs is not None:
+            segmentos = segmentos[segmentos["UF"].isin(list(ufs))]
+        return [self._valores_do_mes(mes)[inicio:fim]
+                for mes, inicio, fim in zip(segmentos["Mes"], segmentos["Inicio"], segmentos["Fim"])
+                if fim > inicio]
+
+    def n(self, meses=None, ufs=None):
+        return sum(len(t) for t in self.trechos(meses, ufs))
+
+    # Quantos valores das células são <= v (ou < v, com lado="left").
+    @staticmethod
+    def _conta(trechos, valor, lado="right"):
+        return sum(int(np.searchsorted(t, valor, side=lado)) for t in trechos)
+
+    # k-ésimo menor valor (k a partir de 0) da união dos trechos.
+    def _k_esimo(self, trechos, k):
+        n = sum(len(t) for t in trechos)
+        if not 0 <= k < n:
+            raise ValueError(f"k deve estar em [0, {n}), recebido {k}")
+        if len(trechos) == 1:
+            return trechos[0][k]
+        # candidatos: em cada trecho, no máximo k+1 valores podem ficar abaixo
+        baixo = min(t[0] for t in trechos)
+        alto = max(t[min(k, len(t) - 1)] for t in trechos)
+        if np.issubdtype(np.result_type(*trechos), np.integer):
+            baixo, alto = int(baixo), int(alto)
+            while baixo < alto:
+                meio = (baixo + alto) // 2
+                if self._conta(trechos, meio) >= k + 1:
+                    alto = meio
+                else:
+                    baixo = meio + 1
+            return baixo
+        # valores não inteiros: busca entre os valores existentes de cada trecho
+        candidatos = np.unique(np.concatenate([t[:k + 1] for t in trechos]))
+        contagens = np.array([self._conta(trechos, c) for c in candidatos])
+        return candidatos[np.searchsorted(contagens, k + 1)]
+
+    # Quantil(es) com interpolação linear da união das células pedidas.
+    def quantil(self, q, meses=None, ufs=None):
+        trechos = self.trechos(meses, ufs)
+        n = sum(len(t) for t in trechos)
+        escalar = np.isscalar(q)
+        q = np.atleast_1d(q)
+        if not np.all((q >= 0) & (q <= 1)):
+            raise ValueError(f"q deve estar em [0, 1], recebido {q.tolist()}")
+        resultado = []
+        for qi in q:
+            if n == 0:
+                resultado.append(np.nan)
+                continue
+            pos = qi * (n - 1)
+            baixo, alto = int(np.floor(pos)), int(np.ceil(pos))
+            v_baixo = float(self._k_esimo(trechos, baixo))
+            v_alto = v_baixo if alto == baixo else float(self._k_esimo(trechos, alto))
+            resultado.append(v_baixo + (v_alto - v_baixo) * (pos - baixo))
+        return resultado[0] if escalar else np.array(resultado)
+
+    # Fração das sessões com público <= valor (posto percentual).
+    def posto(self, valor, meses=None, ufs=None):
+        trechos = self.trechos(meses, ufs)
+        n = sum(len(t) for t in trechos)
+        return self._conta(trechos, valor) / n if n else np.nan
+
+    # Média sem a fração `proporcao` de valores em cada ponta.
+    def media_aparada(self, proporcao, meses=None, ufs=None):
+        trechos = self.trechos(meses, ufs)
+        n = sum(len(t) for t in trechos)
+        corte = int(np.floor(proporcao * n))
+        if n - 2 * corte <= 0:
+            return np.nan
+        if corte == 0:
+            return sum(float(t.sum(dtype=np.float64)) for t in trechos) / n
+        # valores de corte de cada ponta; os empatados com eles entram só em parte
+        menor = self._k_esimo(trechos, corte)
+        maior = self._k_esimo(trechos, n - corte - 1)
+        soma = 0.0
+        abaixo = acima = 0
+        for t in trechos:
+            i = np.searchsorted(t, menor, side="right")
+            j = np.searchsorted(t, maior, side="left")
+            if j > i:
+                soma += float(t[i:j].sum(dtype=np.float64))
+            abaixo += i
+            acima += len(t) - j
+        # quantos valores iguais a `menor` e a `maior` ficam dentro do miolo
+        if menor == maior:
+            return float(menor)
+        soma += float(menor) * (abaixo - corte) + float(maior) * (acima - corte)
+        return soma / (n - 2 * corte)
+
+    # Contagem das sessões em cada intervalo [limites[i], limites[i+1]); o último
+    # intervalo inclui o limite superior, como no np.histogram.
+    def histograma(self, limites, meses=None, ufs=None):
+        limites = np.asarray(limites)
+        contagens = np.zeros(len(limites) - 1, dtype=np.int64)
+        for t in self.trechos(meses, ufs):
+            posicoes = np.searchsorted(t, limites, side="left")
+            posicoes[-1] = np.searchsorted(t, limites[-1], side="right")
+            contagens += np.diff(posicoes)
+        return contagens
+
+    # Quantis de cada célula mês × UF, de todas de uma vez (um acesso por
+    # posição em cada trecho).
+    def quantis_por_celula(self, qs=(0.25, 0.5, 0.75), meses=None):
+        partes = []
+        for mes, segmentos in self.segmentos.groupby("Mes", sort=True):
+            if meses is not None and mes not in meses:
+                continue
+            segmentos = segmentos[segmentos["Fim"] > segmentos["Inicio"]]
+            valores = self._valores_do_mes(mes)
+            inicio = segmentos["Inicio"].to_numpy()
+            tamanho = segmentos["Fim"].to_numpy() - inicio
+            parte = pd.DataFrame({"UF": segmentos["UF"].to_numpy(), "Mes": mes, "N": tamanho,
+                                  "Min": valores[inicio], "Max": valores[inicio + tamanho - 1]})
+            for q in qs:
+                parte[f"Q{q:g}"] = quantil_ordenado(valores, inicio, tamanho, q)
+            partes.append(parte)
+        return pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
@@ -0,0 +1,294 @@
+# Medição das etapas dos scripts: tempo de relógio e de CPU, linhas
+# processadas, linhas por segundo, memória (RSS) da etapa e tamanho dos
+# arquivos lidos/gravados.
+#
+# Cada etapa medida vira uma linha JSON em instrumentacao.jsonl (na pasta onde o
+# script roda). Exemplo de uso:
+#
+#   instrumenta_script()                        # mede o script inteiro
+#   with etapa("calcula_mes", arquivo=mes) as m:
+#       dados = le_mes(mes)                     # leitura_dados/tabelas anotam os bytes lidos
+#       m.linhas = len(dados)
+#       with parcial("calculo"):                # tempo de uma parte da etapa
+#           ...
+#
+# Arquivos lidos/gravados e tempos parciais vão para a etapa aberta mais interna
+# (e, quando ela termina, também para as etapas de fora). Sem etapa aberta, as
+# funções leu(), gravou() e parcial() não fazem nada. O que se anota é o
+# tamanho dos arquivos, não os bytes de fato lidos: ler poucas colunas de um
+# Parquet conta o arquivo inteiro.
+#
+# Memória: enquanto houver etapa aberta, uma thread lê o RSS atual do processo
+# a cada INTERVALO_RSS segundos (/proc/self/statm, só no Linux). Cada etapa
+# registra o RSS no início, o pico durante a etapa e o aumento (pico - início).
+# pico_rss_processo_mb é o pico de toda a vida do processo (ru_maxrss), que só
+# diz algo da etapa quando cresce durante ela.
+#
+# Variáveis de ambiente:
+#   INSTRUMENTACAO_LOG     arquivo do log (padrão: instrumentacao.jsonl; vazio desliga o log)
+#   INSTRUMENTACAO_PERFIL  nome de uma etapa para gravar um perfil do cProfile
+#                          (perfil_<script>_<etapa>_<pid>.prof, abrir com pstats ou snakeviz)
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LOG_PADRAO = "instrumentacao.jsonl"
+INTERVALO_RSS = 0.05
+
+_pilha = []    # etapas abertas neste processo, da mais externa para a mais interna
+_scripts = []  # etapas abertas por instrumenta_script()
+_perfilando = False
+_amostrador_pid = None  # processo em que a thread de amostragem do RSS está rodando
+
+
+def nome_script():
+    return Path(sys.argv[0]).stem if sys.argv and sys.argv[0] else "interativo"
+
+
+# Pico de RSS do processo (e dos filhos já encerrados) em MB.
+def pico_rss_mb(quem="proprio"):
+    if resource is None:
+        return None
+    alvo = resource.RUSAGE_SELF if quem == "proprio" else resource.RUSAGE_CHILDREN
+    pico = resource.getrusage(alvo).ru_maxrss
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# RSS atual do processo em MB (None fora do Linux).
+def rss_atual_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            paginas = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _amostra_rss():
+    while True:
+        rss = rss_atual_mb()
+        if rss is None:
+            return
+        for medicao in list(_pilha):
+            medicao.anota_rss(rss)
+        time.sleep(INTERVALO_RSS)
+
+
+# Inicia a thread de amostragem (uma por processo; filhos criados por fork não a herdam).
+def _inicia_amostrador():
+    global _amostrador_pid
+    if _amostrador_pid != os.getpid():
+        _amostrador_pid = os.getpid()
+        threading.Thread(target=_amostra_rss, name="amostra_rss", daemon=True).start()
+
+
+def tamanho(caminho):
+    caminho = Path(caminho)
+    if caminho.is_file():
+        return caminho.stat().st_size
+    if caminho.is_dir():
+        return sum(p.stat().st_size for p in caminho.rglob("*") if p.is_file())
+    return 0
+
+
+class Medicao:
+    def __init__(self, nome, arquivo=None, linhas=None):
+        self.nome = nome
+        self.arquivo = None if arquivo is None else str(arquivo)
+        self.linhas = linhas
+        self.bytes_lidos = 0
+        self.bytes_gravados = 0
+        self.partes = {}
+        self.rss_inicio = rss_atual_mb()
+        self.pico_rss = self.rss_inicio
+        self._pico_processo = pico_rss_mb()
+        self._inicio = time.perf_counter()
+        self._cpu = time.process_time()
+        self._cpu_filhos = _cpu_filhos()
+
+    def anota_rss(self, rss):
+        if rss is not None and (self.pico_rss is None or rss > self.pico_rss):
+            self.pico_rss = rss
+
+    # Pico de RSS da etapa: o maior valor amostrado ou, se o pico do processo
+    # subiu durante a etapa, esse pico (pega também o que caiu entre amostras).
+    def pico_rss_etapa(self):
+        self.anota_rss(rss_atual_mb())
+        pico_processo = pico_rss_mb()
+        if pico_processo is not None and self._pico_processo is not None and pico_processo > self._pico_processo:
+            self.anota_rss(pico_processo)
+        return self.pico_rss
+
+    def leu(self, *caminhos):
+        self.bytes_lidos += sum(tamanho(c) for c in caminhos)
+
+    def gravou(self, *caminhos):
+        self.bytes_gravados += sum(tamanho(c) for c in caminhos)
+
+    def soma_parte(self, nome, segundos):
+        self.partes[nome] = self.partes.get(nome, 0.0) + segundos
+
+    def registro(self):
+        segundos = time.perf_counter() - self._inicio
+        linhas_por_segundo = None
+        if self.linhas is not None and segundos > 0:
+            linhas_por_segundo = round(self.linhas / segundos, 1)
+        pico = self.pico_rss_etapa()
+        rss = {"rss_inicio_mb": None, "pico_rss_etapa_mb": None, "aumento_rss_mb": None}
+        if pico is not None and self.rss_inicio is not None:
+            rss = {"rss_inicio_mb": round(self.rss_inicio, 1), "pico_rss_etapa_mb": round(pico, 1),
+                   "aumento_rss_mb": round(pico - self.rss_inicio, 1)}
+        return {
+            "data": datetime.now().isoformat(timespec="milliseconds"),
+            "script": nome_script(),
+            "pid": os.getpid(),
+            "etapa": self.nome,
+            "arquivo": self.arquivo,
+            "segundos": round(segundos, 4),
+            "cpu_segundos": round(time.process_time() - self._cpu, 4),
+            "cpu_filhos_segundos": round(_cpu_filhos() - self._cpu_filhos, 4),
+            "linhas": self.linhas,
+            "linhas_por_segundo": linhas_por_segundo,
+            **rss,
+            "pico_rss_processo_mb": pico_rss_mb(),
+            "pico_rss_filhos_mb": pico_rss_mb("filhos"),
+            "tamanho_arquivos_lidos": self.bytes_lidos,
+            "tamanho_arquivos_gravados": self.bytes_gravados,
+            "partes": {k: round(v, 4) for k, v in self.partes.items()},
+        }
+
+
+def _cpu_filhos():
+    t = os.times()
+    return t.children_user + t.children_system
+
+
+def escreve_log(registro):
+    caminho = os.environ.get("INSTRUMENTACAO_LOG", LOG_PADRAO)
+    if not caminho:
+        return
+    # uma escrita por linha em modo append: processos paralelos não misturam linhas
+    with open(caminho, "a", encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+
+def _abre(nome, arquivo=None, linhas=None):
+    global _perfilando
+    medicao = Medicao(nome, arquivo, linhas)
+    medicao._perfil = None
+    _inicia_amostrador()
+    if os.environ.get("INSTRUMENTACAO_PERFIL") == nome and not _perfilando:
+        medicao._perfil = cProfile.Profile()
+        medicao._perfil.enable()
+        _perfilando = True
+    _pilha.append(medicao)
+    return medicao
+
+
+def _fecha(medicao):
+    global _perfilando
+    if medicao in _pilha:
+        _pilha.remove(medicao)
+    if medicao._perfil is not None:
+        medicao._perfil.disable()
+        _perfilando = False
+        partes = ["perfil", nome_script(), medicao.nome] + ([medicao.arquivo] if medicao.arquivo else [])
+        nome = "_".join(partes + [str(os.getpid())]).replace("/", "-").replace(" ", "-")
+        medicao._perfil.dump_stats(f"{nome}.prof")
+
+    # a etapa de fora também leu/gravou esses bytes
+    if _pilha:
+        pai = _pilha[-1]
+        pai.bytes_lidos += medicao.bytes_lidos
+        pai.bytes_gravados += medicao.bytes_gravados
+        for nome, segundos in medicao.partes.items():
+            pai.soma_parte(nome, segundos)
+    escreve_log(medicao.registro())
+
+
+@contextmanager
+def etapa(nome, arquivo=None, linhas=None):
+    medicao = _abre(nome, arquivo, linhas)
+    try:
+        yield medicao
+    finally:
+        _fecha(medicao)
+
+
+# Mede o script inteiro, do momento da chamada até o fim do processo (ou até
+# encerra_script(), que o executar_pipeline.py --mesmo-processo chama ao fim de
+# cada script). Em scripts com main(), chame dentro do main(): assim os
+# processos filhos que importam o módulo não abrem uma medição própria.
+def instrumenta_script(linhas=None):
+    medicao = _abre("script", linhas=linhas)
+    if not _scripts:
+        atexit.register(_encerra_todos)
+    _scripts.append(medicao)
+    return medicao
+
+
+def encerra_script():
+    if _scripts:
+        _fecha(_scripts.pop())
+
+
+def _encerra_todos():
+    while _scripts:
+        encerra_script()
+
+
+def atual():
+    return _pilha[-1] if _pilha else None
+
+
+def leu(*caminhos):
+    if _pilha:
+        _pilha[-1].leu(*caminhos)
+
+
+def gravou(*caminhos):
+    if _pilha:
+        _pilha[-1].gravou(*caminhos)
+
+
+def conta_linhas(n):
+    if _pilha:
+        medicao = _pilha[-1]
+        medicao.linhas = (medicao.linhas or 0) + int(n)
+
+
+# Soma o tempo do bloco `with` na parte `nome` da etapa atual.
+@contextmanager
+def parcial(nome):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _pilha:
+            _pilha[-1].soma_parte(nome, time.perf_counter() - inicio)
+
+
+# Repassa os itens de um iterador somando na parte `nome` o tempo gasto para
+# produzir cada um (ex.: a leitura dos blocos de um CSV, que acontece aos poucos).
+def cronometra(iteravel, nome):
+    iterador = iter(iteravel)
+    while True:
+        with parcial(nome):
+            try:
+                item = next(iterador)
+            except StopIteration:
+                return
+        yield item
@@ -0,0 +1,221 @@
+# Estatísticas diárias por UF com janelas móveis de 7 e 28 dias.
+#
+# Os meses são lidos em ordem, uma vez só. Para cada dia, sai o total de público
+# e de sessões de cada UF e, sobre os totais diários dos últimos 7 e 28 dias, a
+# média, o desvio padrão (amostral, como o .rolling().std() do pandas) e a
+# mediana. As janelas são atualizadas a cada dia: o dia novo entra, os dias que
+# saíram da janela são retirados, e a soma, a soma dos quadrados e a lista
+# ordenada (para a mediana) são ajustadas, sem recalcular a janela inteira.
+#
+# Uma UF entra na tabela no primeiro dia com sessões; daí em diante todo dia dos
+# meses disponíveis tem uma linha, com total 0 se ela não teve sessões. As
+# janelas são de dias corridos: dias de meses ausentes da entrada não entram, e
+# Dias_7d/Dias_28d dizem quantos dias a janela tinha de fato.
+#
+# A tabela (estatisticas_diarias_por_UF.csv) pode ser estendida: com o manifesto
+# (ver ferramentas/manifesto.py), só os meses a partir do primeiro mês novo ou
+# alterado são processados, e as janelas recomeçam a partir dos totais diários
+# já gravados dos dias anteriores.
+import calendar
+import math
+from bisect import bisect_left, insort
+from collections import deque
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from ferramentas.instrumentacao import conta_linhas, etapa
+from ferramentas.leitura_dados import arquivos_do_mes, le_mes, meses_disponiveis
+from ferramentas.manifesto import (assinatura_mes, carrega_manifesto, desatualizado, salva_manifesto,
+                                  versao_do_codigo)
+from ferramentas.tabelas import grava_tabela, le_tabela
+
+TAMANHOS = (7, 28)
+
+
+class JanelaMovel:
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self.dias = deque()          # (dia, valor) em ordem de chegada
+        self.ordenados = []          # valores da janela em ordem, para a mediana
+        self.soma = 0
+        self.soma_quadrados = 0
+
+    # `dia` é um inteiro (date.toordinal()) e os dias chegam em ordem.
+    def adiciona(self, dia, valor):
+        while self.dias and self.dias[0][0] <= dia - self.tamanho:
+            _, antigo = self.dias.popleft()
+            del self.ordenados[bisect_left(self.ordenados, antigo)]
+            self.soma -= antigo
+            self.soma_quadrados -= antigo * antigo
+        self.dias.append((dia, valor))
+        insort(self.ordenados, valor)
+        self.soma += valor
+        self.soma_quadrados += valor * valor
+
+    @property
+    def n(self):
+        return len(self.dias)
+
+    def media(self):
+        return self.soma / self.n if self.n else math.nan
+
+    def desvio(self):
+        n = self.n
+        if n < 2:
+            return math.nan
+        # com totais inteiros, soma e soma dos quadrados são exatas
+        variancia = (n * self.soma_quadrados - self.soma * self.soma) / (n * (n - 1))
+        return math.sqrt(max(variancia, 0))
+
+    def mediana(self):
+        n = self.n
+        if not n:
+            return math.nan
+        meio = n // 2
+        if n % 2:
+            return float(self.ordenados[meio])
+        return (self.ordenados[meio - 1] + self.ordenados[meio]) / 2
+
+
+class MotorDiario:
+    def __init__(self, tamanhos=TAMANHOS):
+        self.tamanhos = tuple(tamanhos)
+        self.janelas = {}            # UF -> {tamanho: JanelaMovel}
+        self.colunas = ["UF", "Data", "Sessoes", "Total_Publico"] + [
+            f"{medida}_{t}d" for t in self.tamanhos for medida in ("Media", "Desvio", "Mediana", "Dias")]
+        self.linhas = []
+
+    def _janelas_da_uf(self, uf):
+        if uf not in self.janelas:
+            self.janelas[uf] = {t: JanelaMovel(t) for t in self.tamanhos}
+        return self.janelas[uf]
+
+    # Recoloca nas janelas de uma UF as linhas (Data, Total_Publico) já gravadas
+    # dos últimos dias, em ordem, sem registrar nada.
+    def retoma(self, uf, linhas):
+        janelas = self._janelas_da_uf(uf)
+        for data, total in zip(linhas["Data"], linhas["Total_Publico"]):
+            for janela in janelas.values():
+                janela.adiciona(date.fromisoformat(data).toordinal(), int(total))
+
+    # Processa um dia: `totais` e `sessoes` são dicionários UF -> valor. As UFs já
+    # conhecidas que não aparecem no dia entram com zero.
+    def adiciona_dia(self, dia, totais, sessoes=None):
+        sessoes = sessoes or {}
+        for uf in totais:
+            self._janelas_da_uf(uf)
+        ordinal = dia.toordinal()
+        for uf in sorted(self.janelas):
+            total = int(totais.get(uf, 0))
+            janelas = self.janelas[uf]
+            for janela in janelas.values():
+                janela.adiciona(ordinal, total)
+            linha = [uf, dia.isoformat(), int(sessoes.get(uf, 0)), total]
+            for t in self.tamanhos:
+                janela = janelas[t]
+                linha += [janela.media(), janela.desvio(), janela.mediana(), janela.n]
+            self.linhas.append(linha)
+
+    # Devolve (e esquece) as linhas registradas até agora.
+    def tabela(self):
+        tabela = pd.DataFrame(self.linhas, columns=self.colunas)
+        self.linhas = []
+        return tabela
+
+
+# Totais de público e sessões por dia × UF de um mês, com todos os dias do mês
+# (mesmo os sem sessões). Datas fora do mês do arquivo são descartadas, para que
+# os dias cheguem ao motor em ordem.
+def totais_diarios_do_mes(mes):
+    dados = le_mes(mes, colunas=["DATA_EXIBICAO", "UF_SALA_COMPLEXO", "PUBLICO"])
+    conta_linhas(len(dados))
+    datas = dados["DATA_EXIBICAO"]
+    if pd.api.types.is_object_dtype(datas) or pd.api.types.is_string_dtype(datas):
+        datas = pd.to_datetime(datas, format="%d/%m/%Y", errors="coerce")
+    else:
+        datas = pd.to_datetime(datas, errors="coerce")
+    publico = pd.to_numeric(dados["PUBLICO"], errors="coerce")
+
+    ano, numero_mes = map(int, mes.split("-"))
+    no_mes = (datas.dt.year == ano) & (datas.dt.month == numero_mes) & publico.notna()
+    agrupado = pd.DataFrame({
+        "Dia": datas[no_mes].dt.day.to_numpy(),
+        "UF": dados["UF_SALA_COMPLEXO"][no_mes].astype(str).to_numpy(),
+        "PUBLICO": publico[no_mes].to_numpy(),
+    }).groupby(["Dia", "UF"])["PUBLICO"].agg(["sum", "size"])
+
+    por_dia = {dia: ({}, {}) for dia in range(1, calendar.monthrange(ano, numero_mes)[1] + 1)}
+    for (dia, uf), total, sessoes in zip(agrupado.index, agrupado["sum"].to_numpy(), agrupado["size"].to_numpy()):
+        por_dia[dia][0][uf] = int(round(total))
+        por_dia[dia][1][uf] = int(sessoes)
+    return [(date(ano, numero_mes, dia), totais, sessoes) for dia, (totais, sessoes) in por_dia.items()]
+
+
+# Cria ou estende `saida`. Devolve a tabela diária completa.
+def atualiza_tabela_diaria(saida, tamanhos=TAMANHOS):
+    manifesto = carrega_manifesto(saida)
+    meses = meses_disponiveis()
+    versao = versao_do_codigo(__file__)
+    assinaturas = {mes: {**assinatura_mes(arquivos_do_mes(mes), manifesto.get(mes)), "versao": versao}
+                   for mes in meses}
+
+    # tudo a partir do primeiro mês novo, alterado (ou calculado por outra versão) ou removido é refeito
+    alterados = [mes for mes in meses if desatualizado(manifesto.get(mes), assinaturas[mes])]
+    alterados += [mes for mes in manifesto if mes not in assinaturas]
+    inicio = min(alterados, default=None)
+
+    motor = MotorDiario(tamanhos)
+    anteriores = pd.DataFrame(columns=motor.colunas)
+    if manifesto and inicio is not None:
+        anteriores = le_tabela(saida)
+        anteriores = anteriores[anteriores["Data"].str[:7] < inicio]
+        # retoma as janelas com os totais dos últimos dias já gravados
+        ultimos = anteriores[anteriores["Data"] >= (date.fromisoformat(inicio + "-01")
+                                                    - timedelta(days=max(tamanhos))).isoformat()]
+        for uf in anteriores["UF"].unique():
+            motor.retoma(uf, ultimos[ultimos["UF"] == uf].sort_values("Data"))
+    elif manifesto:
+        print(f"{saida}: nenhum mês novo ou alterado")
+        return le_tabela(saida)
+
+    novos = [mes for mes in meses if inicio is not None and mes >= inicio]
+    print(f"{saida}: {len(novos)} mês(es) processado(s), {len(meses) - len(novos)} reaproveitado(s)")
+    partes = [anteriores]
+    for mes in novos:
+        with etapa(saida.stem, arquivo=mes):
+            for dia, totais, sessoes in totais_diarios_do_mes(mes):
+                motor.adiciona_dia(dia, totais, sessoes)
+            partes.append(motor.tabela())
+
+    partes = [p for p in partes if not p.empty]
+    resultado = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=motor.colunas)
+    medidas = [c for c in resultado.columns if c.split("_")[0] in ("Media", "Desvio", "Mediana")]
+    resultado[medidas] = resultado[medidas].astype(float).round(3)
+    grava_tabela(resultado, saida)
+    salva_manifesto(saida, assinaturas)
+    return resultado
+
+
+# Série diária de uma UF (índice = data), para gráficos e análises.
+def serie_da_uf(tabela, uf):
+    serie = tabela[tabela["UF"] == uf].copy()
+    serie["Data"] = pd.to_datetime(serie["Data"])
+    return serie.set_index("Data").drop(columns="UF")
+
+
+# Mesmas médias e desvios calculados com o pandas (para conferência).
+def confere_com_pandas(tabela, tamanhos=TAMANHOS):
+    diferencas = {}
+    for uf, grupo in tabela.groupby("UF"):
+        serie = pd.Series(grupo["Total_Publico"].to_numpy(dtype=float),
+                          index=pd.to_datetime(grupo["Data"].to_numpy()))
+        for t in tamanhos:
+            janela = serie.rolling(f"{t}D")
+            for medida, esperado in (("Media", janela.mean()), ("Desvio", janela.std()),
+                                     ("Mediana", janela.median())):
+                diferenca = np.nanmax(np.abs(grupo[f"{medida}_{t}d"].to_numpy(dtype=float) - esperado.to_numpy()),
+                                      initial=0.0)
+                diferencas[f"{medida}_{t}d"] = max(diferencas.get(f"{medida}_{t}d", 0.0), diferenca)
+    return diferencas
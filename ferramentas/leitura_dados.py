@@ -0,0 +1,98 @@
+# Leitura dos dados filtrados pelo tratador_de_dados/filtro_de_dados.py.
+#
+# Os dados podem estar em dois formatos:
+#   - CSV:     dados_filtrados/dados_filtrados[AAAA-MM].csv
+#   - Parquet: dados_filtrados_parquet/MES=AAAA-MM/[UF_SALA_COMPLEXO=XX/]part-0.parquet
+# Quando a pasta Parquet existe ela é usada, lendo só as colunas e as partições
+# (meses/UFs) pedidas. O pyarrow só é necessário nesse caso.
+import pandas as pd
+from pathlib import Path
+
+from ferramentas.instrumentacao import leu, parcial
+
+PASTA_CSV = Path("dados_filtrados")
+PASTA_PARQUET = Path("dados_filtrados_parquet")
+
+
+def usa_parquet():
+    return PASTA_PARQUET.is_dir() and any(PASTA_PARQUET.glob("MES=*"))
+
+
+def mes_do_csv(arquivo):
+    return arquivo.stem.replace("dados_filtrados[", "").replace("]", "")
+
+
+# Lista os meses (AAAA-MM) disponíveis, em ordem.
+def meses_disponiveis():
+    if usa_parquet():
+        return sorted(p.name.split("=", 1)[1] for p in PASTA_PARQUET.glob("MES=*") if p.is_dir())
+    return sorted(mes_do_csv(arquivo) for arquivo in PASTA_CSV.glob("*.csv"))
+
+
+# Arquivos de onde vêm os dados de um mês (usado para saber se o mês mudou).
+def arquivos_do_mes(mes):
+    if usa_parquet():
+        return sorted((PASTA_PARQUET / f"MES={mes}").rglob("*.parquet"))
+    return [PASTA_CSV / f"dados_filtrados[{mes}].csv"]
+
+
+# Lê os dados filtrados como um DataFrame com a coluna extra "MES".
+# colunas: lista de colunas desejadas (None = todas)
+# meses:   lista de meses AAAA-MM (None = todos)
+# ufs:     lista de UFs (None = todas)
+def le_dados_filtrados(colunas=None, meses=None, ufs=None):
+    with parcial("leitura_dados"):
+        if usa_parquet():
+            return le_parquet(colunas, meses, ufs)
+        return le_csv(colunas, meses, ufs)
+
+
+def le_mes(mes, colunas=None, ufs=None):
+    return le_dados_filtrados(colunas, meses=[mes], ufs=ufs)
+
+
+def le_csv(colunas=None, meses=None, ufs=None):
+    if meses is None:
+        meses = meses_disponiveis()
+
+    usecols = None
+    if colunas is not None:
+        usecols = list(dict.fromkeys(colunas + (["UF_SALA_COMPLEXO"] if ufs else [])))
+
+    partes = []
+    for mes in meses:
+        arquivo = PASTA_CSV / f"dados_filtrados[{mes}].csv"
+        dados = pd.read_csv(arquivo, usecols=usecols)
+        leu(arquivo)
+        if ufs:
+            dados = dados[dados["UF_SALA_COMPLEXO"].isin(ufs)]
+            if colunas is not None:
+                dados = dados[colunas]
+        partes.append(dados.assign(MES=mes))
+
+    if not partes:
+        return pd.DataFrame(columns=(colunas or []) + ["MES"])
+    return pd.concat(partes, ignore_index=True)
+
+
+def le_parquet(colunas=None, meses=None, ufs=None):
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(PASTA_PARQUET, format="parquet", partitioning="hive")
+
+    # filtros sobre as colunas de partição: o pyarrow nem abre os arquivos de fora
+    filtro = None
+    if meses is not None:
+        filtro = ds.field("MES").isin(list(meses))
+    if ufs:
+        filtro_uf = ds.field("UF_SALA_COMPLEXO").isin(list(ufs))
+        filtro = filtro_uf if filtro is None else filtro & filtro_uf
+
+    if colunas is not None:
+        colunas = list(dict.fromkeys(colunas + ["MES"]))
+
+    tabela = dataset.to_table(columns=colunas, filter=filtro)
+    # tamanho dos arquivos dos meses pedidos (o pyarrow pode ler só parte deles)
+    leu(*(arquivo for mes in (meses if meses is not None else meses_disponiveis())
+          for arquivo in arquivos_do_mes(mes)))
+    return tabela.to_pandas()
@@ -0,0 +1,109 @@
+# Recalculo incremental das estatísticas mensais.
+#
+# Ao lado de cada saída (ex.: estatisticas_por_UF_mensal.csv) fica um manifesto
+# JSON (estatisticas_por_UF_mensal.manifesto.json) com, para cada mês, o hash do
+# conteúdo dos arquivos de entrada, o mtime e o tamanho. Na próxima execução só
+# os meses novos ou alterados são recalculados; as linhas dos outros meses são
+# reaproveitadas da saída anterior. Cada mês também guarda a versão do cálculo
+# (por padrão, o hash do código-fonte da função que calcula o mês): quando o
+# código muda, todos os meses são recalculados. Para forçar o recálculo
+# completo basta apagar o manifesto.
+import hashlib
+import inspect
+import json
+import pandas as pd
+from pathlib import Path
+
+from ferramentas.instrumentacao import etapa
+from ferramentas.leitura_dados import arquivos_do_mes, meses_disponiveis
+from ferramentas.tabelas import le_tabela, grava_tabela
+
+
+def caminho_manifesto(saida):
+    return saida.with_name(saida.stem + ".manifesto.json")
+
+
+def carrega_manifesto(saida):
+    arquivo = caminho_manifesto(saida)
+    if not saida.exists() or not arquivo.exists():
+        return {}
+    with open(arquivo, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def salva_manifesto(saida, manifesto):
+    with open(caminho_manifesto(saida), "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=1, sort_keys=True)
+
+
+def hash_arquivos(arquivos):
+    h = hashlib.sha256()
+    for arquivo in arquivos:
+        h.update(arquivo.name.encode())
+        with open(arquivo, "rb") as f:
+            for pedaco in iter(lambda: f.read(1 << 20), b""):
+                h.update(pedaco)
+    return h.hexdigest()
+
+
+# Versão de um cálculo: hash do código-fonte dos arquivos de `fontes` (funções,
+# módulos ou caminhos). Passe também os módulos de que o cálculo depende.
+def versao_do_codigo(*fontes):
+    h = hashlib.sha256()
+    for fonte in fontes:
+        caminho = fonte if isinstance(fonte, (str, Path)) else inspect.getsourcefile(fonte)
+        h.update(Path(caminho).read_bytes())
+    return h.hexdigest()[:16]
+
+
+# O mês precisa ser recalculado: arquivos de entrada ou versão do cálculo mudaram.
+def desatualizado(anterior, assinatura):
+    return (not anterior or anterior.get("hash") != assinatura["hash"]
+            or anterior.get("versao") != assinatura.get("versao"))
+
+
+# Assinatura dos arquivos de um mês. Se mtime e tamanho não mudaram desde a
+# última execução, reaproveita o hash anterior sem reler os arquivos.
+def assinatura_mes(arquivos, anterior=None):
+    estados = [arquivo.stat() for arquivo in arquivos]
+    mtime = max((e.st_mtime for e in estados), default=0.0)
+    tamanho = sum(e.st_size for e in estados)
+    if anterior and anterior.get("mtime") == mtime and anterior.get("tamanho") == tamanho:
+        conteudo = anterior["hash"]
+    else:
+        conteudo = hash_arquivos(arquivos)
+    return {"hash": conteudo, "mtime": mtime, "tamanho": tamanho}
+
+
+# Atualiza `saida` (CSV com uma coluna "Mes") recalculando só os meses cujos
+# arquivos de entrada mudaram. `calcula_mes(mes)` devolve o DataFrame daquele mês.
+# `versao` identifica o cálculo (padrão: versao_do_codigo(calcula_mes)).
+def atualiza_incremental(saida, calcula_mes, versao=None):
+    manifesto = carrega_manifesto(saida)
+    meses = meses_disponiveis()
+    if versao is None:
+        versao = versao_do_codigo(calcula_mes)
+
+    assinaturas = {mes: {**assinatura_mes(arquivos_do_mes(mes), manifesto.get(mes)), "versao": versao}
+                   for mes in meses}
+    recalcular = [mes for mes in meses if desatualizado(manifesto.get(mes), assinaturas[mes])]
+
+    partes = []
+    if manifesto:
+        anteriores = le_tabela(saida, dtype={"Mes": str}, float_precision="round_trip")
+        # meses que sumiram da entrada também saem da saída
+        mantidos = set(meses) - set(recalcular)
+        partes.append(anteriores[anteriores["Mes"].isin(mantidos)])
+
+    print(f"{saida}: {len(recalcular)} mês(es) recalculado(s), {len(meses) - len(recalcular)} reaproveitado(s)")
+    for mes in recalcular:
+        # cada mês é uma etapa no log de instrumentação (ferramentas/instrumentacao.py)
+        with etapa(saida.stem, arquivo=mes):
+            partes.append(calcula_mes(mes))
+
+    partes = [p for p in partes if not p.empty]
+    resultado = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame(columns=["Mes"])
+    resultado = resultado.sort_values("Mes", kind="stable").reset_index(drop=True)
+    grava_tabela(resultado, saida)
+    salva_manifesto(saida, assinaturas)
+    return resultado
@@ -0,0 +1,157 @@
+# Modelos de gráfico reaproveitáveis.
+#
+# Em vez de criar uma figura nova para cada gráfico, cada tipo de gráfico monta
+# a figura, os eixos, os localizadores e os formatadores uma vez só. Para cada
+# UF só são trocados os dados das linhas, os limites e o título antes de salvar.
+# Assim a memória fica estável, não importa quantas UFs ou métricas forem
+# desenhadas. Feche o modelo no fim (ou use `with`).
+import math
+from pathlib import Path
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.ticker import MultipleLocator, AutoMinorLocator, FuncFormatter
+from matplotlib.dates import AutoDateLocator, ConciseDateFormatter
+
+from ferramentas.instrumentacao import gravou, parcial
+
+
+# Função para calcular um passo "arredondado" para os rótulos dos eixos,
+# tornando os gráficos mais legíveis. Por exemplo, em vez de 12345, usa 10000.
+def nice_step(raw):
+    if not np.isfinite(raw) or raw <= 0:
+        return 1.0
+    exp = math.floor(math.log10(raw))
+    base = raw / (10 ** exp)
+    if base <= 2:
+        nice = 2
+    elif base <= 5:
+        nice = 5
+    else:
+        nice = 10
+    return nice * (10 ** exp)
+
+
+# Função que retorna um formatador para o eixo Y. Ele formata os números
+# com separador de milhar no padrão brasileiro (ex: 1.000.000) e sem casas decimais.
+def fmt_milhar_br():
+    return FuncFormatter(lambda x, pos: f"{int(round(x)):,}".replace(",", "."))
+
+
+class ModeloGrafico:
+    def __init__(self, figsize=(14, 6), dpi=150):
+        self.fig, self.ax = plt.subplots(figsize=figsize)
+        self.dpi = dpi
+
+    # `caminho` também pode ser um arquivo em memória (io.BytesIO), gravado em PNG.
+    def salva(self, caminho):
+        em_disco = isinstance(caminho, (str, Path))
+        if em_disco:
+            Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        with parcial("savefig"):
+            self.fig.tight_layout()
+            self.fig.savefig(caminho, dpi=self.dpi, format=None if em_disco else "png")
+        if em_disco:
+            gravou(caminho)
+
+    def fecha(self):
+        plt.close(self.fig)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fecha()
+
+
+# Série temporal com uma ou mais linhas (e, opcionalmente, a faixa entre as
+# duas primeiras, como o IQR entre Q1 e Q3).
+class ModeloLinhasTempo(ModeloGrafico):
+    def __init__(self, rotulos, marcadores, xlabel, ylabel, faixa=None,
+                 figsize=(14, 6), dpi=150, linewidth=2):
+        super().__init__(figsize, dpi)
+        ax = self.ax
+
+        self.linhas = [
+            ax.plot([], [], marker=m, linewidth=linewidth, label=r)[0]
+            for r, m in zip(rotulos, marcadores)
+        ]
+
+        # faixa sombreada: recriada a cada desenho, sempre com a mesma cor
+        self.rotulo_faixa = faixa
+        self.faixa = None
+        if faixa:
+            self.faixa = ax.fill_between([], [], [], alpha=0.18, label=faixa)
+            self.cor_faixa = self.faixa.get_facecolor()
+
+        # marcas opcionais sobre alguns pontos (ex.: anomalias); cor fixa, para
+        # não mudar as cores das linhas, e fora da legenda
+        self.marcas = ax.plot([], [], linestyle="none", marker="o", markersize=11, color="red",
+                              markerfacecolor="none", markeredgewidth=1.5, label="_nolegend_", zorder=5)[0]
+
+        # eixo X de datas
+        ax.xaxis_date()
+        loc = AutoDateLocator(minticks=4, maxticks=8)
+        ax.xaxis.set_major_locator(loc)
+        ax.xaxis.set_major_formatter(ConciseDateFormatter(loc))
+
+        # eixo Y: o passo do localizador é ajustado a cada desenho
+        self.loc_y = MultipleLocator(1)
+        ax.yaxis.set_major_locator(self.loc_y)
+        ax.yaxis.set_minor_locator(AutoMinorLocator(2))
+        ax.yaxis.set_major_formatter(fmt_milhar_br())
+
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel(ylabel)
+        ax.grid(True, which="major", axis="both", alpha=0.35)
+        ax.grid(True, which="minor", axis="y", alpha=0.15)
+        if len(rotulos) > 1 or faixa:
+            ax.legend()
+
+    # Troca os dados e salva. `x` são as datas e `ys` uma série por linha;
+    # `marcas`, se houver, é um par (datas, valores) de pontos a destacar.
+    def desenha(self, x, ys, titulo, caminho, marcas=None):
+        ax = self.ax
+        for linha, y in zip(self.linhas, ys):
+            linha.set_data(x, y)
+        self.marcas.set_data(*(marcas if marcas is not None else ([], [])))
+
+        if self.rotulo_faixa:
+            self.faixa.remove()
+            self.faixa = ax.fill_between(x, ys[0], ys[1], alpha=0.18, facecolor=self.cor_faixa)
+
+        ax.relim()
+        ax.autoscale_view(scaley=False)
+
+        # limites e passo do eixo Y calculados a partir dos valores, com folga nas bordas
+        yvals = np.concatenate([np.asarray(y, dtype=float) for y in ys])
+        ymin = float(np.nanmin(yvals))
+        ymax = float(np.nanmax(yvals))
+        rng = ymax - ymin
+        step = nice_step(max(rng / 5, 1))
+        self.loc_y.set_params(base=step)
+        pad = 0.05 * (rng if rng > 0 else step)
+        ax.set_ylim(ymin - pad, ymax + pad)
+
+        ax.set_title(titulo)
+        self.salva(caminho)
+
+
+# Boxplot por grupo (ex.: um box por ano). O número de boxes muda de uma UF para
+# outra, então os eixos são limpos e redesenhados, mas a figura é a mesma.
+class ModeloBoxplot(ModeloGrafico):
+    def __init__(self, xlabel, ylabel, figsize=(14, 6), dpi=150):
+        super().__init__(figsize, dpi)
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+
+    def desenha(self, dados, rotulos, titulo, caminho):
+        ax = self.ax
+        ax.clear()
+        #showfliers=False` omite os outliers extremos no boxplot.
+        ax.boxplot(dados, labels=rotulos, showfliers=False)
+        ax.set_title(titulo)
+        ax.set_xlabel(self.xlabel)
+        ax.set_ylabel(self.ylabel)
+        ax.grid(True, axis="y", alpha=0.35)
+        self.salva(caminho)
@@ -0,0 +1,98 @@
+# Motor de estatísticas descritivas por grupo (ex.: por UF).
+#
+# Calcula numa única passada as mesmas colunas que os scripts de estatísticas
+# gravam (média, mediana, moda, máximo, mínimo, total, desvio padrão, Q1, Q3 e
+# IQR). Os valores são ordenados uma vez por (grupo, valor) e todas as medidas
+# saem de operações vetorizadas do numpy sobre os limites de cada grupo, sem
+# groupby.apply nem laços em Python por grupo.
+import numpy as np
+import pandas as pd
+
+COLUNAS_ESTATISTICAS = [
+    "Media_Publico", "Mediana_Publico", "Moda_Publico", "Max_Publico", "Min_Publico",
+    "Total_Publico", "Desvio_Padrao", "Q1", "Q3", "IQR",
+]
+
+
+# Quantil com interpolação linear (o padrão do pandas) para cada grupo, a partir
+# do vetor já ordenado e do início/tamanho de cada grupo.
+def quantil_ordenado(valores, inicio, tamanho, q):
+    pos = inicio + q * (tamanho - 1)
+    baixo = np.floor(pos).astype(np.int64)
+    alto = np.ceil(pos).astype(np.int64)
+    frac = pos - baixo
+    v_baixo = valores[baixo].astype(float)
+    v_alto = valores[alto].astype(float)
+    return v_baixo + (v_alto - v_baixo) * frac
+
+
+# Moda de cada grupo: o valor mais frequente; em caso de empate, o menor
+# (mesmo critério de Series.mode().iloc[0]). Como os valores estão ordenados,
+# valores iguais formam "corridas" consecutivas.
+def moda_ordenada(valores, id_grupo, n_grupos):
+    novo = np.ones(len(valores), dtype=bool)
+    novo[1:] = (valores[1:] != valores[:-1]) | (id_grupo[1:] != id_grupo[:-1])
+    inicio_corrida = np.flatnonzero(novo)
+    tamanho_corrida = np.diff(np.append(inicio_corrida, len(valores)))
+    grupo_corrida = id_grupo[inicio_corrida]
+
+    maior = np.zeros(n_grupos, dtype=np.int64)
+    np.maximum.at(maior, grupo_corrida, tamanho_corrida)
+
+    # a primeira corrida de tamanho máximo de cada grupo é a de menor valor
+    candidatas = np.flatnonzero(tamanho_corrida == maior[grupo_corrida])
+    _, primeira = np.unique(grupo_corrida[candidatas], return_index=True)
+    return valores[inicio_corrida[candidatas[primeira]]]
+
+
+# Estatísticas de `valores` agrupados por `grupos` (arrays ou Series do mesmo
+# tamanho). Devolve um DataFrame com uma linha por grupo, em ordem, com a coluna
+# `nome_grupo` seguida de COLUNAS_ESTATISTICAS. Linhas com grupo ou valor
+# ausente são ignoradas, como no groupby do pandas.
+def estatisticas_por_grupo(grupos, valores, nome_grupo="UF", casas_media=2):
+    grupos = np.asarray(grupos)
+    valores = np.asarray(valores)
+
+    validos = ~pd.isna(valores) & ~pd.isna(grupos)
+    if not validos.all():
+        grupos = grupos[validos]
+        valores = valores[validos]
+    if valores.dtype == object:
+        valores = pd.to_numeric(valores)
+
+    chaves, id_grupo = np.unique(grupos, return_inverse=True)
+    n_grupos = len(chaves)
+    if n_grupos == 0:
+        return pd.DataFrame(columns=[nome_grupo] + COLUNAS_ESTATISTICAS)
+
+    ordem = np.lexsort((valores, id_grupo))
+    valores = valores[ordem]
+    id_grupo = id_grupo[ordem]
+
+    tamanho = np.bincount(id_grupo, minlength=n_grupos)
+    inicio = np.concatenate(([0], np.cumsum(tamanho)[:-1]))
+    fim = inicio + tamanho - 1
+
+    total = np.add.reduceat(valores, inicio)
+    media = total / tamanho
+    desvios = (valores - media[id_grupo]) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        desvio_padrao = np.sqrt(np.add.reduceat(desvios, inicio) / (tamanho - 1))
+    desvio_padrao[tamanho < 2] = np.nan
+
+    q1 = quantil_ordenado(valores, inicio, tamanho, 0.25)
+    q3 = quantil_ordenado(valores, inicio, tamanho, 0.75)
+
+    return pd.DataFrame({
+        nome_grupo: chaves,
+        "Media_Publico": np.round(media, casas_media),
+        "Mediana_Publico": quantil_ordenado(valores, inicio, tamanho, 0.5),
+        "Moda_Publico": moda_ordenada(valores, id_grupo, n_grupos),
+        "Max_Publico": valores[fim],
+        "Min_Publico": valores[inicio],
+        "Total_Publico": total,
+        "Desvio_Padrao": desvio_padrao,
+        "Q1": q1,
+        "Q3": q3,
+        "IQR": q3 - q1,
+    })
@@ -0,0 +1,93 @@
+# Naive Bayes gaussiano ajustado em lote: muitas divisões treino/teste dos
+# mesmos dados de uma vez só, em operações vetorizadas do numpy.
+#
+# Cada reamostragem é uma máscara booleana (R × n) dizendo quais linhas são de
+# teste. As médias e variâncias de cada classe em cada reamostragem saem de
+# produtos de matrizes entre as máscaras de treino e X, sem um fit por divisão.
+# O resultado é o mesmo do sklearn.naive_bayes.GaussianNB (mesma suavização da
+# variância, mesmas probabilidades a priori, empate fica com a primeira classe).
+import numpy as np
+
+# mesmo padrão do GaussianNB (var_smoothing)
+SUAVIZACAO = 1e-9
+
+
+# R divisões estratificadas: em cada classe, round(fracao_teste · n_classe)
+# linhas vão para o teste, deixando pelo menos uma no treino.
+def divisoes_estratificadas(y, repeticoes, fracao_teste=0.3, semente=42):
+    rng = np.random.default_rng(semente)
+    y = np.asarray(y)
+    teste = np.zeros((repeticoes, len(y)), dtype=bool)
+    for classe in np.unique(y):
+        linhas = np.flatnonzero(y == classe)
+        k = min(int(round(fracao_teste * len(linhas))), len(linhas) - 1)
+        if k <= 0:
+            continue
+        # uma permutação aleatória por repetição: as k primeiras posições vão para o teste
+        escolhidas = np.argsort(rng.random((repeticoes, len(linhas))), axis=1)[:, :k]
+        teste[np.arange(repeticoes)[:, None], linhas[escolhidas]] = True
+    return teste
+
+
+# Leave-one-out: a reamostragem i deixa só a linha i no teste.
+def deixa_um_fora(n):
+    return np.eye(n, dtype=bool)
+
+
+# Log-verossimilhança conjunta (R × C × n) de todas as linhas em cada
+# reamostragem, com o modelo ajustado nas linhas de treino (~teste).
+def log_verossimilhanca(X, y, teste, n_classes=None):
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y)
+    n_classes = n_classes or int(y.max()) + 1
+    treino = (~teste).astype(float)                            # R × n
+
+    # suavização: fração da maior variância das colunas no treino de cada reamostragem
+    n_treino = treino.sum(axis=1)                              # R
+    media_geral = treino @ X / n_treino[:, None]               # R × f
+    var_geral = treino @ (X ** 2) / n_treino[:, None] - media_geral ** 2
+    epsilon = SUAVIZACAO * var_geral.max(axis=1)               # R
+
+    resultado = np.empty((teste.shape[0], n_classes, X.shape[0]))
+    for c in range(n_classes):
+        pesos = treino * (y == c)                              # R × n
+        n_c = pesos.sum(axis=1)                                # R
+        with np.errstate(divide="ignore", invalid="ignore"):
+            media = pesos @ X / n_c[:, None]                   # R × f
+            var = pesos @ (X ** 2) / n_c[:, None] - media ** 2
+        var = np.maximum(var, 0) + epsilon[:, None]
+
+        diferenca = X[None, :, :] - media[:, None, :]          # R × n × f
+        log_p = -0.5 * (np.log(2 * np.pi * var).sum(axis=1)[:, None]
+                        + (diferenca ** 2 / var[:, None, :]).sum(axis=2))
+        with np.errstate(divide="ignore"):
+            log_p += np.log(n_c / n_treino)[:, None]
+        # classe ausente do treino nunca é prevista
+        log_p[n_c == 0] = -np.inf
+        resultado[:, c, :] = log_p
+    return resultado
+
+
+# Acurácia no teste de cada reamostragem (vetor de tamanho R), ajustando e
+# prevendo em blocos de `bloco` reamostragens para limitar a memória.
+def acuracias(X, y, teste, bloco=2000):
+    y = np.asarray(y)
+    n_classes = int(y.max()) + 1
+    saida = np.empty(teste.shape[0])
+    for inicio in range(0, teste.shape[0], bloco):
+        parte = teste[inicio:inicio + bloco]
+        previsto = log_verossimilhanca(X, y, parte, n_classes).argmax(axis=1)   # R × n
+        acertos = (previsto == y[None, :]) & parte
+        saida[inicio:inicio + bloco] = acertos.sum(axis=1) / parte.sum(axis=1)
+    return saida
+
+
+# Acurácia de prever sempre a classe mais frequente do treino (referência).
+def acuracias_classe_majoritaria(y, teste):
+    y = np.asarray(y)
+    n_classes = int(y.max()) + 1
+    treino = ~teste
+    contagens = np.stack([(treino & (y == c)).sum(axis=1) for c in range(n_classes)], axis=1)
+    majoritaria = contagens.argmax(axis=1)
+    acertos = (y[None, :] == majoritaria[:, None]) & teste
+    return acertos.sum(axis=1) / teste.sum(axis=1)
@@ -0,0 +1,111 @@
+# Médias, totais e contagens de qualquer período (janela de meses) para todas
+# as UFs de uma vez, a partir de somas acumuladas.
+#
+# Os valores de cada coluna viram uma matriz grupo × mês (meses em ordem). Com a
+# soma acumulada ao longo dos meses, a soma de uma janela [início, fim] é só
+# acumulada[fim] - acumulada[início - 1], para todos os grupos e todas as janelas
+# num único passo do numpy; a contagem de meses com valor é feita do mesmo jeito.
+# Valores ausentes não entram na soma nem na contagem, como no .mean() do pandas.
+# As somas acumuladas usam np.longdouble, para que a diferença entre duas delas
+# não perca as casas decimais que uma soma direta da janela teria.
+#
+# Uso:
+#   somas = SomasPeriodo(df, ["Media_Publico"], grupo="UF")
+#   periodos = [("2014–2019", "2014-01", "2019-12"), ("2020–2021", "2020-01", "2021-12")]
+#   somas.media("Media_Publico", periodos)         (matriz UF × período: a "média das médias")
+#   somas.tabela("Media_Publico", periodos)        (o mesmo em formato longo: UF, Periodo, valor)
+#   inicio, fim = somas.janelas_deslizantes(12)    (todas as janelas de 12 meses, para varreduras)
+#   somas.media_indices("Media_Publico", inicio, fim)
+import numpy as np
+import pandas as pd
+
+
+class SomasPeriodo:
+    # `df` tem uma linha por grupo × mês, com a coluna `mes` (AAAA-MM) e as
+    # `colunas` numéricas. Sem `grupo`, todas as linhas formam um grupo só.
+    def __init__(self, df, colunas, grupo="UF", mes="Mes"):
+        self.colunas = [colunas] if isinstance(colunas, str) else list(colunas)
+        self.nome_grupo = grupo
+        meses_linha = df[mes].astype(str).to_numpy()
+        self.meses, id_mes = np.unique(meses_linha, return_inverse=True)
+        if grupo is None:
+            self.grupos = np.array([None], dtype=object)
+            id_grupo = np.zeros(len(df), dtype=np.int64)
+        else:
+            self.grupos, id_grupo = np.unique(df[grupo].astype(str).to_numpy(), return_inverse=True)
+
+        n_grupos, n_meses = len(self.grupos), len(self.meses)
+        self._somas = {}
+        self._contagens = {}
+        for coluna in self.colunas:
+            valores = pd.to_numeric(df[coluna], errors="coerce").to_numpy(dtype=float)
+            presente = ~np.isnan(valores)
+            soma = np.zeros((n_grupos, n_meses), dtype=np.longdouble)
+            contagem = np.zeros((n_grupos, n_meses), dtype=np.int64)
+            np.add.at(soma, (id_grupo[presente], id_mes[presente]), valores[presente])
+            np.add.at(contagem, (id_grupo[presente], id_mes[presente]), 1)
+            # coluna extra de zeros no início: a janela [i, j) é acumulada[:, j] - acumulada[:, i]
+            self._somas[coluna] = np.concatenate(
+                [np.zeros((n_grupos, 1), dtype=np.longdouble), soma.cumsum(axis=1)], axis=1)
+            self._contagens[coluna] = np.concatenate(
+                [np.zeros((n_grupos, 1), dtype=np.int64), contagem.cumsum(axis=1)], axis=1)
+
+    # Converte períodos (nome, início, fim) ou (início, fim), com meses AAAA-MM
+    # inclusivos, em índices [inicio, fim) sobre o eixo de meses.
+    def indices(self, periodos):
+        inicios = [p[-2] for p in periodos]
+        fins = [p[-1] for p in periodos]
+        inicio = np.searchsorted(self.meses, inicios, side="left")
+        fim = np.searchsorted(self.meses, fins, side="right")
+        return inicio, fim
+
+    # Todas as janelas de `tamanho` meses consecutivos do eixo (índices [inicio, fim)).
+    def janelas_deslizantes(self, tamanho):
+        inicio = np.arange(0, len(self.meses) - tamanho + 1)
+        return inicio, inicio + tamanho
+
+    # Todas as janelas com pelo menos `minimo` meses (n·(n+1)/2 no máximo).
+    def todas_janelas(self, minimo=1):
+        inicio, fim = np.triu_indices(len(self.meses) + 1, k=minimo)
+        return inicio, fim
+
+    def soma_indices(self, coluna, inicio, fim):
+        acumulada = self._somas[coluna]
+        return (acumulada[:, fim] - acumulada[:, inicio]).astype(float)
+
+    def contagem_indices(self, coluna, inicio, fim):
+        acumulada = self._contagens[coluna]
+        return acumulada[:, fim] - acumulada[:, inicio]
+
+    def media_indices(self, coluna, inicio, fim):
+        soma = self.soma_indices(coluna, inicio, fim)
+        contagem = self.contagem_indices(coluna, inicio, fim)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(contagem > 0, soma / contagem, np.nan)
+
+    # Matrizes grupo × período.
+    def soma(self, coluna, periodos):
+        return self.soma_indices(coluna, *self.indices(periodos))
+
+    def contagem(self, coluna, periodos):
+        return self.contagem_indices(coluna, *self.indices(periodos))
+
+    def media(self, coluna, periodos):
+        return self.media_indices(coluna, *self.indices(periodos))
+
+    # Formato longo: uma linha por grupo × período, com a média (ou a soma) da coluna.
+    def tabela(self, coluna, periodos, medida="media", nome_valor=None):
+        valores = getattr(self, medida)(coluna, periodos)
+        nomes = [p[0] if len(p) == 3 else f"{p[0]}–{p[1]}" for p in periodos]
+        tabela = pd.DataFrame({
+            "Periodo": np.tile(nomes, len(self.grupos)),
+            nome_valor or coluna: valores.ravel(),
+        })
+        if self.nome_grupo is not None:
+            tabela.insert(0, self.nome_grupo, np.repeat(self.grupos, len(periodos)))
+        return tabela
+
+    # Série (índice = grupo) com a média de uma coluna num período.
+    def media_periodo(self, coluna, inicio, fim):
+        valores = self.media(coluna, [(inicio, fim)])[:, 0]
+        return pd.Series(valores, index=pd.Index(self.grupos, name=self.nome_grupo), name=coluna)
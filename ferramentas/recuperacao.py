@@ -0,0 +1,157 @@
+# Dados e avaliação do classificador de recuperação do público por UF
+# (teste_estatistica.py).
+#
+# Uma UF "recuperou" quando a média das médias mensais no período pós-pandemia
+# é pelo menos `limiar` × a do período pré-pandemia. As características do
+# modelo são a média pré e a média, o desvio padrão e o IQR médios durante a
+# pandemia. Os três períodos e o limiar são parâmetros.
+#
+# ajusta_classificador() é o modelo de teste_estatistica.py: uma divisão
+# treino/teste e a probabilidade de recuperação de cada UF.
+# avalia() mede a acurácia do Naive Bayes gaussiano com milhares de divisões
+# estratificadas (ou leave-one-out) para cada combinação de limiar × conjunto de
+# características, usando o ajuste em lote de ferramentas/naive_bayes_lote.py.
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.naive_bayes import GaussianNB
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from ferramentas.naive_bayes_lote import (acuracias, acuracias_classe_majoritaria, deixa_um_fora,
+                                          divisoes_estratificadas)
+from ferramentas.periodos import SomasPeriodo
+
+PERIODOS_PADRAO = {
+    "pre": ("2014-01", "2019-12"),
+    "pandemia": ("2020-01", "2021-12"),
+    "pos": ("2022-01", "2025-06"),
+}
+CARACTERISTICAS = ["Media_Publico_pre", "Media_Publico", "Desvio_Padrao", "IQR"]
+LIMIAR_PADRAO = 0.9
+
+
+# Uma linha por UF com as médias de cada período (a partir de
+# estatisticas_por_UF_mensal.csv).
+def monta_dados(df, periodos=None):
+    periodos = {**PERIODOS_PADRAO, **(periodos or {})}
+    somas = SomasPeriodo(df, ["Media_Publico", "Desvio_Padrao", "IQR"], grupo="UF")
+    pandemia = periodos["pandemia"]
+    return pd.DataFrame({
+        "Media_Publico_pre": somas.media_periodo("Media_Publico", *periodos["pre"]),
+        "Media_Publico_pos": somas.media_periodo("Media_Publico", *periodos["pos"]),
+        "Media_Publico": somas.media_periodo("Media_Publico", *pandemia),
+        "Desvio_Padrao": somas.media_periodo("Desvio_Padrao", *pandemia),
+        "IQR": somas.media_periodo("IQR", *pandemia),
+    }).dropna().reset_index()
+
+
+def recuperou(dados, limiar=LIMIAR_PADRAO):
+    return dados["Media_Publico_pos"] >= limiar * dados["Media_Publico_pre"]
+
+
+def padroniza(X):
+    X = np.asarray(X, dtype=float)
+    desvio = X.std(axis=0)
+    desvio[desvio == 0] = 1
+    return (X - X.mean(axis=0)) / desvio
+
+
+# Ajusta o Naive Bayes numa divisão treino/teste (70%/30%). Devolve a tabela
+# por UF com as características, a classe e as probabilidades de "Sim" e "Não",
+# ordenada pela probabilidade de recuperação, e (y_teste, y_previsto).
+def ajusta_classificador(dados, limiar=LIMIAR_PADRAO, fracao_teste=0.3, semente=42):
+    le = LabelEncoder()
+    scaler = StandardScaler()
+
+    modelo = dados[["UF", "Media_Publico_pre", *CARACTERISTICAS[1:]]].copy()
+    modelo.insert(1, "Recuperacao", recuperou(dados, limiar).map({True: "Sim", False: "Não"}))
+    modelo["Recuperacao_encoded"] = le.fit_transform(modelo["Recuperacao"])  # Sim=1, Não=0
+
+    X = scaler.fit_transform(modelo[CARACTERISTICAS])
+    y = modelo["Recuperacao_encoded"]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=fracao_teste, random_state=semente)
+
+    classificador = GaussianNB()
+    classificador.fit(X_train, y_train)
+    y_pred = classificador.predict(X_test)
+
+    # uma coluna por classe vista no treino (se todas as UFs caírem numa classe só, há uma coluna só)
+    probabilidades = classificador.predict_proba(X)
+    classes = list(le.inverse_transform(classificador.classes_))
+    modelo["Prob_Sim"] = probabilidades[:, classes.index("Sim")] if "Sim" in classes else 0.0
+    modelo["Prob_Nao"] = probabilidades[:, classes.index("Não")] if "Não" in classes else 0.0
+    modelo.sort_values("Prob_Sim", ascending=False, inplace=True)
+    return modelo, (y_test, y_pred)
+
+
+# Todos os subconjuntos não vazios das características.
+def subconjuntos(caracteristicas=CARACTERISTICAS, minimo=1):
+    return [list(c) for k in range(minimo, len(caracteristicas) + 1) for c in combinations(caracteristicas, k)]
+
+
+# Avalia uma combinação (limiar, características). Devolve o resumo e as
+# acurácias de cada reamostragem.
+def avalia_combinacao(dados, limiar, caracteristicas, repeticoes=2000, fracao_teste=0.3,
+                      loo=False, semente=42):
+    y = recuperou(dados, limiar).to_numpy().astype(int)
+    resumo = {
+        "Limiar": limiar,
+        "Caracteristicas": "+".join(caracteristicas),
+        "UFs": len(y),
+        "UFs_Recuperadas": int(y.sum()),
+    }
+    if y.min() == y.max():
+        # uma classe só: não há o que classificar
+        return {**resumo, "Reamostragens": 0}, np.array([])
+
+    X = padroniza(dados[caracteristicas])
+    teste = deixa_um_fora(len(y)) if loo else divisoes_estratificadas(y, repeticoes, fracao_teste, semente)
+    acc = acuracias(X, y, teste)
+    base = acuracias_classe_majoritaria(y, teste)
+    if loo:
+        # cada fold tem uma UF só: a acurácia de interesse é a média dos folds
+        resumo.update({"Reamostragens": len(acc), "Acuracia_Media": acc.mean(),
+                       "Acuracia_Classe_Majoritaria": base.mean()})
+    else:
+        resumo.update({
+            "Reamostragens": len(acc),
+            "Acuracia_Media": acc.mean(),
+            "Acuracia_Desvio": acc.std(ddof=1),
+            "Acuracia_P05": np.quantile(acc, 0.05),
+            "Acuracia_Mediana": np.quantile(acc, 0.5),
+            "Acuracia_P95": np.quantile(acc, 0.95),
+            "Acuracia_Classe_Majoritaria": base.mean(),
+        })
+    resumo["Ganho_Sobre_Majoritaria"] = resumo["Acuracia_Media"] - resumo["Acuracia_Classe_Majoritaria"]
+    return resumo, acc
+
+
+def _avalia(argumentos):
+    return avalia_combinacao(*argumentos)
+
+
+# Varre todas as combinações de `limiares` × `conjuntos` de características.
+# Devolve (resumo por combinação, acurácias de cada reamostragem em formato longo).
+# Com `processos` > 1, as combinações são divididas entre processos.
+def avalia(dados, limiares=(LIMIAR_PADRAO,), conjuntos=None, repeticoes=2000, fracao_teste=0.3,
+           loo=False, semente=42, processos=1):
+    conjuntos = conjuntos or [CARACTERISTICAS]
+    tarefas = [(dados, limiar, conjunto, repeticoes, fracao_teste, loo, semente)
+               for limiar in limiares for conjunto in conjuntos]
+    if processos > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(_avalia, tarefas, chunksize=max(1, len(tarefas) // (4 * processos))))
+    else:
+        resultados = [_avalia(t) for t in tarefas]
+
+    resumo = pd.DataFrame([r for r, _ in resultados])
+    distribuicoes = pd.DataFrame({
+        "Limiar": np.repeat([r["Limiar"] for r, _ in resultados], [len(a) for _, a in resultados]),
+        "Caracteristicas": np.repeat([r["Caracteristicas"] for r, _ in resultados], [len(a) for _, a in resultados]),
+        "Reamostragem": np.concatenate([np.arange(len(a)) for _, a in resultados]) if resultados else [],
+        "Acuracia": np.concatenate([a for _, a in resultados]) if resultados else [],
+    })
+    return resumo, distribuicoes
@@ -0,0 +1,217 @@
+# Resumos combináveis da coluna PUBLICO para cada célula UF × mês.
+#
+# Um resumo guarda:
+#   - contagem, soma, soma dos quadrados, mínimo e máximo (exatos);
+#   - um sketch de quantis: valores inteiros pequenos (< LIMITE_EXATO, que são
+#     quase todas as sessões) contados exatamente, e os demais em baldes
+#     logarítmicos com erro relativo de ALFA (no estilo do DDSketch);
+#   - uma tabela dos MAX_FREQUENTES valores mais frequentes, para a moda.
+#
+# Como todos esses campos se somam, os resumos de vários meses ou UFs podem ser
+# combinados para obter quantis, desvio padrão e moda do período inteiro sem
+# reler as sessões. Os resumos mensais ficam em resumos_por_UF_mensal.csv, ao
+# lado de estatisticas_por_UF_mensal.csv.
+import json
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+LIMITE_EXATO = 4096
+ALFA = 0.01
+GAMA = (1 + ALFA) / (1 - ALFA)
+MAX_FREQUENTES = 64
+
+
+class ResumoPublico:
+    def __init__(self):
+        self.n = 0
+        self.soma = 0
+        self.soma_quadrados = 0
+        self.minimo = None
+        self.maximo = None
+        self.exatos = Counter()
+        self.baldes = Counter()
+        self.frequentes = Counter()
+
+    # Monta o resumo a partir de valores distintos e suas contagens.
+    @classmethod
+    def de_contagens(cls, valores, contagens):
+        resumo = cls()
+        valores = np.asarray(valores)
+        contagens = np.asarray(contagens, dtype=np.int64)
+        if len(valores) == 0:
+            return resumo
+
+        inteiros = np.all(valores == np.round(valores))
+        conv = int if inteiros else float
+        resumo.n = int(contagens.sum())
+        resumo.soma = sum(conv(v) * int(c) for v, c in zip(valores, contagens))
+        resumo.soma_quadrados = sum(conv(v) ** 2 * int(c) for v, c in zip(valores, contagens))
+        resumo.minimo = conv(valores.min())
+        resumo.maximo = conv(valores.max())
+
+        exato = (valores >= 0) & (valores < LIMITE_EXATO)
+        if not inteiros:
+            exato[:] = False
+        for v, c in zip(valores[exato], contagens[exato]):
+            resumo.exatos[int(v)] += int(c)
+        for v, c in zip(valores[~exato], contagens[~exato]):
+            resumo.baldes[indice_balde(v)] += int(c)
+
+        mais = np.argsort(-contagens, kind="stable")[:MAX_FREQUENTES]
+        resumo.frequentes = Counter({conv(valores[i]): int(contagens[i]) for i in mais})
+        return resumo
+
+    @classmethod
+    def de_valores(cls, valores):
+        valores = np.asarray(valores)
+        valores = valores[~np.isnan(valores.astype(float))]
+        distintos, contagens = np.unique(valores, return_counts=True)
+        return cls.de_contagens(distintos, contagens)
+
+    def combina(self, outro):
+        novo = ResumoPublico()
+        novo.n = self.n + outro.n
+        novo.soma = self.soma + outro.soma
+        novo.soma_quadrados = self.soma_quadrados + outro.soma_quadrados
+        extremos = [v for v in (self.minimo, outro.minimo) if v is not None]
+        novo.minimo = min(extremos) if extremos else None
+        extremos = [v for v in (self.maximo, outro.maximo) if v is not None]
+        novo.maximo = max(extremos) if extremos else None
+        novo.exatos = self.exatos + outro.exatos
+        novo.baldes = self.baldes + outro.baldes
+        # a soma das tabelas é cortada de novo nos mais frequentes
+        novo.frequentes = Counter(dict((self.frequentes + outro.frequentes).most_common(MAX_FREQUENTES)))
+        return novo
+
+    __add__ = combina
+
+    def media(self):
+        return self.soma / self.n if self.n else np.nan
+
+    def desvio_padrao(self):
+        if self.n < 2:
+            return np.nan
+        variancia = (self.soma_quadrados - self.soma * self.soma / self.n) / (self.n - 1)
+        return math.sqrt(max(variancia, 0))
+
+    # Valor na posição `k` (0 = menor) da distribuição aproximada.
+    def valor_na_posicao(self, k, chaves, acumulado):
+        i = int(np.searchsorted(acumulado, k, side="right"))
+        return chaves[i]
+
+    # Quantil com interpolação linear entre posições, como o pandas. É exato
+    # quando as duas posições caem na parte contada exatamente.
+    def quantil(self, q):
+        if self.n == 0:
+            return np.nan
+        chaves = sorted(self.exatos) + [valor_balde(i) for i in sorted(self.baldes)]
+        contagens = [self.exatos[k] for k in sorted(self.exatos)] + [self.baldes[i] for i in sorted(self.baldes)]
+        acumulado = np.cumsum(contagens)
+        pos = q * (self.n - 1)
+        baixo = self.valor_na_posicao(math.floor(pos), chaves, acumulado)
+        alto = self.valor_na_posicao(math.ceil(pos), chaves, acumulado)
+        valor = baixo + (alto - baixo) * (pos - math.floor(pos))
+        return float(min(max(valor, self.minimo), self.maximo))
+
+    # Moda: contagens exatas da parte pequena, completadas pela tabela de mais
+    # frequentes para os outros valores; empate fica com o menor valor.
+    def moda(self):
+        contagens = Counter(self.exatos)
+        for v, c in self.frequentes.items():
+            if v not in contagens:
+                contagens[v] = c
+        if not contagens:
+            return np.nan
+        maior = max(contagens.values())
+        return min(v for v, c in contagens.items() if c == maior)
+
+    def estatisticas(self):
+        q1 = self.quantil(0.25)
+        q3 = self.quantil(0.75)
+        return {
+            "Media_Publico": round(self.media(), 2),
+            "Mediana_Publico": self.quantil(0.5),
+            "Moda_Publico": self.moda(),
+            "Max_Publico": self.maximo,
+            "Min_Publico": self.minimo,
+            "Total_Publico": self.soma,
+            "Desvio_Padrao": self.desvio_padrao(),
+            "Q1": q1,
+            "Q3": q3,
+            "IQR": q3 - q1,
+        }
+
+    def para_linha(self):
+        return {
+            "N": self.n,
+            "Soma": self.soma,
+            "Soma_Quadrados": self.soma_quadrados,
+            "Min": self.minimo,
+            "Max": self.maximo,
+            "Exatos": json.dumps(dict(self.exatos), separators=(",", ":")),
+            "Baldes": json.dumps(dict(self.baldes), separators=(",", ":")),
+            "Frequentes": json.dumps([[v, c] for v, c in self.frequentes.items()], separators=(",", ":")),
+        }
+
+    @classmethod
+    def de_linha(cls, linha):
+        resumo = cls()
+        resumo.n = int(linha["N"])
+        resumo.soma = numero(linha["Soma"])
+        resumo.soma_quadrados = numero(linha["Soma_Quadrados"])
+        resumo.minimo = None if pd.isna(linha["Min"]) else numero(linha["Min"])
+        resumo.maximo = None if pd.isna(linha["Max"]) else numero(linha["Max"])
+        resumo.exatos = Counter({int(k): c for k, c in json.loads(linha["Exatos"]).items()})
+        resumo.baldes = Counter({int(k): c for k, c in json.loads(linha["Baldes"]).items()})
+        resumo.frequentes = Counter({v: c for v, c in json.loads(linha["Frequentes"])})
+        return resumo
+
+
+def numero(texto):
+    valor = float(texto)
+    return int(valor) if valor.is_integer() and abs(valor) < 2 ** 53 else valor
+
+
+def indice_balde(v):
+    if v <= 0:
+        return 0
+    return int(math.ceil(math.log(v) / math.log(GAMA)))
+
+
+def valor_balde(i):
+    return 2 * GAMA ** i / (GAMA + 1)
+
+
+# Resumos de todas as UFs de um mês, numa passada: conta (UF, valor) de uma vez.
+# Devolve um DataFrame com UF, Mes e as colunas de ResumoPublico.para_linha().
+def resumos_por_uf(ufs, valores, mes):
+    tabela = pd.DataFrame({"UF": np.asarray(ufs), "PUBLICO": np.asarray(valores)}).dropna()
+    contagens = tabela.groupby(["UF", "PUBLICO"], observed=True).size()
+
+    linhas = []
+    for uf, bloco in contagens.groupby(level=0, sort=True):
+        resumo = ResumoPublico.de_contagens(bloco.index.get_level_values(1).to_numpy(), bloco.to_numpy())
+        linhas.append({"UF": uf, "Mes": mes, **resumo.para_linha()})
+    return pd.DataFrame(linhas)
+
+
+# Combina as linhas de resumo agrupando por `chaves` (ex.: ["UF"], ["UF", "Periodo"]
+# ou [] para o país inteiro) e devolve as estatísticas de sessão de cada grupo.
+def estatisticas_de_resumos(resumos, chaves):
+    def combina_linhas(bloco):
+        total = ResumoPublico()
+        for _, linha in bloco.iterrows():
+            total = total + ResumoPublico.de_linha(linha)
+        return total.estatisticas()
+
+    if not chaves:
+        return pd.DataFrame([combina_linhas(resumos)])
+
+    linhas = []
+    for chave, bloco in resumos.groupby(chaves, sort=True):
+        chave = chave if isinstance(chave, tuple) else (chave,)
+        linhas.append({**dict(zip(chaves, chave)), **combina_linhas(bloco)})
+    return pd.DataFrame(linhas)
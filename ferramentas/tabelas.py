@@ -0,0 +1,57 @@
+# Leitura e gravação das tabelas CSV trocadas entre as etapas do projeto.
+#
+# grava_tabela() grava o CSV e guarda o DataFrame na memória do processo;
+# le_tabela() devolve uma cópia dessa versão em memória se o arquivo no disco
+# ainda for o mesmo (mesmo mtime e tamanho), sem reler o CSV. Quando as etapas
+# rodam no mesmo processo (executar_pipeline.py --mesmo-processo), uma etapa
+# recebe direto o DataFrame da anterior; rodando separadas, tudo funciona como
+# um read_csv/to_csv comum.
+from pathlib import Path
+
+import pandas as pd
+
+from ferramentas.instrumentacao import leu, gravou
+
+_tabelas = {}
+
+
+def _estado(caminho):
+    info = caminho.stat()
+    return info.st_mtime_ns, info.st_size
+
+
+def grava_tabela(df, caminho):
+    caminho = Path(caminho)
+    df.to_csv(caminho, index=False)
+    gravou(caminho)
+    _tabelas[caminho.resolve()] = (_estado(caminho), df.copy())
+
+
+# Opções do pd.read_csv que também são aplicadas à cópia em memória. Com
+# qualquer outra, a tabela é relida do disco.
+OPCOES_EM_MEMORIA = {"dtype", "usecols", "float_precision"}
+
+
+# Aplica à cópia em memória as mesmas opções que o read_csv aplicaria.
+# float_precision não muda nada: os valores em memória já são os exatos.
+def _aplica_opcoes(df, usecols=None, dtype=None, float_precision=None):
+    if usecols is not None:
+        df = df[[c for c in df.columns if c in set(usecols)]]
+    if dtype is not None:
+        if not isinstance(dtype, dict):
+            dtype = dict.fromkeys(df.columns, dtype)
+        df = df.astype({c: t for c, t in dtype.items() if c in df.columns})
+    return df
+
+
+# `opcoes` vão para o pd.read_csv quando a tabela não está em memória.
+def le_tabela(caminho, **opcoes):
+    caminho = Path(caminho)
+    chave = caminho.resolve()
+    if chave in _tabelas and caminho.exists() and set(opcoes) <= OPCOES_EM_MEMORIA:
+        estado, df = _tabelas[chave]
+        if estado == _estado(caminho):
+            return _aplica_opcoes(df.copy(), **opcoes)
+    df = pd.read_csv(caminho, **opcoes)
+    leu(caminho)
+    return df
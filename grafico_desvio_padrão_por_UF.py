@@ -1,7 +1,15 @@
 import pandas as pd
 import matplotlib.pyplot as plt
+from pathlib import Path
 
-df = pd.read_csv("estatisticas_gerais_por_UF.csv")
+from ferramentas.cache_graficos import chave_grafico, grafico_mudou, registra_grafico
+from ferramentas.instrumentacao import conta_linhas, gravou, instrumenta_script
+from ferramentas.tabelas import le_tabela
+
+instrumenta_script()
+
+df = le_tabela("estatisticas_gerais_por_UF.csv")
+conta_linhas(len(df))
 
 
 df["UF"] = df["UF"].astype(str)
@@ -12,11 +20,20 @@ plot_df = (
     .sort_values("Desvio_Padrao", ascending=False)
 )
 
-plt.figure(figsize=(12, 6))
-plt.bar(plot_df["UF"], plot_df["Desvio_Padrao"])
-plt.title("Desvio-padrão por UF")
-plt.xlabel("UF")
-plt.ylabel("Desvio-padrão")
-plt.xticks(rotation=90)
-plt.tight_layout()
-plt.savefig("desvio_padrao_por_UF.png", dpi=150)
+# só redesenha se os valores, os textos ou o estilo mudaram
+saida = Path("desvio_padrao_por_UF.png")
+titulo, rotulo_x, rotulo_y = "Desvio-padrão por UF", "UF", "Desvio-padrão"
+chave = chave_grafico({"versao": 1, "figsize": (12, 6), "dpi": 150}, titulo, rotulo_x, rotulo_y,
+                      plot_df["UF"], plot_df["Desvio_Padrao"])
+
+if grafico_mudou(saida, chave):
+    plt.figure(figsize=(12, 6))
+    plt.bar(plot_df["UF"], plot_df["Desvio_Padrao"])
+    plt.title(titulo)
+    plt.xlabel(rotulo_x)
+    plt.ylabel(rotulo_y)
+    plt.xticks(rotation=90)
+    plt.tight_layout()
+    plt.savefig(saida, dpi=150)
+    gravou(saida)
+    registra_grafico(saida, chave)
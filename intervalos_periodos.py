@@ -0,0 +1,80 @@
+# Intervalos de confiança (bootstrap em blocos) para a média de cada período
+# (pré-pandemia, pandemia, pós) por UF e para a razão pós/pré, que decide o
+# rótulo de recuperação de teste_estatistica.py. Ver ferramentas/bootstrap.py.
+#
+# Uso:
+#   python intervalos_periodos.py                          (médias mensais por UF, 10000 reamostragens)
+#   python intervalos_periodos.py --diario                 (totais diários por UF, de estatisticas_diarias_por_UF.csv)
+#   python intervalos_periodos.py --nacional               (médias mensais do país, estatisticas_publico_mensal.csv)
+#   python intervalos_periodos.py --bloco 6 --nivel 0.9 --limiar 0.8 --pre 2017-01 2019-12
+#
+# Gravam intervalos_periodos_<origem>.csv (grupo × período) e
+# razao_pos_pre_<origem>.csv (um grupo por linha, com o rótulo "Sim", "Não" ou
+# "Incerto" quando o intervalo da razão contém o limiar).
+import argparse
+
+import pandas as pd
+
+from ferramentas.bootstrap import NIVEL_PADRAO, REAMOSTRAGENS_PADRAO, intervalos_periodos, matriz_por_grupo
+from ferramentas.instrumentacao import conta_linhas, etapa, instrumenta_script
+from ferramentas.recuperacao import LIMIAR_PADRAO, PERIODOS_PADRAO
+from ferramentas.tabelas import grava_tabela, le_tabela
+
+# origem: (arquivo, coluna, grupo, tempo)
+ORIGENS = {
+    "UF_mensal": ("estatisticas_por_UF_mensal.csv", "Media_Publico", "UF", "Mes"),
+    "UF_diario": ("estatisticas_diarias_por_UF.csv", "Total_Publico", "UF", "Data"),
+    "nacional_mensal": ("estatisticas_publico_mensal.csv", "Media_Publico", None, "Mes"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intervalos de confiança por bootstrap em blocos "
+                                                 "para as médias dos períodos e a razão pós/pré.")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--diario", action="store_true", help="usa os totais diários por UF")
+    grupo.add_argument("--nacional", action="store_true", help="usa as médias mensais do país")
+    parser.add_argument("--reamostragens", type=int, default=REAMOSTRAGENS_PADRAO)
+    parser.add_argument("--bloco", type=int, default=None,
+                        help="tamanho do bloco em meses (ou dias); padrão: n^(1/3) de cada período")
+    parser.add_argument("--nivel", type=float, default=NIVEL_PADRAO, help="nível de confiança")
+    parser.add_argument("--limiar", type=float, default=LIMIAR_PADRAO,
+                        help="razão pós/pré a partir da qual a UF conta como recuperada")
+    parser.add_argument("--semente", type=int, default=42)
+    for nome, (inicio, fim) in PERIODOS_PADRAO.items():
+        parser.add_argument(f"--{nome}", nargs=2, metavar=("INICIO", "FIM"), default=[inicio, fim],
+                            help=f"período {nome} em AAAA-MM (padrão: {inicio} {fim})")
+    args = parser.parse_args()
+    instrumenta_script()
+
+    if args.reamostragens < 2:
+        parser.error("--reamostragens deve ser pelo menos 2")
+    if args.bloco is not None and args.bloco <= 0:
+        parser.error("--bloco deve ser maior que zero")
+    if not 0 < args.nivel < 1:
+        parser.error("--nivel deve estar entre 0 e 1")
+
+    origem = "UF_diario" if args.diario else "nacional_mensal" if args.nacional else "UF_mensal"
+    arquivo, coluna, nome_grupo, tempo = ORIGENS[origem]
+    df = le_tabela(arquivo, dtype={tempo: str})
+    conta_linhas(len(df))
+    grupos, tempos, valores = matriz_por_grupo(df, coluna, grupo=nome_grupo, tempo=tempo)
+
+    periodos = {nome: tuple(getattr(args, nome)) for nome in PERIODOS_PADRAO}
+    with etapa("bootstrap", linhas=valores.size * args.reamostragens):
+        tabela_periodos, tabela_razao = intervalos_periodos(
+            grupos, tempos, valores, periodos, reamostragens=args.reamostragens, bloco=args.bloco,
+            nivel=args.nivel, limiar=args.limiar, semente=args.semente, nome_grupo=nome_grupo)
+
+    with pd.option_context("display.max_rows", 100, "display.width", 200):
+        print(tabela_razao.round(3).to_string(index=False))
+    incertos = (tabela_razao["Recuperacao_IC"] == "Incerto").sum()
+    print(f"{incertos} de {len(tabela_razao)} com o limiar {args.limiar} dentro do intervalo de "
+          f"{args.nivel:.0%} da razão pós/pré")
+
+    grava_tabela(tabela_periodos, f"intervalos_periodos_{origem}.csv")
+    grava_tabela(tabela_razao, f"razao_pos_pre_{origem}.csv")
+
+
+if __name__ == "__main__":
+    main()
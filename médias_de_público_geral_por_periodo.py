@@ -2,7 +2,14 @@ import pandas as pd
 from pathlib import Path
 import matplotlib.pyplot as plt 
 
-df = pd.read_csv("estatisticas_publico_mensal.csv")
+from ferramentas.instrumentacao import conta_linhas, gravou, instrumenta_script
+from ferramentas.periodos import SomasPeriodo
+from ferramentas.tabelas import le_tabela
+
+instrumenta_script()
+
+df = le_tabela("estatisticas_publico_mensal.csv")
+conta_linhas(len(df))
 df["Mes"] = df["Mes"].astype(str)
 df["Media_Publico"] = pd.to_numeric(df["Media_Publico"], errors='coerce')
 
@@ -12,13 +19,9 @@ intervalos = [
     ("2022–2025", "2022-01", "2025-06"),
 ]
 
-valores = []
-for nome, inicio, fim in intervalos:
-    separador = (df["Mes"] >= inicio) & (df["Mes"] <= fim)
-    media_das_medias = df.loc[separador, "Media_Publico"].mean()
-    valores.append({"Periodo": nome, "Media_das_Medias": round(float(media_das_medias), 2)})
-
-resultado = pd.DataFrame(valores)
+# média das médias de cada período a partir de somas acumuladas (ver ferramentas/periodos.py)
+somas = SomasPeriodo(df, ["Media_Publico"], grupo=None)
+resultado = somas.tabela("Media_Publico", intervalos, nome_valor="Media_das_Medias").round({"Media_das_Medias": 2})
 
 # gráfico de colunas
 plt.figure(figsize=(8,5))
@@ -29,4 +32,5 @@ plt.ylabel("Média das médias (público)")
 for x, y in zip(resultado["Periodo"], resultado["Media_das_Medias"]):
     plt.text(x, y, f"{y:.0f}", ha="center", va="bottom")
 plt.tight_layout()
-plt.savefig("comparacao_medias_periodos.png", dpi=150)
\ No newline at end of file
+plt.savefig("comparacao_medias_periodos.png", dpi=150)
+gravou("comparacao_medias_periodos.png")
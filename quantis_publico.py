@@ -0,0 +1,96 @@
+# Quantis, postos, médias aparadas e histogramas exatos do público de qualquer
+# célula mês × UF ou união de células, lidos do índice ordenado em disco
+# indice_publico/ (ver ferramentas/indice_publico.py). O índice é criado ou
+# atualizado antes de cada consulta; só os meses alterados são reordenados.
+#
+# Uso:
+#   python quantis_publico.py --atualizar
+#   python quantis_publico.py --uf SP --mes 2020-10                     (mediana, Q1 e Q3)
+#   python quantis_publico.py --mes 2020-09 --mes 2020-10 --quantis 0.1 0.5 0.9 0.99
+#   python quantis_publico.py --uf RJ --posto 100 --aparada 0.1 --histograma 0 10 50 100 1000
+#   python quantis_publico.py --por-celula --saida quantis_por_UF_mensal.csv
+#   python quantis_publico.py --conferir        (compara com estatisticas_por_UF_mensal.csv)
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ferramentas.indice_publico import IndicePublico, atualiza_indice
+from ferramentas.instrumentacao import instrumenta_script
+from ferramentas.tabelas import le_tabela
+
+
+def confere(indice):
+    arquivo = Path("estatisticas_por_UF_mensal.csv")
+    if not arquivo.exists():
+        print(f"{arquivo} não existe, nada a comparar")
+        return
+    atual = le_tabela(arquivo, dtype={"Mes": str})
+    celulas = indice.quantis_por_celula([0.25, 0.5, 0.75]).rename(columns={
+        "Q0.25": "Q1_indice", "Q0.5": "Mediana_Publico_indice", "Q0.75": "Q3_indice",
+        "Min": "Min_Publico_indice", "Max": "Max_Publico_indice"})
+    juntos = atual.merge(celulas, on=["UF", "Mes"])
+    print(f"{len(juntos)} de {len(atual)} linhas com par no índice")
+    for coluna in ["Q1", "Mediana_Publico", "Q3", "Min_Publico", "Max_Publico"]:
+        diferenca = np.abs(pd.to_numeric(juntos[coluna]) - juntos[coluna + "_indice"].astype(float))
+        print(f"  {coluna:<16} maior diferença: {diferenca.max():.6g}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quantis exatos do público pelo índice ordenado em disco.")
+    parser.add_argument("--atualizar", action="store_true", help="só cria/atualiza o índice")
+    parser.add_argument("--mes", action="append", help="mês AAAA-MM (pode repetir; padrão: todos)")
+    parser.add_argument("--uf", action="append", help="UF (pode repetir; padrão: todas)")
+    parser.add_argument("--quantis", type=float, nargs="+", default=[0.25, 0.5, 0.75])
+    parser.add_argument("--posto", type=float, nargs="+", default=[],
+                        help="fração das sessões com público <= cada valor")
+    parser.add_argument("--aparada", type=float, default=None,
+                        help="média sem essa fração de valores em cada ponta")
+    parser.add_argument("--histograma", type=float, nargs="+", default=None, help="limites dos intervalos")
+    parser.add_argument("--por-celula", action="store_true", help="quantis de cada célula mês × UF")
+    parser.add_argument("--saida", help="grava a tabela de --por-celula neste CSV")
+    parser.add_argument("--conferir", action="store_true",
+                        help="compara com as estatísticas mensais por UF")
+    args = parser.parse_args()
+    instrumenta_script()
+
+    atualiza_indice()
+    if args.atualizar:
+        return
+    indice = IndicePublico()
+
+    if args.conferir:
+        confere(indice)
+        return
+
+    inicio = time.perf_counter()
+    if args.por_celula:
+        tabela = indice.quantis_por_celula(args.quantis, meses=args.mes)
+        if args.uf:
+            tabela = tabela[tabela["UF"].isin(args.uf)]
+        if args.saida:
+            tabela.to_csv(args.saida, index=False)
+            print(f"{len(tabela)} linhas salvas em {args.saida}")
+        else:
+            with pd.option_context("display.max_rows", 60, "display.width", 200):
+                print(tabela)
+    else:
+        celulas = dict(meses=args.mes, ufs=args.uf)
+        print(f"sessões: {indice.n(**celulas)}")
+        for q, valor in zip(args.quantis, indice.quantil(args.quantis, **celulas)):
+            print(f"quantil {q:g}: {valor:g}")
+        for valor in args.posto:
+            print(f"posto de {valor:g}: {indice.posto(valor, **celulas):.4f}")
+        if args.aparada is not None:
+            print(f"média aparada {args.aparada:g}: {indice.media_aparada(args.aparada, **celulas):.4f}")
+        if args.histograma:
+            contagens = indice.histograma(args.histograma, **celulas)
+            for a, b, c in zip(args.histograma[:-1], args.histograma[1:], contagens):
+                print(f"[{a:g}, {b:g}): {c}")
+    print(f"(consulta em {(time.perf_counter() - inicio) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
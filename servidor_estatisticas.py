@@ -0,0 +1,329 @@
+# Servidor local (HTTP/JSON) das estatísticas do projeto.
+#
+# Os scripts avulsos pagam, a cada execução, a importação do pandas, do
+# matplotlib e do sklearn e a releitura dos CSVs. O servidor carrega tudo uma
+# vez e responde às consultas com a mesma lógica dos scripts:
+#
+#   GET /                                  lista das rotas
+#   GET /estatisticas/uf?uf=SP&inicio=2020-01&fim=2020-12&colunas=Media_Publico,Total_Publico
+#   GET /estatisticas/nacional?inicio=2019-01&fim=2021-12
+#   GET /periodos?uf=SP&coluna=Media_Publico&periodo=2017-01:2019-12&periodo=2022-01:2025-06
+#                                          (média das médias por período, como medias_de_público_por_UF_por_período)
+#   GET /recuperacao?limiar=0.9            (probabilidades de recuperação, como teste_estatistica.py)
+#   GET /grafico/uf?uf=SP&tipo=media_mediana
+#                                          (PNG; tipos: total, media_mediana, desvio, quartis, min_max, boxplot)
+#   GET /publico?por=uf&mes=2020-10&uf=SP  (público e sessões dos dados filtrados, agrupados por
+#                                           uf, mes, dia, titulo, distribuidora, municipio ou pais)
+#   GET /quantis?uf=SP&mes=2020-10&q=0.25,0.5,0.75   (pelo índice de ferramentas/indice_publico.py)
+#   GET /cache                             (entradas, acertos e falhas do cache)
+#
+# As respostas ficam num cache LRU (ferramentas/cache_resultados.py) que é
+# invalidado quando os arquivos de onde elas saíram mudam; os dados filtrados
+# ficam carregados no formato compacto (ferramentas/dados_compactos.py) e são
+# recarregados quando a pasta muda.
+#
+# Uso:
+#   python servidor_estatisticas.py                    (http://127.0.0.1:8765)
+#   python servidor_estatisticas.py --porta 9000 --cache 1024
+import argparse
+import io
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "códigos_comparativos_por_UF"))
+from graficos_por_estado import carrega_dados as carrega_dados_graficos, modelos
+
+from ferramentas.cache_resultados import CacheLRU
+from ferramentas.dados_compactos import DIA_ZERO, carrega_compacto
+from ferramentas.indice_publico import PASTA_INDICE, IndicePublico
+from ferramentas.leitura_dados import PASTA_CSV, PASTA_PARQUET
+from ferramentas.periodos import SomasPeriodo
+from ferramentas.recuperacao import PERIODOS_PADRAO, ajusta_classificador, monta_dados
+from ferramentas.tabelas import le_tabela
+
+ARQ_UF = Path("estatisticas_por_UF_mensal.csv")
+ARQ_NACIONAL = Path("estatisticas_publico_mensal.csv")
+DADOS_FILTRADOS = [PASTA_CSV, PASTA_PARQUET]
+
+# mesmos períodos de medias_de_público_por_UF_por_período
+PERIODOS = [("2017–2019", "2017-01", "2019-12"), ("2020–2021", "2020-01", "2021-12"), ("2022–2025", "2022-01", "2025-06")]
+
+# agrupamentos de /publico -> coluna dos dados filtrados
+AGRUPAMENTOS = {
+    "uf": "UF_SALA_COMPLEXO",
+    "titulo": "TITULO_BRASIL",
+    "distribuidora": "RAZAO_SOCIAL_DISTRIBUIDORA",
+    "municipio": "MUNICIPIO_SALA_COMPLEXO",
+    "pais": "PAIS_OBRA",
+}
+
+# gráficos de /grafico/uf: tipo -> (colunas, título), como em graficos_por_estado.py
+GRAFICOS_UF = {
+    "total": (["Total_Publico"], "Público total mensal"),
+    "media_mediana": (["Media_Publico", "Mediana_Publico"], "Média vs Mediana do público por mês"),
+    "desvio": (["Desvio_Padrao"], "Desvio padrão do público por mês"),
+    "quartis": (["Q1", "Q3"], "Quartis do público por mês (IQR)"),
+    "min_max": (["Min_Publico", "Max_Publico"], "Valores mínimo e máximo de público por mês"),
+    "boxplot": (["Total_Publico"], "Distribuição do público mensal por ano (boxplot)"),
+}
+
+
+class ErroConsulta(Exception):
+    pass
+
+
+def lista(parametros, nome):
+    valores = [v for item in parametros.get(nome, []) for v in item.split(",") if v]
+    return valores or None
+
+
+def um(parametros, nome, padrao=None):
+    valores = lista(parametros, nome)
+    return valores[0] if valores else padrao
+
+
+# Período "AAAA-MM:AAAA-MM" do parâmetro `nome` -> (inicio, fim). Com
+# `aceita_mes`, um mês só ("AAAA-MM") vale como INICIO:INICIO.
+def periodo(texto, nome, aceita_mes=False):
+    inicio, separador, fim = texto.partition(":")
+    if aceita_mes and not separador:
+        separador, fim = ":", inicio
+    if not (separador and re.fullmatch(r"\d{4}-\d{2}", inicio) and re.fullmatch(r"\d{4}-\d{2}", fim)):
+        raise ErroConsulta(f"{nome} deve ser INICIO:FIM (AAAA-MM:AAAA-MM), recebido {texto!r}")
+    return inicio, fim
+
+
+def filtra_meses(df, parametros):
+    inicio, fim = um(parametros, "inicio"), um(parametros, "fim")
+    if inicio:
+        df = df[df["Mes"] >= inicio]
+    if fim:
+        df = df[df["Mes"] <= fim]
+    return df
+
+
+class Estatisticas:
+    def __init__(self, maximo_cache=256):
+        self.cache = CacheLRU(maximo_cache)
+        # dados carregados (tabelas, dados filtrados, índice): poucos e grandes, fora do LRU das respostas
+        self.quentes = CacheLRU(8)
+        self.trava_graficos = threading.Lock()
+
+    # ---- dados carregados uma vez (e de novo só quando os arquivos mudam) ----
+
+    def tabela(self, arquivo):
+        def carrega():
+            df = le_tabela(arquivo, dtype={"Mes": str})
+            df["Mes"] = df["Mes"].astype(str).str[:7]
+            return df
+        return self.quentes.obtem(("tabela", str(arquivo)), [arquivo], carrega)
+
+    def somas_uf(self):
+        return self.quentes.obtem(("somas", str(ARQ_UF)), [ARQ_UF], lambda: SomasPeriodo(
+            self.tabela(ARQ_UF), ["Media_Publico", "Total_Publico", "Desvio_Padrao", "IQR"], grupo="UF"))
+
+    def dados(self):
+        return self.quentes.obtem("dados_filtrados", DADOS_FILTRADOS, lambda: carrega_compacto(
+            ["DATA_EXIBICAO", *AGRUPAMENTOS.values(), "PUBLICO"]))
+
+    def indice(self):
+        if not (PASTA_INDICE / "segmentos.csv").exists():
+            raise ErroConsulta("índice não encontrado: rode python quantis_publico.py --atualizar")
+        return self.quentes.obtem("indice", [PASTA_INDICE / "segmentos.csv"], IndicePublico)
+
+    # ---- rotas ----
+
+    def estatisticas(self, arquivo, parametros, por_uf):
+        df = filtra_meses(self.tabela(arquivo), parametros)
+        if por_uf and lista(parametros, "uf"):
+            df = df[df["UF"].isin(lista(parametros, "uf"))]
+        colunas = lista(parametros, "colunas")
+        if colunas:
+            desconhecidas = set(colunas) - set(df.columns)
+            if desconhecidas:
+                raise ErroConsulta(f"colunas desconhecidas: {', '.join(sorted(desconhecidas))}")
+            df = df[[c for c in ["UF", "Mes"] if c in df.columns] + colunas]
+        return df
+
+    def periodos(self, parametros):
+        periodos = PERIODOS
+        if lista(parametros, "periodo"):
+            periodos = []
+            for texto in lista(parametros, "periodo"):
+                inicio, fim = periodo(texto, "periodo", aceita_mes=True)
+                periodos.append((f"{inicio}–{fim}", inicio, fim))
+        coluna = um(parametros, "coluna", "Media_Publico")
+        somas = self.somas_uf()
+        if coluna not in somas.colunas:
+            raise ErroConsulta(f"coluna deve ser uma de {', '.join(somas.colunas)}")
+        tabela = somas.tabela(coluna, periodos, nome_valor=f"{coluna}_Periodo").round(2)
+        if lista(parametros, "uf"):
+            tabela = tabela[tabela["UF"].isin(lista(parametros, "uf"))]
+        return tabela
+
+    def recuperacao(self, parametros):
+        periodos = {nome: periodo(um(parametros, nome, f"{ini}:{fim}"), nome)
+                    for nome, (ini, fim) in PERIODOS_PADRAO.items()}
+        dados = monta_dados(self.tabela(ARQ_UF), periodos)
+        resultados, _ = ajusta_classificador(dados, float(um(parametros, "limiar", 0.9)))
+        return resultados
+
+    def grafico_uf(self, parametros):
+        uf, tipo = um(parametros, "uf"), um(parametros, "tipo", "total")
+        if tipo not in GRAFICOS_UF:
+            raise ErroConsulta(f"tipo deve ser um de {', '.join(GRAFICOS_UF)}")
+        df = self.quentes.obtem(("graficos", str(ARQ_UF)), [ARQ_UF], carrega_dados_graficos)
+        d = df[df["UF"] == uf].set_index("Mes").sort_index()
+        if d.empty:
+            raise ErroConsulta(f"UF sem dados: {uf}")
+        colunas, titulo = GRAFICOS_UF[tipo]
+        saida = io.BytesIO()
+        # as figuras dos modelos são compartilhadas: um desenho por vez
+        with self.trava_graficos:
+            if tipo == "boxplot":
+                grupos = list(d.groupby(d["Ano"]))
+                modelos()["boxplot"].desenha([g["Total_Publico"].dropna().values for _, g in grupos],
+                                             [str(ano) for ano, _ in grupos], f"{titulo} — {uf}", saida)
+            else:
+                modelos()[tipo].desenha(d.index, [d[c].values for c in colunas], f"{titulo} — {uf}", saida)
+        return saida.getvalue()
+
+    def publico(self, parametros):
+        dados = self.dados()
+        mascara = np.ones(len(dados), dtype=bool)
+        for nome, coluna in AGRUPAMENTOS.items():
+            if lista(parametros, nome):
+                mascara &= dados.mascara(coluna, lista(parametros, nome))
+        dias = dados.arrays["DATA_EXIBICAO"].astype(np.int64)
+        meses = (DIA_ZERO + dias.astype("timedelta64[D]")).astype("datetime64[M]").astype(np.int64)
+        if lista(parametros, "mes"):
+            mascara &= np.isin(meses, np.array(lista(parametros, "mes"), dtype="datetime64[M]").astype(np.int64))
+
+        por = um(parametros, "por", "uf")
+        publico = dados.arrays["PUBLICO"][mascara]
+        if por in AGRUPAMENTOS:
+            codigos = dados.arrays[AGRUPAMENTOS[por]][mascara].astype(np.int64)
+            rotulos = dados.dicionarios[AGRUPAMENTOS[por]]
+            base = 0
+        elif por in ("mes", "dia"):
+            codigos = (meses if por == "mes" else dias)[mascara]
+            base = int(codigos.min()) if len(codigos) else 0
+            codigos = codigos - base
+            rotulos = None
+        else:
+            raise ErroConsulta(f"por deve ser um de {', '.join([*AGRUPAMENTOS, 'mes', 'dia'])}")
+
+        total = np.bincount(codigos, weights=publico, minlength=1).astype(np.int64)
+        sessoes = np.bincount(codigos, minlength=1)
+        presentes = np.flatnonzero(sessoes)
+        if rotulos is not None:
+            chaves = rotulos[presentes]
+        else:
+            unidade = "datetime64[M]" if por == "mes" else "datetime64[D]"
+            inicio = np.datetime64("1970-01", "M") if por == "mes" else DIA_ZERO
+            chaves = (inicio + (presentes + base).astype("timedelta64[M]" if por == "mes" else "timedelta64[D]")
+                      ).astype(unidade).astype(str)
+        return pd.DataFrame({por: chaves, "Sessoes": sessoes[presentes], "Total_Publico": total[presentes]}) \
+            .sort_values("Total_Publico", ascending=False, ignore_index=True)
+
+    def quantis(self, parametros):
+        qs = [float(q) for q in (lista(parametros, "q") or [0.25, 0.5, 0.75])]
+        indice = self.indice()
+        celulas = dict(meses=lista(parametros, "mes"), ufs=lista(parametros, "uf"))
+        return {"sessoes": indice.n(**celulas),
+                "quantis": dict(zip(map(str, qs), map(float, indice.quantil(qs, **celulas))))}
+
+    # Rota -> (função, arquivos de que a resposta depende, tipo da resposta).
+    def rotas(self):
+        return {
+            "/estatisticas/uf": (lambda p: self.estatisticas(ARQ_UF, p, True), [ARQ_UF], "json"),
+            "/estatisticas/nacional": (lambda p: self.estatisticas(ARQ_NACIONAL, p, False), [ARQ_NACIONAL], "json"),
+            "/periodos": (self.periodos, [ARQ_UF], "json"),
+            "/recuperacao": (self.recuperacao, [ARQ_UF], "json"),
+            "/grafico/uf": (self.grafico_uf, [ARQ_UF], "png"),
+            "/publico": (self.publico, DADOS_FILTRADOS, "json"),
+            "/quantis": (self.quantis, [PASTA_INDICE / "segmentos.csv"], "json"),
+        }
+
+    # Devolve (código HTTP, tipo do conteúdo, corpo).
+    def responde(self, caminho, parametros):
+        rotas = self.rotas()
+        if caminho == "/":
+            return 200, "application/json", json.dumps({"rotas": sorted([*rotas, "/cache"])}).encode()
+        if caminho == "/cache":
+            return 200, "application/json", json.dumps(self.cache.resumo()).encode()
+        if caminho not in rotas:
+            return 404, "application/json", json.dumps({"erro": f"rota desconhecida: {caminho}"}).encode()
+
+        funcao, dependencias, tipo = rotas[caminho]
+        chave = (caminho, tuple(sorted((k, tuple(v)) for k, v in parametros.items())))
+
+        def calcula():
+            resultado = funcao(parametros)
+            if tipo == "png":
+                return resultado
+            if isinstance(resultado, pd.DataFrame):
+                return resultado.to_json(orient="records", force_ascii=False).encode("utf-8")
+            return json.dumps(resultado, ensure_ascii=False).encode("utf-8")
+
+        try:
+            corpo = self.cache.obtem(chave, dependencias, calcula)
+        except (ErroConsulta, ValueError, KeyError) as erro:
+            return 400, "application/json", json.dumps({"erro": str(erro)}, ensure_ascii=False).encode("utf-8")
+        except FileNotFoundError as erro:
+            return 404, "application/json", json.dumps({"erro": str(erro)}, ensure_ascii=False).encode("utf-8")
+        except Exception as erro:
+            # qualquer outra falha vira um 500 com o erro, em vez de derrubar a conexão
+            return 500, "application/json", json.dumps({"erro": f"{type(erro).__name__}: {erro}"},
+                                                       ensure_ascii=False).encode("utf-8")
+        conteudo = "image/png" if tipo == "png" else "application/json; charset=utf-8"
+        return 200, conteudo, corpo
+
+
+def cria_servidor(host, porta, estatisticas):
+    class Manipulador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            inicio = time.perf_counter()
+            url = urlparse(self.path)
+            codigo, conteudo, corpo = estatisticas.responde(url.path.rstrip("/") or "/", parse_qs(url.query))
+            self.send_response(codigo)
+            self.send_header("Content-Type", conteudo)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.send_header("X-Tempo-Ms", f"{(time.perf_counter() - inicio) * 1000:.1f}")
+            self.end_headers()
+            self.wfile.write(corpo)
+
+    return ThreadingHTTPServer((host, porta), Manipulador)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local das estatísticas (HTTP/JSON).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--cache", type=int, default=256, help="número máximo de respostas no cache")
+    args = parser.parse_args()
+
+    estatisticas = Estatisticas(args.cache)
+    servidor = cria_servidor(args.host, args.porta, estatisticas)
+    print(f"Servidor em http://{args.host}:{args.porta}/ (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
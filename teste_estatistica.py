@@ -1,82 +1,109 @@
+# Classificador de recuperação do público por UF (Naive Bayes gaussiano).
+#
+# Uso:
+#   python teste_estatistica.py                          (uma divisão treino/teste e o gráfico de probabilidades)
+#   python teste_estatistica.py --avaliar                (2000 divisões estratificadas, grava avaliacao_recuperacao.csv)
+#   python teste_estatistica.py --avaliar --loo --limiares 0.7 0.8 0.9 --todas-caracteristicas
+#   python teste_estatistica.py --avaliar --repeticoes 20000 --processos 4 --distribuicoes
+#
+# No modo --avaliar, o modelo é ajustado em lote para todas as reamostragens de
+# uma vez (ver ferramentas/naive_bayes_lote.py e ferramentas/recuperacao.py).
+import argparse
+
 import pandas as pd
 from pathlib import Path
 import matplotlib.pyplot as plt 
-from sklearn.preprocessing import LabelEncoder
-from sklearn.preprocessing import StandardScaler
-from sklearn.naive_bayes import GaussianNB
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, confusion_matrix, classification_report
 
-le = LabelEncoder()
-scaler = StandardScaler()
-
-
-df = pd.read_csv("estatisticas_publico_mensal.csv")
-print(df.columns)
-
-df["Mes"] = df["Mes"].astype(str)
-df["Media_Publico"] = pd.to_numeric(df["Media_Publico"], errors='coerce')
-
-# Calcular médias por estado e período
-df_pre = df[df["Mes"].between("2014-01", "2019-12")].groupby("UF")["Media_Publico"].mean().reset_index()
-df_pos = df[df["Mes"].between("2022-01", "2025-06")].groupby("UF")["Media_Publico"].mean().reset_index()
-
-# Combinar e definir recuperação
-df_recuperacao = pd.merge(df_pre, df_pos, on="UF", suffixes=("_pre", "_pos"))
-df_recuperacao["Recuperacao"] = df_recuperacao["Media_Publico_pos"] >= 0.9 * df_recuperacao["Media_Publico_pre"]
-df_recuperacao["Recuperacao"] = df_recuperacao["Recuperacao"].map({True: "Sim", False: "Não"})
-
-df_pandemia = df[df["Mes"].between("2020-01", "2021-12")].groupby("UF").agg({
-    "Media_Publico": "mean",
-    "Desvio_Padrao": "mean",
-    "IQR": "mean"
-}).reset_index()
-
-# Juntar tudo
-df_modelo = pd.merge(
-    df_recuperacao[["UF", "Recuperacao", "Media_Publico_pre"]],
-    df_pandemia,
-    on="UF"
-)
-
-df_modelo["Recuperacao_encoded"] = le.fit_transform(df_modelo["Recuperacao"])  # Sim=1, Não=0
-
-X = scaler.fit_transform(df_modelo[["Media_Publico_pre", "Media_Publico", "Desvio_Padrao", "IQR"]])
-y = df_modelo["Recuperacao_encoded"]
-
-# Dividir em treino (70%) e teste (30%)
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
-
-# Treinar o modelo
-model = GaussianNB()
-model.fit(X_train, y_train)
-
-# Prever no conjunto de teste
-y_pred = model.predict(X_test)
-
-print(f"Acurácia: {accuracy_score(y_test, y_pred):.2f}")
-print("\nMatriz de Confusão:\n", confusion_matrix(y_test, y_pred))
-print("\nRelatório de Classificação:\n", classification_report(y_test, y_pred))
-
-# Probabilidades de cada classe
-probabilidades = model.predict_proba(X)
-
-# DataFrame com resultados
-df_resultados = df_modelo.copy()
-df_resultados["Prob_Sim"] = probabilidades[:, 1]  # Probabilidade de "Sim"
-df_resultados["Prob_Nao"] = probabilidades[:, 0]  # Probabilidade de "Não"
-
-# Ordenar por probabilidade de recuperação
-df_resultados.sort_values("Prob_Sim", ascending=False, inplace=True)
-
-# Gráfico
-plt.figure(figsize=(10, 6))
-plt.barh(df_resultados["UF"], df_resultados["Prob_Sim"], color="skyblue")
-plt.title("Probabilidade de Recuperação por Estado")
-plt.xlabel("Probabilidade (Recuperação = Sim)")
-plt.xlim(0, 1)
-plt.grid(axis="x", linestyle="--")
-plt.tight_layout()
-plt.show()
-
-df_resultados.to_csv("resultados_recuperacao.csv", index=False)
\ No newline at end of file
+from ferramentas.instrumentacao import conta_linhas, etapa, instrumenta_script
+from ferramentas.recuperacao import (CARACTERISTICAS, LIMIAR_PADRAO, PERIODOS_PADRAO, ajusta_classificador, avalia,
+                                     monta_dados, subconjuntos)
+from ferramentas.tabelas import le_tabela, grava_tabela
+
+
+def classifica(df_modelo, limiar):
+    df_resultados, (y_test, y_pred) = ajusta_classificador(df_modelo, limiar)
+
+    print(f"Acurácia: {accuracy_score(y_test, y_pred):.2f}")
+    print("\nMatriz de Confusão:\n", confusion_matrix(y_test, y_pred))
+    print("\nRelatório de Classificação:\n", classification_report(y_test, y_pred))
+
+    # Gráfico
+    plt.figure(figsize=(10, 6))
+    plt.barh(df_resultados["UF"], df_resultados["Prob_Sim"], color="skyblue")
+    plt.title("Probabilidade de Recuperação por Estado")
+    plt.xlabel("Probabilidade (Recuperação = Sim)")
+    plt.xlim(0, 1)
+    plt.grid(axis="x", linestyle="--")
+    plt.tight_layout()
+    plt.show()
+
+    grava_tabela(df_resultados, "resultados_recuperacao.csv")
+
+
+def avaliacao(df_modelo, args):
+    conjuntos = subconjuntos() if args.todas_caracteristicas else [CARACTERISTICAS]
+    with etapa("avaliacao", linhas=len(df_modelo)):
+        resumo, distribuicoes = avalia(df_modelo, args.limiares, conjuntos, repeticoes=args.repeticoes,
+                                       fracao_teste=args.fracao_teste, loo=args.loo, semente=args.semente,
+                                       processos=args.processos)
+
+    sem_classes = resumo["Reamostragens"] == 0
+    if sem_classes.any():
+        print("Limiares com uma classe só (não avaliados):",
+              ", ".join(map(str, sorted(resumo.loc[sem_classes, "Limiar"].unique()))))
+    with pd.option_context("display.max_rows", 80, "display.width", 200):
+        print(resumo[~sem_classes].sort_values("Acuracia_Media", ascending=False)
+              .round(3).to_string(index=False))
+
+    grava_tabela(resumo, "avaliacao_recuperacao.csv")
+    if args.distribuicoes:
+        grava_tabela(distribuicoes, "distribuicoes_acuracia_recuperacao.csv")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classificador de recuperação do público por UF.")
+    parser.add_argument("--avaliar", action="store_true",
+                        help="avalia o modelo com muitas reamostragens em vez de uma divisão só")
+    parser.add_argument("--repeticoes", type=int, default=2000, help="divisões estratificadas por combinação")
+    parser.add_argument("--fracao-teste", type=float, default=0.3)
+    parser.add_argument("--loo", action="store_true", help="leave-one-out em vez de divisões aleatórias")
+    parser.add_argument("--limiares", type=float, nargs="+", default=[LIMIAR_PADRAO],
+                        help="fração da média pré-pandemia que conta como recuperação")
+    parser.add_argument("--todas-caracteristicas", action="store_true",
+                        help="avalia todos os subconjuntos de " + ", ".join(CARACTERISTICAS))
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--processos", type=int, default=1, help="processos para dividir as combinações")
+    parser.add_argument("--distribuicoes", action="store_true",
+                        help="grava também a acurácia de cada reamostragem")
+    for nome, (inicio, fim) in PERIODOS_PADRAO.items():
+        parser.add_argument(f"--{nome}", nargs=2, metavar=("INICIO", "FIM"), default=[inicio, fim],
+                            help=f"período {nome} em AAAA-MM (padrão: {inicio} {fim})")
+    args = parser.parse_args()
+    instrumenta_script()
+
+    # o modelo compara as UFs, então parte das estatísticas mensais por UF
+    df = le_tabela("estatisticas_por_UF_mensal.csv")
+    conta_linhas(len(df))
+    print(df.columns)
+
+    df["Mes"] = df["Mes"].astype(str)
+    df["Media_Publico"] = pd.to_numeric(df["Media_Publico"], errors='coerce')
+
+    # Calcular médias por estado e período (somas acumuladas por UF, ver ferramentas/periodos.py)
+    periodos = {nome: tuple(getattr(args, nome)) for nome in PERIODOS_PADRAO}
+    df_modelo = monta_dados(df, periodos)
+    if df_modelo.empty:
+        raise SystemExit("Nenhuma UF tem dados em todos os períodos ("
+                         + ", ".join(f"{nome}: {inicio} a {fim}" for nome, (inicio, fim) in periodos.items())
+                         + "); confira os meses de estatisticas_por_UF_mensal.csv ou mude os períodos "
+                           "(--pre, --pandemia, --pos)")
+
+    if args.avaliar:
+        avaliacao(df_modelo, args)
+    else:
+        classifica(df_modelo, args.limiares[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,32 @@
 # ESSE CÓDIGO É RESPONSÁVEL POR FILTRAR DADOS DE ARQUIVOS CSV PARA SOMENTE OS QUE PODEM E SERÃO USADOS NAS ANÁLISES ESTATÍSTICAS
 #FOI EXCLUIDO O MES 07/2025 PELA FALTA DE DADOS
+#
+# Uso:
+#   python tratador_de_dados/filtro_de_dados.py                       (lê cada mês inteiro na memória)
+#   python tratador_de_dados/filtro_de_dados.py --tamanho-bloco 200000 (modo streaming, em blocos de linhas)
+#   python tratador_de_dados/filtro_de_dados.py --processos 8          (vários arquivos em paralelo)
+#   python tratador_de_dados/filtro_de_dados.py --formato parquet      (dataset colunar, uma pasta por mês;
+#                                                                       precisa do pyarrow)
+#   python tratador_de_dados/filtro_de_dados.py --deduplicar tudo      (também tira linhas repetidas dentro
+#                                                                       do mesmo arquivo; ver ferramentas/deduplicacao.py)
+#   python tratador_de_dados/filtro_de_dados.py --origem bilheteria.zip (lê direto de .zip, .csv.gz ou .csv.xz,
+#                                                                       ou de uma pasta com eles, sem extrair)
+import argparse
+import os
+import re
+import shutil
+import sys
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from ferramentas.arquivos_brutos import lista_entradas
+from ferramentas.deduplicacao import HashesDoArquivo, contem, hashes_das_linhas, reconcilia
+from ferramentas.instrumentacao import cronometra, etapa, instrumenta_script, parcial
+
 pasta_origem = Path("bilheteria-diaria-obras-por-distribuidoras-csv")
-arquivos_csv = pasta_origem.glob("*.csv")
 
 colunas_desejadas = [
     "DATA_EXIBICAO",
@@ -17,40 +39,310 @@ colunas_desejadas = [
 ]
 
 pasta_destino = Path("dados_filtrados")
-pasta_destino.mkdir(exist_ok=True)
-
-ano, mes = 2014, 1
+pasta_destino_parquet = Path("dados_filtrados_parquet")
 
-for arq in arquivos_csv:
-    nome_saida = f"{ano}-{mes:02d}"
-    print(f"Lendo {arq.name} -> {nome_saida}")
+# Parâmetros de leitura comuns aos dois modos (arquivo inteiro e em blocos).
+opcoes_leitura = dict(
+    sep=";",
+    decimal=",",
+    usecols=colunas_desejadas,
+    na_values=["", " ", "-", "NA", "N/A"],
+)
 
-    dados_filtrados = pd.read_csv(
-        arq,
-        sep=";",
-        decimal=",",
-        low_memory=False,
-        usecols=colunas_desejadas,       
-        na_values=["", " ", "-", "NA", "N/A"] 
-    )
 
-    dados_filtrados["PUBLICO"] = (
-        dados_filtrados["PUBLICO"]
+# Limpa a coluna PUBLICO e descarta linhas incompletas. Como é uma contagem de
+# pessoas, volta para inteiro quando possível: assim a saída não depende de um
+# bloco ter ou não ter valores ausentes.
+def limpa_dados(dados):
+    dados["PUBLICO"] = (
+        dados["PUBLICO"]
         .astype(str).str.strip()
         .replace({"": None})
     )
-    dados_filtrados["PUBLICO"] = pd.to_numeric(dados_filtrados["PUBLICO"], errors="coerce")
+    dados["PUBLICO"] = pd.to_numeric(dados["PUBLICO"], errors="coerce")
+
+    dados = dados.dropna()
+
+    if len(dados) and (dados["PUBLICO"] % 1 == 0).all():
+        dados = dados.astype({"PUBLICO": "int64"})
+    return dados
+
+
+# Gera os dados limpos de um arquivo (uma Entrada de ferramentas/arquivos_brutos.py;
+# os compactados são descompactados aos poucos, direto para o pandas). Sem
+# `tamanho_bloco` lê o arquivo inteiro de uma vez (comportamento original); com
+# ele, lê em blocos desse número de linhas, então o pico de memória depende do
+# bloco e não do tamanho do mês.
+def le_blocos(arq, tamanho_bloco=None):
+    if not tamanho_bloco:
+        with arq.abre() as fluxo:
+            yield limpa_dados(pd.read_csv(fluxo, low_memory=False, **opcoes_leitura))
+        return
+
+    vazio = True
+    with arq.abre() as fluxo, pd.read_csv(fluxo, chunksize=tamanho_bloco, **opcoes_leitura) as leitor:
+        for bloco in leitor:
+            vazio = False
+            yield limpa_dados(bloco)
+
+    # arquivo sem nenhuma linha: devolve só as colunas, como no modo inteiro
+    if vazio:
+        with arq.abre() as fluxo:
+            yield limpa_dados(pd.read_csv(fluxo, nrows=0, **opcoes_leitura))
+
+
+def grava_csv(blocos, saida):
+    total_linhas = 0
+    primeiro = True
+    for bloco in blocos:
+        with parcial("gravacao"):
+            bloco.to_csv(saida, mode="w" if primeiro else "a", header=primeiro, index=False)
+        primeiro = False
+        total_linhas += len(bloco)
+    return total_linhas
+
+
+# Esquema do formato colunar: textos repetitivos como categorias (dicionário),
+# data como data de verdade e PUBLICO como inteiro.
+def esquema_parquet(sem_uf=False):
+    import pyarrow as pa
+
+    categoria = pa.dictionary(pa.int32(), pa.string())
+    campos = [
+        ("DATA_EXIBICAO", pa.date32()),
+        ("TITULO_BRASIL", pa.string()),
+        ("PAIS_OBRA", categoria),
+        ("PUBLICO", pa.int64()),
+        ("MUNICIPIO_SALA_COMPLEXO", pa.string()),
+        ("UF_SALA_COMPLEXO", categoria),
+        ("RAZAO_SOCIAL_DISTRIBUIDORA", categoria),
+    ]
+    if sem_uf:
+        campos = [c for c in campos if c[0] != "UF_SALA_COMPLEXO"]
+    return pa.schema(campos)
+
+
+# Grava um mês como `pasta_mes/part-0.parquet` ou, com `particionar_uf`, como
+# `pasta_mes/UF_SALA_COMPLEXO=XX/part-0.parquet` (partições no estilo hive).
+# Cada bloco vira um row group, então o modo streaming continua com memória limitada.
+def grava_parquet(blocos, pasta_mes, particionar_uf=False):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if pasta_mes.exists():
+        shutil.rmtree(pasta_mes)
+    pasta_mes.mkdir(parents=True)
+
+    esquema = esquema_parquet(sem_uf=particionar_uf)
+    escritores = {}
+
+    def escreve(dados, arquivo):
+        tabela = pa.Table.from_pandas(dados, schema=esquema, preserve_index=False)
+        if arquivo not in escritores:
+            arquivo.parent.mkdir(parents=True, exist_ok=True)
+            escritores[arquivo] = pq.ParquetWriter(arquivo, esquema, compression="zstd")
+        with parcial("gravacao"):
+            escritores[arquivo].write_table(tabela)
+
+    total_linhas = 0
+    try:
+        for bloco in blocos:
+            total_linhas += len(bloco)
+            bloco = bloco.assign(
+                DATA_EXIBICAO=pd.to_datetime(bloco["DATA_EXIBICAO"], format="%d/%m/%Y", errors="coerce")
+            )
+            if particionar_uf:
+                for uf, parte in bloco.groupby("UF_SALA_COMPLEXO", sort=False):
+                    parte = parte.drop(columns="UF_SALA_COMPLEXO")
+                    escreve(parte, pasta_mes / f"UF_SALA_COMPLEXO={uf}" / "part-0.parquet")
+            elif len(bloco) or not escritores:
+                escreve(bloco, pasta_mes / "part-0.parquet")
+    finally:
+        for escritor in escritores.values():
+            escritor.close()
+    return total_linhas
+
+
+# Guarda o hash de cada sessão mantida (e, se for o caso, tira as repetidas do
+# próprio arquivo) enquanto os blocos passam.
+def deduplica(blocos, hashes):
+    for bloco in blocos:
+        with parcial("deduplicacao"):
+            bloco = hashes.filtra(bloco)
+        yield bloco
+
+
+# Cada arquivo é uma etapa no log de instrumentação, com o tempo de leitura
+# (parse do CSV + limpeza) separado do tempo de gravação.
+# `deduplicar`: "entre-arquivos" (guarda os hashes para a reconciliação entre os
+# meses), "tudo" (também tira as linhas repetidas no arquivo) ou "nao".
+# Devolve (saída, linhas gravadas, linhas repetidas no arquivo).
+def filtra_arquivo(arq, destino, nome_saida, tamanho_bloco=None, formato="csv", particionar_uf=False,
+                   deduplicar="nao"):
+    with etapa("filtra_arquivo", arquivo=arq.nome) as medicao:
+        # bytes lidos do disco: o tamanho compactado, quando for o caso
+        medicao.bytes_lidos += arq.tamanho
+        blocos = cronometra(le_blocos(arq, tamanho_bloco), "leitura")
+        hashes = None
+        if deduplicar != "nao":
+            hashes = HashesDoArquivo(descarta_repetidos=deduplicar == "tudo")
+            blocos = deduplica(blocos, hashes)
+        if formato == "parquet":
+            saida = destino / f"MES={nome_saida}"
+            linhas = grava_parquet(blocos, saida, particionar_uf)
+        else:
+            saida = destino / f"dados_filtrados[{nome_saida}].csv"
+            linhas = grava_csv(blocos, saida)
+        repetidas = 0
+        if hashes is not None:
+            hashes.grava(destino, nome_saida)
+            repetidas = hashes.repetidas
+        medicao.linhas = linhas
+        medicao.gravou(saida)
+    return saida, linhas, repetidas
+
+
+# Regrava a saída de um mês sem as sessões cujos hashes estão em `repetidos`
+# (já presentes num mês anterior). Devolve quantas linhas saíram.
+def remove_sessoes(destino, mes, repetidos, formato="csv", particionar_uf=False):
+    repetidos = np.sort(repetidos)
+    if formato == "parquet":
+        import pyarrow.dataset as ds
+
+        pasta_mes = destino / f"MES={mes}"
+        dados = ds.dataset(pasta_mes, format="parquet", partitioning="hive").to_table().to_pandas()
+        dados["UF_SALA_COMPLEXO"] = dados["UF_SALA_COMPLEXO"].astype(str)
+        manter = ~contem(repetidos, hashes_das_linhas(dados))
+        dados = dados[manter].assign(
+            DATA_EXIBICAO=pd.to_datetime(dados.loc[manter, "DATA_EXIBICAO"]).dt.strftime("%d/%m/%Y"))
+        grava_parquet([dados], pasta_mes, particionar_uf)
+    else:
+        saida = destino / f"dados_filtrados[{mes}].csv"
+        # tudo como texto, para regravar as linhas mantidas exatamente como estavam
+        dados = pd.read_csv(saida, dtype=str, keep_default_na=False)
+        manter = ~contem(repetidos, hashes_das_linhas(dados))
+        dados[manter].to_csv(saida, index=False)
+    return int((~manter).sum())
+
+
+# Descobre o mês (AAAA-MM) de um arquivo bruto. Primeiro tenta pelo nome do CSV
+# (ex.: bilheteria-diaria-obras-por-distribuidoras-2014-01.csv, também dentro de
+# um .zip ou como .csv.gz); se o nome não tiver a data, usa o mês mais frequente
+# da coluna DATA_EXIBICAO nas primeiras `linhas_amostra_mes` linhas, sem ler
+# (nem descompactar) o arquivo inteiro antes de começar a filtragem.
+padrao_mes = re.compile(r"(20\d{2})[-_]?(0[1-9]|1[0-2])(?!\d)")
+linhas_amostra_mes = 100_000
+
+
+def mes_do_arquivo(arq):
+    encontrados = padrao_mes.findall(arq.stem)
+    if encontrados:
+        ano, mes = encontrados[-1]
+        return f"{ano}-{mes}"
+
+    with arq.abre() as fluxo:
+        datas = pd.read_csv(fluxo, sep=";", usecols=["DATA_EXIBICAO"], dtype=str,
+                            nrows=linhas_amostra_mes)["DATA_EXIBICAO"]
+    meses = pd.to_datetime(datas, format="%d/%m/%Y", errors="coerce").dt.strftime("%Y-%m").dropna()
+    if meses.empty:
+        raise ValueError(f"Não foi possível identificar o mês de {arq.nome}")
+    return meses.mode().iloc[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filtra os CSVs de bilheteria diária da ANCINE.")
+    parser.add_argument("--origem", type=Path, default=pasta_origem,
+                        help="pasta com os CSVs brutos da ANCINE, arquivo .zip/.csv.gz/.csv.xz "
+                             "ou pasta com esses arquivos")
+    parser.add_argument("--destino", type=Path, default=None,
+                        help="pasta onde os arquivos filtrados serão salvos "
+                             f"(padrão: {pasta_destino} ou {pasta_destino_parquet})")
+    parser.add_argument("--formato", choices=["csv", "parquet"], default="csv",
+                        help="csv (um arquivo por mês) ou parquet (dataset particionado por mês)")
+    parser.add_argument("--particionar-uf", action="store_true",
+                        help="no formato parquet, particiona cada mês também por UF")
+    parser.add_argument("--tamanho-bloco", type=int, default=None,
+                        help="lê cada arquivo em blocos com esse número de linhas (modo streaming)")
+    parser.add_argument("--processos", type=int, default=1,
+                        help="número de processos para filtrar arquivos em paralelo "
+                             "(0 = um por núcleo da máquina)")
+    parser.add_argument("--deduplicar", choices=["entre-arquivos", "tudo", "nao"], default="entre-arquivos",
+                        help="entre-arquivos: tira de um mês as sessões que já estão num mês anterior "
+                             "(arquivos republicados ou sobrepostos); tudo: também as linhas repetidas "
+                             "dentro do mesmo arquivo; nao: grava tudo como está")
+    args = parser.parse_args()
+    instrumenta_script()
+
+    if args.tamanho_bloco is not None and args.tamanho_bloco <= 0:
+        parser.error("--tamanho-bloco deve ser maior que zero")
+    if args.processos < 0:
+        parser.error("--processos não pode ser negativo")
+    if args.processos == 0:
+        args.processos = os.cpu_count() or 1
+
+    if args.particionar_uf and args.formato != "parquet":
+        parser.error("--particionar-uf só vale para --formato parquet")
+    if args.destino is None:
+        args.destino = pasta_destino_parquet if args.formato == "parquet" else pasta_destino
+
+    args.destino.mkdir(exist_ok=True)
+
+    arquivos_csv = lista_entradas(args.origem)
+
+    # o mês de cada saída vem do próprio arquivo, não da ordem do glob. Dois
+    # arquivos do mesmo mês são um mês republicado (corrigido): fica o mais
+    # recente (no empate, o último na ordem dos nomes)
+    tarefas = {}
+    for arq in arquivos_csv:
+        nome_saida = mes_do_arquivo(arq)
+        anterior = tarefas.get(nome_saida)
+        if anterior is not None:
+            if arq.modificado < anterior.modificado:
+                arq, anterior = anterior, arq
+            print(f"{anterior.nome} e {arq.nome} são do mesmo mês ({nome_saida}): usando {arq.nome}, o mais recente")
+        tarefas[nome_saida] = arq
+
+    resultados = {}
+    if args.processos == 1:
+        for nome_saida, arq in tarefas.items():
+            print(f"Lendo {arq.nome} -> {nome_saida}")
+            saida, linhas, repetidas = filtra_arquivo(arq, args.destino, nome_saida, args.tamanho_bloco,
+                                                      args.formato, args.particionar_uf, args.deduplicar)
+            resultados[nome_saida] = (linhas, repetidas)
+            print(f"Salvo: {saida}")
+    else:
+        with ProcessPoolExecutor(max_workers=args.processos) as executor:
+            futuros = {
+                nome_saida: executor.submit(filtra_arquivo, arq, args.destino, nome_saida, args.tamanho_bloco,
+                                            args.formato, args.particionar_uf, args.deduplicar)
+                for nome_saida, arq in tarefas.items()
+            }
+            for nome_saida, futuro in futuros.items():
+                saida, linhas, repetidas = futuro.result()
+                resultados[nome_saida] = (linhas, repetidas)
+                print(f"Salvo: {saida}")
 
-    dados_filtrados = dados_filtrados.dropna()
+    if args.deduplicar != "nao":
+        # depois de todos os meses filtrados: sessões já presentes num mês anterior saem do seguinte
+        with etapa("reconciliacao", linhas=sum(linhas for linhas, _ in resultados.values())):
+            removidas = reconcilia(args.destino, resultados, lambda mes, repetidos: remove_sessoes(
+                args.destino, mes, repetidos, args.formato, args.particionar_uf))
+        relatorio = pd.DataFrame([
+            {"Mes": mes, "Linhas": linhas - removidas[mes], "Repetidas_no_Arquivo": repetidas,
+             "Repetidas_de_Meses_Anteriores": removidas[mes]}
+            for mes, (linhas, repetidas) in sorted(resultados.items())
+        ], columns=["Mes", "Linhas", "Repetidas_no_Arquivo", "Repetidas_de_Meses_Anteriores"])
+        relatorio.to_csv("duplicatas_por_mes.csv", index=False)
+        com_repeticoes = relatorio[(relatorio["Repetidas_no_Arquivo"] > 0)
+                                   | (relatorio["Repetidas_de_Meses_Anteriores"] > 0)]
+        if len(com_repeticoes):
+            print(com_repeticoes.to_string(index=False))
+        print(f"Sessões repetidas removidas: {int(relatorio['Repetidas_no_Arquivo'].sum())} no próprio arquivo, "
+              f"{int(relatorio['Repetidas_de_Meses_Anteriores'].sum())} de meses anteriores "
+              "(detalhes em duplicatas_por_mes.csv)")
 
-    # salva
-    saida = pasta_destino / f"dados_filtrados[{nome_saida}].csv"
-    dados_filtrados.to_csv(saida, index=False)
-    print(f"Salvo: {saida}")
+    print("Arquivos filtrados salvos.")
 
-    mes += 1
-    if mes > 12:
-        mes = 1
-        ano += 1
 
-print("Arquivos filtrados salvos.")
+if __name__ == "__main__":
+    main()